@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+⏱️ Agendador com Prazo (deadline)
+================================
+
+Processa os arquivos em ordem de importância e replaneja continuamente a partir
+da latência observada por chamada (média móvel exponencial). Conforme o prazo
+se aproxima, degrada em degraus: trechos menores, modelo mais barato, prompts
+só de resumo e, por fim, pula arquivos de baixa prioridade. Sempre reserva
+tempo para a consolidação; as degradações vão para os metadados da execução.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Degraus em ordem crescente de degradação
+LEVELS = ("normal", "small_chunks", "lite_model", "summary_only", "skip_low_priority")
+# Latência relativa de cada degrau (estimativa até haver observações do próprio degrau)
+LEVEL_COST_FACTORS = {"normal": 1.0, "small_chunks": 0.75, "lite_model": 0.45, "summary_only": 0.3,
+                      "skip_low_priority": 0.3}
+# Limite de caracteres do trecho enviado ao LLM por degrau (None = MAX_CHARS)
+LEVEL_MAX_CHARS = {"normal": None, "small_chunks": 12000, "lite_model": 12000, "summary_only": 4000,
+                   "skip_low_priority": 4000}
+LOW_PRIORITY_IMPORTANCE = 0.4
+
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([hms]?)")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "": 1}
+
+
+def parse_duration(text: str) -> float:
+    """⏲️ Converte durações como `20m`, `1h30m`, `90s` ou `300` em segundos"""
+    cleaned = str(text).strip().lower().replace(" ", "")
+    matches = DURATION_RE.findall(cleaned)
+    if not cleaned or "".join(n + u for n, u in matches) != cleaned:
+        raise ValueError(f"duração inválida: {text!r} (use, por exemplo, 20m, 1h30m, 90s)")
+    return sum(float(n) * DURATION_UNITS[u] for n, u in matches)
+
+
+class DeadlineScheduler:
+    """⏱️ Replaneja o nível de degradação a partir da latência observada e do tempo restante"""
+
+    def __init__(self, deadline_seconds: float, consolidation_reserve: Optional[float] = None,
+                 initial_latency: float = 15.0, consolidation_latency: float = 60.0,
+                 concurrency: int = 1, ewma_alpha: float = 0.3, safety_margin: float = 1.15):
+        self.deadline_seconds = deadline_seconds
+        # Reserva: ~1.5x a latência esperada da consolidação, limitada a metade do prazo
+        if consolidation_reserve is None:
+            consolidation_reserve = max(consolidation_latency * 1.5, deadline_seconds * 0.1)
+        self.consolidation_reserve = min(consolidation_reserve, deadline_seconds * 0.5)
+        self.initial_latency = initial_latency
+        self.concurrency = max(1, concurrency)
+        self.ewma_alpha = ewma_alpha
+        self.safety_margin = safety_margin
+        self.started = time.monotonic()
+        self.latency: Dict[str, float] = {}
+        self.observations: Dict[str, int] = {}
+        self.level = "normal"
+        self.transitions: List[Dict] = []
+        self.degraded: List[Dict] = []
+        self.skipped: List[Dict] = []
+
+    # ------------------------------------------------------------------
+    # Tempo e latência
+    # ------------------------------------------------------------------
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def time_left(self) -> float:
+        """⌛ Segundos restantes até o prazo"""
+        return self.deadline_seconds - self.elapsed()
+
+    def budget_for_files(self) -> float:
+        """💰 Tempo restante para a fase por arquivo (descontada a reserva de consolidação)"""
+        return self.time_left() - self.consolidation_reserve
+
+    def observe(self, level: str, seconds: float) -> None:
+        """📈 Atualiza a média móvel exponencial da latência por chamada do degrau"""
+        prev = self.latency.get(level)
+        self.latency[level] = seconds if prev is None else self.ewma_alpha * seconds + (1 - self.ewma_alpha) * prev
+        self.observations[level] = self.observations.get(level, 0) + 1
+
+    def estimated_latency(self, level: str) -> float:
+        """🔮 Latência esperada por arquivo num degrau (observada ou escalada de outro degrau)"""
+        if level in self.latency:
+            return self.latency[level]
+        # Sem observação do degrau: normaliza a partir do mais observado
+        if self.latency:
+            ref = max(self.observations, key=self.observations.get)
+            base = self.latency[ref] / LEVEL_COST_FACTORS[ref]
+        else:
+            base = self.initial_latency
+        return base * LEVEL_COST_FACTORS[level]
+
+    # ------------------------------------------------------------------
+    # Planejamento
+    # ------------------------------------------------------------------
+    @staticmethod
+    def ordered(candidates: List[Tuple]) -> List[Tuple]:
+        """🥇 Ordena tuplas (importância, ...) da mais para a menos importante (estável)"""
+        return sorted(candidates, key=lambda c: -c[0])
+
+    def plan(self, remaining_files: int) -> str:
+        """🧠 Escolhe o menor degrau de degradação que cabe no orçamento.
+
+        `remaining_files` conta os arquivos ainda não processados (incluindo o atual).
+        """
+        budget = self.budget_for_files()
+        n = remaining_files
+        level = LEVELS[-1]
+        for candidate in LEVELS[:-1]:
+            needed = n * self.estimated_latency(candidate) * self.safety_margin / self.concurrency
+            if needed <= budget:
+                level = candidate
+                break
+        if level != self.level:
+            self.transitions.append({
+                "at_seconds": round(self.elapsed(), 1),
+                "from": self.level,
+                "to": level,
+                "remaining_files": n,
+                "budget_seconds": round(budget, 1),
+            })
+            self.level = level
+        return level
+
+    def decide(self, rel_path: str, importance: float, remaining_files: int) -> Tuple[str, Optional[str]]:
+        """🚦 Retorna (degrau, motivo_para_pular) para o próximo arquivo.
+
+        No último degrau, arquivos importantes ainda são analisados em modo resumo.
+        """
+        level = self.plan(remaining_files)
+        if self.budget_for_files() <= 0:
+            reason = "prazo: tempo restante reservado para a consolidação"
+        elif level == "skip_low_priority" and importance <= LOW_PRIORITY_IMPORTANCE:
+            reason = f"prazo: baixa prioridade (importância {importance})"
+        elif level == "skip_low_priority" and \
+                self.estimated_latency(level) * self.safety_margin > self.budget_for_files():
+            reason = "prazo: sem tempo para mais uma chamada"
+        else:
+            reason = None
+        if reason:
+            self.skipped.append({"file": rel_path, "importance": importance, "reason": reason})
+        elif level != "normal":
+            self.degraded.append({"file": rel_path, "level": level})
+        return level, reason
+
+    def can_consolidate(self, expected_seconds: Optional[float] = None) -> bool:
+        """🧾 Há tempo para a consolidação com LLM? (senão, usa o fallback local)"""
+        expected = expected_seconds if expected_seconds is not None else self.consolidation_reserve / 1.5
+        return self.time_left() >= expected
+
+    def summary(self) -> Dict:
+        """📊 Resumo para os metadados da execução"""
+        by_level: Dict[str, int] = {}
+        for d in self.degraded:
+            by_level[d["level"]] = by_level.get(d["level"], 0) + 1
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "consolidation_reserve_seconds": round(self.consolidation_reserve, 1),
+            "elapsed_seconds": round(self.elapsed(), 1),
+            "final_level": self.level,
+            "latency_ewma_seconds": {k: round(v, 2) for k, v in self.latency.items()},
+            "transitions": self.transitions,
+            "degraded_counts": by_level,
+            "degraded_files": self.degraded,
+            "skipped_files": self.skipped,
+        }
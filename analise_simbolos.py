@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+🧩 Análise Incremental por Símbolo
+=================================
+
+Para arquivos grandes, a análise por arquivo é feita por unidades de
+símbolos de topo (classes e funções via ``ast`` no Python; heurística de
+declarações no início da linha para JS/TS). Cada unidade tem o próprio hash
+e resultado em cache, então uma edição reanalisa só as unidades alteradas e
+o relatório do arquivo é remontado localmente, sem LLM.
+
+Símbolos pequenos vizinhos são agrupados em unidades com fronteiras
+definidas pelo conteúdo (hash do símbolo), para que editar um símbolo não
+desloque o agrupamento do restante do arquivo.
+"""
+
+import ast
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from resultados_estruturados import SCORE_KEYS
+
+# Arquivos a partir deste tamanho são analisados por símbolo
+SYMBOL_MIN_LINES = 400
+# Tamanho alvo/máximo de uma unidade (vários símbolos pequenos por chamada)
+UNIT_TARGET_CHARS = 6000
+UNIT_MAX_CHARS = 20000
+# Fronteira de unidade definida pelo conteúdo: ~1 a cada N símbolos fecha a unidade
+BOUNDARY_MODULUS = 4
+MODULE_SYMBOL = "<módulo>"
+
+PYTHON_EXTS = (".py",)
+JS_EXTS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+# Declarações de topo (coluna 0) em JS/TS
+JS_DECLARATION_RE = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:async\s+)?(?:abstract\s+)?"
+    r"(?:function\*?|class|interface|type|enum|const|let|var)\s+([A-Za-z_$][\w$]*)"
+)
+JS_METHOD_RE = re.compile(
+    r"^\s+(?:(?:public|private|protected|static|async|get|set|override|readonly)\s+)*"
+    r"(?!if\b|for\b|while\b|switch\b|return\b|catch\b)([A-Za-z_$#][\w$]*)\s*(?:<[^>]*>)?\s*\("
+)
+LINE_MARKER_RE = re.compile(r"^@@ L(\d+)", re.MULTILINE)
+# Citações de linha no markdown de uma unidade ("linha 12", "linhas 3-8", "L40")
+LINE_CITATION_RE = re.compile(r"\b(?P<word>[Ll]inhas?|[Ll]ines?)(?P<sp>\s+)(?P<a>\d+)(?:(?P<sep>\s*[-–]\s*)(?P<b>\d+))?"
+                              r"|\bL(?P<l>\d+)\b")
+
+
+@dataclass
+class Symbol:
+    """🔖 Símbolo de topo (ou o código solto do módulo) com suas linhas no arquivo"""
+    name: str
+    start_line: int
+    end_line: int
+    text: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+@dataclass
+class SymbolUnit:
+    """📦 Unidade de análise: um ou mais símbolos consecutivos"""
+    symbols: List[Symbol]
+
+    @property
+    def label(self) -> str:
+        names = [s.name for s in self.symbols]
+        return ", ".join(names) if len(names) <= 4 else f"{', '.join(names[:3])} e mais {len(names) - 3}"
+
+    @property
+    def start_line(self) -> int:
+        return self.symbols[0].start_line
+
+    @property
+    def end_line(self) -> int:
+        return self.symbols[-1].end_line
+
+    @property
+    def text(self) -> str:
+        return "\n".join(s.text for s in self.symbols)
+
+
+def _span_chars(lines: List[str], start: int, end: int) -> int:
+    return sum(len(line) + 1 for line in lines[start - 1:end])
+
+
+def _python_starts(content: str, lines: List[str]) -> Optional[List[Tuple[str, int]]]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    start_of = lambda node: min([node.lineno] + [d.lineno for d in node.decorator_list])  # noqa: E731
+    starts = []
+    for node in tree.body:
+        if not isinstance(node, definitions):
+            continue
+        starts.append((node.name, start_of(node)))
+        if isinstance(node, ast.ClassDef) and _span_chars(lines, start_of(node), node.end_lineno) > UNIT_MAX_CHARS:
+            # Classe grande: cada método vira um símbolo (`Classe.método`); o cabeçalho fica com a classe
+            starts.extend((f"{node.name}.{child.name}", start_of(child))
+                          for child in node.body if isinstance(child, definitions))
+    return starts
+
+
+def _js_starts(lines: List[str]) -> List[Tuple[str, int]]:
+    tops = [(m.group(1), i + 1) for i, line in enumerate(lines) if (m := JS_DECLARATION_RE.match(line))]
+    starts = []
+    for k, (name, start) in enumerate(tops):
+        starts.append((name, start))
+        end = tops[k + 1][1] - 1 if k + 1 < len(tops) else len(lines)
+        if "class " in lines[start - 1] and _span_chars(lines, start, end) > UNIT_MAX_CHARS:
+            # Classe grande: métodos no primeiro nível de indentação do corpo
+            body = [(i, line) for i, line in enumerate(lines[start:end], start=start + 1) if line.strip()]
+            indent = len(body[0][1]) - len(body[0][1].lstrip()) if body else 0
+            for i, line in body:
+                m = JS_METHOD_RE.match(line)
+                if m and len(line) - len(line.lstrip()) == indent:
+                    starts.append((f"{name}.{m.group(1)}", i))
+    return starts
+
+
+def split_symbols(rel_path: str, content: str) -> Optional[List[Symbol]]:
+    """✂️ Símbolos de topo que ladrilham o arquivo.
+
+    Cada símbolo vai do seu início (decoradores incluídos) até a linha anterior ao próximo, e
+    o que vem antes do primeiro (imports, constantes) vira o símbolo `<módulo>`; assim toda
+    unidade é um trecho contíguo do arquivo. Retorna None para linguagens não suportadas ou
+    código que não parseia.
+    """
+    lower = rel_path.lower()
+    lines = content.splitlines()
+    if lower.endswith(PYTHON_EXTS):
+        starts = _python_starts(content, lines)
+    elif lower.endswith(JS_EXTS):
+        starts = _js_starts(lines)
+    else:
+        return None
+    if not starts:
+        return None
+
+    if starts[0][1] > 1:
+        starts.insert(0, (MODULE_SYMBOL, 1))
+    symbols = []
+    for k, (name, start) in enumerate(starts):
+        end = starts[k + 1][1] - 1 if k + 1 < len(starts) else len(lines)
+        symbols.append(Symbol(name, start, end, "\n".join(lines[start - 1:end])))
+    return symbols
+
+
+def group_symbols(symbols: List[Symbol], target_chars: int = UNIT_TARGET_CHARS,
+                  max_chars: int = UNIT_MAX_CHARS) -> List[SymbolUnit]:
+    """🧱 Agrupa símbolos consecutivos em unidades.
+
+    A unidade fecha num símbolo "fronteira" (hash múltiplo de `BOUNDARY_MODULUS`) depois de
+    `target_chars`, ou ao passar de `max_chars`: editar um símbolo só altera a sua unidade.
+    """
+    units: List[SymbolUnit] = []
+    current: List[Symbol] = []
+    size = 0
+    for symbol in symbols:
+        if current and size + len(symbol.text) > max_chars:
+            units.append(SymbolUnit(current))
+            current, size = [], 0
+        current.append(symbol)
+        size += len(symbol.text)
+        if size >= target_chars and int(symbol.digest[:8], 16) % BOUNDARY_MODULUS == 0:
+            units.append(SymbolUnit(current))
+            current, size = [], 0
+    if current:
+        units.append(SymbolUnit(current))
+    return units
+
+
+def plan_units(rel_path: str, content: str, min_lines: int = SYMBOL_MIN_LINES) -> Optional[List[SymbolUnit]]:
+    """🗺️ Unidades do arquivo se ele for grande o bastante e tiver símbolos; senão None"""
+    if content.count("\n") + 1 < min_lines:
+        return None
+    symbols = split_symbols(rel_path, content)
+    if not symbols or len(symbols) < 2:
+        return None
+    units = group_symbols(symbols)
+    return units if len(units) > 1 else None
+
+
+def unit_snippet(unit: SymbolUnit, prompt_text: str) -> str:
+    """📍 Trecho da unidade com marcadores `@@ L<n>` relativos à unidade (linha 1 = início dela).
+
+    `prompt_text` é o texto da unidade já comprimido. Com linhas relativas, o resultado em
+    cache de uma unidade inalterada continua valendo quando edições acima dela deslocam o
+    arquivo; `merge_unit_results` converte as linhas para o arquivo.
+    """
+    return prompt_text if prompt_text.startswith("@@ L") else f"@@ L1\n{prompt_text}"
+
+
+def shift_lines(markdown: str, offset: int) -> str:
+    """↕️ Desloca as citações de linha (relativas à unidade) do markdown em `offset` linhas"""
+    def shift(m: "re.Match") -> str:
+        if m.group("l") is not None:
+            return f"L{int(m.group('l')) + offset}"
+        text = f"{m.group('word')}{m.group('sp')}{int(m.group('a')) + offset}"
+        if m.group("b") is not None:
+            text += f"{m.group('sep')}{int(m.group('b')) + offset}"
+        return text
+    return LINE_CITATION_RE.sub(shift, markdown) if offset else markdown
+
+
+def merge_unit_results(rel_path: str, parts: List[Tuple[SymbolUnit, str, Optional[Dict]]]) -> Tuple[str, Dict]:
+    """🧷 Remonta o relatório do arquivo a partir das unidades (local, sem LLM).
+
+    Scores: média ponderada pelas linhas de cada unidade; achados e quick wins concatenados.
+    Linhas citadas (relativas à unidade) são convertidas para as linhas do arquivo.
+    """
+    weights = {key: [] for key in SCORE_KEYS}
+    findings: List[Dict] = []
+    quick_wins: List[str] = []
+    summaries: List[str] = []
+    sections: List[str] = []
+    for unit, markdown, structured in parts:
+        lines = unit.end_line - unit.start_line + 1
+        offset = unit.start_line - 1
+        sections.append(f"### {unit.label} (linhas {unit.start_line}-{unit.end_line})\n\n"
+                        f"{shift_lines(markdown.strip(), offset)}")
+        if not structured:
+            continue
+        if structured.get("summary"):
+            summaries.append(structured["summary"].strip())
+        for key in SCORE_KEYS:
+            value = (structured.get("scores") or {}).get(key)
+            if value is not None:
+                weights[key].append((value, lines))
+        findings.extend({**f, "line": f["line"] + offset} if isinstance(f.get("line"), int) else f
+                        for f in structured.get("findings") or [] if isinstance(f, dict))
+        quick_wins.extend(q for q in structured.get("quick_wins") or [] if q not in quick_wins)
+
+    scores = {key: (round(sum(v * w for v, w in pairs) / sum(w for _, w in pairs), 1) if pairs else None)
+              for key, pairs in weights.items()}
+    structured = {
+        "summary": " ".join(summaries[:3]) or f"Análise por símbolo de {rel_path}.",
+        "findings": findings,
+        "scores": scores,
+        "quick_wins": quick_wins[:5],
+    }
+    markdown = (f"## Análise por símbolo ({len(parts)} unidades)\n\n"
+                + "\n\n".join(sections))
+    return markdown, structured
@@ -6,24 +6,99 @@
 Versão simplificada que funciona com Google Gemini 2.5 Flash
 """
 
+import argparse
 import os
-import google.generativeai as genai
+import re
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
+from cliente_llm import get_client, parse_backends, usage_by_backend
+from concorrencia_adaptativa import AdaptiveLimiter, run_in_flight
+from gerar_relatorio_base import (
+    DEFAULT_MAX_TOKENS as DIGEST_MAX_TOKENS, DEFAULT_OUTPUT as DIGEST_OUTPUT, generate_report
+)
+from perfilamento import Profiler, maybe_stage
+
 load_dotenv()
 
-def setup_gemini():
-    """🔧 Configura Gemini API"""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+# Timeout, hedging e retentativas compartilhados com o cliente LLM do processo
+CALLS = get_client().calls
+
+# Estrutura do relatório final (consolidação separada e modo de chamada única)
+FINAL_REPORT_OUTLINE = """## 🎯 EXECUTIVE SUMMARY
+- Score geral do projeto (0-100)
+- Principais forças e fraquezas
+- Recomendação de go/no-go
+
+## 👶 SEÇÃO PARA DEVS JUNIORES
+- Explicação simples da arquitetura
+- Conceitos técnicos com analogias
+- Passos claros para contribuir
+
+## 🚀 SEÇÃO PARA DEVS SENIORES
+- Análise técnica profunda
+- Diagramas e fluxos detalhados
+- Decisões arquiteturais críticas
+
+## 📈 ROADMAP ESTRATÉGICO
+- Fase 1: Correções críticas (0-3 meses)
+- Fase 2: Melhorias estruturais (3-6 meses)
+- Fase 3: Expansão e otimização (6-12 meses)
+
+## ⚡ QUICK WINS
+- Ações de alto impacto e baixo esforço
+
+## 🚨 RISCOS CRÍTICOS
+- Top 5 riscos priorizados
+- Planos de mitigação"""
+
+# Modo combinado: as seis perspectivas numa chamada, cada uma com orçamento de saída próprio
+DEFAULT_SECTION_TOKENS = 700
+FINAL_SECTION_TOKENS = 2500
+SECTION_MARKER = "=== SEÇÃO: {key} ==="
+# Folga de `max_tokens` por seção (linha delimitadora) e estouro tolerado da estimativa (~4 chars/token)
+SECTION_MARKER_TOKENS = 20
+SECTION_OVERRUN_TOLERANCE = 1.25
+CHARS_PER_TOKEN = 4
+SECTION_MARKER_RE = re.compile(r"^[#*\s]*=+\s*SE[CÇ][AÃ]O:\s*([\w-]+)\s*=+[*\s]*$", re.MULTILINE | re.IGNORECASE)
+FUSED_ROLES = [
+    {"key": "arquitetura", "title": "# 🏗️ ANÁLISE ARQUITETURAL", "role": "Arquiteto de Software Sênior",
+     "topics": "arquitetura atual, integrações com APIs externas, fluxo de dados, escalabilidade, "
+               "padrões de design, refatorações sugeridas com priorização"},
+    {"key": "qualidade", "title": "# 🧪 ANÁLISE DE QUALIDADE", "role": "Engenheiro de Qualidade",
+     "topics": "cobertura de testes, qualidade do código, segurança, CI/CD, monitoramento, plano de testes",
+     "score": "qualidade geral"},
+    {"key": "documentacao", "title": "# 📄 ANÁLISE DE DOCUMENTAÇÃO", "role": "Documentador Técnico",
+     "topics": "documentação de usuário, documentação técnica, API docs, onboarding, exemplos, manutenção",
+     "score": "completude"},
+    {"key": "negocio", "title": "# 🚀 ANÁLISE DE VIABILIDADE COMERCIAL", "role": "Product Manager",
+     "topics": "prontidão para mercado, análise competitiva, value proposition, user journey, "
+               "monetização, go-to-market",
+     "score": "market readiness"},
+    {"key": "legal", "title": "# ⚖️ ANÁLISE DE CONFORMIDADE LEGAL", "role": "Consultor Jurídico de Tecnologia",
+     "topics": "compliance com APIs, LGPD/GDPR, riscos de automação, termos de serviço, responsabilidades, "
+               "estratégia de compliance",
+     "score": "compliance"},
+    {"key": "ia", "title": "# 🤖 ANÁLISE DE OTIMIZAÇÃO IA", "role": "Engenheiro de IA",
+     "topics": "integração LLM, prompt engineering, performance e custos, personalização, seleção de modelos, "
+               "estratégia de IA",
+     "score": "otimização IA"},
+]
+
+# Etapas com backend selecionável (`--backends specialist=local,final=remote`)
+BACKEND_STAGES = ("specialist", "final")
+
+def setup_gemini(backend="remote"):
+    """🔧 Configura Gemini API (pelo cliente LLM unificado; `LLM_BASE_URL` troca o endpoint)
+
+    Com `backend="local"`, usa o servidor de inferência local (`LLM_LOCAL_BASE_URL`).
+    """
+    client = get_client(backend)
+    if not client.api_key and not client.custom_base_url:
         raise ValueError("GEMINI_API_KEY não encontrada no .env")
     
-    # Remove espaços em branco da chave
-    api_key = api_key.strip()
-    genai.configure(api_key=api_key)
-    
-    return genai.GenerativeModel('gemini-2.5-flash')
+    return client.model('gemini-2.5-flash')
 
 def load_report(file_path="relatorio_codebase_turbinado.md"):
     """📄 Carrega relatório base"""
@@ -53,7 +128,7 @@ Por favor, forneça uma análise estruturada cobrindo:
 Seja específico e técnico nas recomendações."""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# 🏗️ ANÁLISE ARQUITETURAL\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise arquitetural: {str(e)}"
@@ -78,7 +153,7 @@ Por favor, analise:
 Dê um score de 0-100 para qualidade geral."""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# 🧪 ANÁLISE DE QUALIDADE\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise de qualidade: {str(e)}"
@@ -103,7 +178,7 @@ Avalie a documentação em:
 Score de completude: 0-100"""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# 📄 ANÁLISE DE DOCUMENTAÇÃO\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise de documentação: {str(e)}"
@@ -128,7 +203,7 @@ Avalie:
 Score de market readiness: 0-100"""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# 🚀 ANÁLISE DE VIABILIDADE COMERCIAL\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise comercial: {str(e)}"
@@ -153,7 +228,7 @@ Avalie:
 Score de compliance: 0-100"""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# ⚖️ ANÁLISE DE CONFORMIDADE LEGAL\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise legal: {str(e)}"
@@ -178,7 +253,7 @@ Avalie:
 Score de otimização IA: 0-100"""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return f"# 🤖 ANÁLISE DE OTIMIZAÇÃO IA\n\n{response.text}"
     except Exception as e:
         return f"❌ Erro na análise de IA: {str(e)}"
@@ -195,43 +270,185 @@ ANÁLISES ESPECIALIZADAS:
 
 Crie um relatório final estruturado com:
 
-## 🎯 EXECUTIVE SUMMARY
-- Score geral do projeto (0-100)
-- Principais forças e fraquezas
-- Recomendação de go/no-go
-
-## 👶 SEÇÃO PARA DEVS JUNIORES
-- Explicação simples da arquitetura
-- Conceitos técnicos com analogias
-- Passos claros para contribuir
-
-## 🚀 SEÇÃO PARA DEVS SENIORES
-- Análise técnica profunda
-- Diagramas e fluxos detalhados
-- Decisões arquiteturais críticas
-
-## 📈 ROADMAP ESTRATÉGICO
-- Fase 1: Correções críticas (0-3 meses)
-- Fase 2: Melhorias estruturais (3-6 meses)
-- Fase 3: Expansão e otimização (6-12 meses)
-
-## ⚡ QUICK WINS
-- Ações de alto impacto e baixo esforço
-
-## 🚨 RISCOS CRÍTICOS
-- Top 5 riscos priorizados
-- Planos de mitigação
+{FINAL_REPORT_OUTLINE}
 
 Use markdown profissional com emojis e formatação clara."""
 
     try:
-        response = model.generate_content(prompt)
+        response = CALLS.call("gemini", model.generate_content, prompt)
         return response.text
     except Exception as e:
         return f"❌ Erro na consolidação final: {str(e)}"
 
-def main():
+def build_fused_prompt(report_content, keys, section_tokens=DEFAULT_SECTION_TOKENS):
+    """🧩 Prompt único pedindo as seções `keys` (perspectivas e, opcionalmente, `final`) delimitadas"""
+    sections = []
+    for spec in FUSED_ROLES:
+        if spec["key"] in keys:
+            score = f" Termine com o score de {spec['score']} (0-100)." if spec.get("score") else ""
+            sections.append(f"{SECTION_MARKER.format(key=spec['key'])}\n"
+                            f"Como {spec['role']}: {spec['topics']}.{score} "
+                            f"Máximo de ~{section_tokens} tokens.")
+    if "final" in keys:
+        sections.append(f"{SECTION_MARKER.format(key='final')}\n"
+                        f"Relatório final consolidando as seções acima, com a estrutura:\n\n{FINAL_REPORT_OUTLINE}\n\n"
+                        f"Máximo de ~{FINAL_SECTION_TOKENS} tokens.")
+    sections_text = "\n\n".join(sections)
+    return f"""Você é um comitê de especialistas analisando o seguinte relatório de codebase:
+
+RELATÓRIO DA CODEBASE:
+{report_content}
+
+Responda com cada seção abaixo, na ordem, começando cada uma com a linha delimitadora exata
+(ex.: `{SECTION_MARKER.format(key='arquitetura')}`) e sem texto fora das seções. Seja específico e
+técnico, em markdown, respeitando o limite de cada seção.
+
+{sections_text}"""
+
+def split_sections(text):
+    """✂️ Seções de uma resposta combinada ({chave: corpo}); seções vazias são descartadas"""
+    matches = list(SECTION_MARKER_RE.finditer(text))
+    sections = {}
+    for k, match in enumerate(matches):
+        end = matches[k + 1].start() if k + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if body:
+            sections[match.group(1).lower()] = body
+    return sections
+
+def enforce_section_budget(key, body, budget):
+    """✂️ Trunca uma seção que passou do orçamento; retorna (corpo, estouro ou None)"""
+    estimated = len(body) // CHARS_PER_TOKEN + 1
+    if estimated <= budget * SECTION_OVERRUN_TOLERANCE:
+        return body, None
+    cut = body[: budget * CHARS_PER_TOKEN]
+    cut = cut[: cut.rfind("\n")] if "\n" in cut else cut
+    note = f"\n\n_(seção truncada: ~{estimated} tokens para um orçamento de ~{budget})_"
+    return cut.rstrip() + note, {"section": key, "estimated_tokens": estimated, "budget": budget}
+
+def analyze_fused(model, report_content, include_final=False, section_tokens=DEFAULT_SECTION_TOKENS):
+    """🧩 As seis análises (e, com `include_final`, o relatório final) numa chamada estruturada
+
+    A chamada leva `max_tokens` = soma dos orçamentos das seções pedidas; seções que ainda assim
+    passam do seu orçamento são truncadas e registradas. Seções ausentes na resposta (ex.: saída
+    cortada) são pedidas numa segunda chamada só com elas. Retorna ({chave: markdown}, estouros);
+    as perspectivas vêm com o mesmo cabeçalho das análises separadas e alimentam
+    `generate_final_report` sem mudanças.
+    """
+    keys = [spec["key"] for spec in FUSED_ROLES] + (["final"] if include_final else [])
+    budgets = {key: FINAL_SECTION_TOKENS if key == "final" else section_tokens for key in keys}
+    sections, overruns, error = {}, [], None
+    for _ in range(2):
+        missing = [key for key in keys if key not in sections]
+        if not missing:
+            break
+        max_tokens = sum(budgets[key] + SECTION_MARKER_TOKENS for key in missing)
+        try:
+            response = CALLS.call("gemini", model.generate_content,
+                                  build_fused_prompt(report_content, missing, section_tokens),
+                                  max_tokens=max_tokens)
+        except Exception as e:
+            error = str(e)
+            continue
+        for key, body in split_sections(response.text).items():
+            if key in missing:
+                sections[key], overrun = enforce_section_budget(key, body, budgets[key])
+                if overrun is not None:
+                    overruns.append(overrun)
+
+    results = {}
+    for spec in FUSED_ROLES:
+        body = sections.get(spec["key"])
+        results[spec["key"]] = (f"{spec['title']}\n\n{body}" if body
+                                else f"❌ Erro na análise combinada ({spec['key']}): {error or 'seção ausente'}")
+    if include_final:
+        results["final"] = sections.get("final")
+    return results, overruns
+
+def benchmark(model, report_content, section_tokens=DEFAULT_SECTION_TOKENS):
+    """⏱️ Compara o fluxo separado (6 + 1 chamadas) com o combinado e o de chamada única
+
+    Roda os três fluxos de verdade (use `LLM_BASE_URL` com o `endpoint_fake.py` para não gastar
+    cota) e mede chamadas, tokens de entrada/saída e tempo de parede de cada um.
+    """
+    records = []
+    model.client.add_usage_hook(records.append)
+    separate = [analyze_architecture, analyze_quality, analyze_documentation,
+                analyze_business, analyze_legal, analyze_ai]
+    flows = {
+        "separado": lambda: generate_final_report(model, [f(model, report_content) for f in separate]),
+        "combinado": lambda: generate_final_report(
+            model, list(analyze_fused(model, report_content, section_tokens=section_tokens)[0].values())),
+        "chamada_unica": lambda: analyze_fused(model, report_content, True, section_tokens)[0]["final"],
+    }
+    results = {}
+    for name, flow in flows.items():
+        start, started = len(records), time.perf_counter()
+        flow()
+        calls = records[start:]
+        results[name] = {
+            "calls": len(calls),
+            "prompt_tokens": sum(r.prompt_tokens for r in calls),
+            "completion_tokens": sum(r.completion_tokens for r in calls),
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+    return results
+
+def analyze_specialists_adaptive(model, report_content, max_limit=6):
+    """🎚️ Roda as seis análises em paralelo com o limite de concorrência adaptativo (AIMD)
+
+    O limite começa baixo, sobe enquanto a vazão cresce e cai pela metade a cada 429 do
+    endpoint. Retorna as análises na ordem de sempre e o resumo do limitador.
+    """
+    specialists = [analyze_architecture, analyze_quality, analyze_documentation,
+                   analyze_business, analyze_legal, analyze_ai]
+    analyses = [None] * len(specialists)
+    limiter = AdaptiveLimiter(max_limit=min(max_limit, model.client.max_connections))
+    limiter.attach(CALLS, ("gemini",))
+
+    def done(index, future):
+        analyses[index] = future.result()
+
+    try:
+        run_in_flight(range(len(specialists)), lambda i: specialists[i](model, report_content), done, limiter)
+    finally:
+        limiter.detach(CALLS)
+    return analyses, limiter.summary()
+
+def main(argv=None):
     """🎯 Função principal"""
+    parser = argparse.ArgumentParser(description="🚀 CrewAI Simplificado - Análise com Gemini")
+    parser.add_argument("--profile", action="store_true",
+                        help="Gera cProfile, flamegraph (folded), tracemalloc e tempo LLM vs CPU por etapa")
+    parser.add_argument("--digest-from", default=None, metavar="PASTA",
+                        help="Gera o relatório base localmente (sem LLM) a partir da pasta antes da análise")
+    parser.add_argument("--digest-tokens", type=int, default=DIGEST_MAX_TOKENS,
+                        help="Orçamento de tokens do relatório gerado por --digest-from")
+    parser.add_argument("--fused", action="store_true",
+                        help="Pede as seis análises numa única chamada estruturada (mais a consolidação final)")
+    parser.add_argument("--single-call", action="store_true",
+                        help="Como --fused, mas o relatório final vem na mesma chamada")
+    parser.add_argument("--section-tokens", type=int, default=DEFAULT_SECTION_TOKENS,
+                        help="Orçamento de saída (tokens) de cada seção no modo combinado")
+    parser.add_argument("--backends", default=None,
+                        help="Backend por etapa (specialist, final), ex.: specialist=local,final=remote")
+    parser.add_argument("--adaptive-concurrency", type=int, nargs="?", const=6, default=None, metavar="MAX",
+                        help="Roda as seis análises em paralelo com limite ajustado pela latência e pelos 429 "
+                             "(até MAX em voo; padrão 6)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compara o fluxo separado, o combinado e o de chamada única (chamadas, tokens, tempo)")
+    args = parser.parse_args(argv)
+    if args.digest_from and not os.path.isdir(args.digest_from):
+        parser.error(f"pasta não encontrada: {args.digest_from}")
+    try:
+        backends = parse_backends(args.backends) if args.backends else {}
+    except ValueError as e:
+        parser.error(str(e))
+    if set(backends) - set(BACKEND_STAGES):
+        parser.error(f"etapas de backend válidas: {', '.join(BACKEND_STAGES)}")
+    if args.adaptive_concurrency is not None and args.adaptive_concurrency < 1:
+        parser.error("--adaptive-concurrency precisa ser ao menos 1")
+    profiler = Profiler(io_clock=lambda: CALLS.blocked_seconds) if args.profile else None
     
     print("🚀 CrewAI Simplificado - Análise com Gemini")
     print("=" * 50)
@@ -239,42 +456,77 @@ def main():
     try:
         # Setup
         print("🔧 Configurando Gemini...")
-        model = setup_gemini()
+        model = setup_gemini(backends.get("specialist", "remote"))
+        final_model = setup_gemini(backends.get("final", "remote"))
         
+        if args.digest_from:
+            print(f"🧾 Gerando relatório base a partir de {args.digest_from}...")
+            generate_report(args.digest_from, DIGEST_OUTPUT, args.digest_tokens)
+
         print("📄 Carregando relatório...")
         report_content = load_report()
+
+        if args.benchmark:
+            print("⏱️ Comparando fluxos (separado, combinado, chamada única)...")
+            for name, result in benchmark(model, report_content, args.section_tokens).items():
+                print(f"   {name:<14} {result['calls']} chamadas, {result['prompt_tokens']} tokens de entrada, "
+                      f"{result['completion_tokens']} de saída, {result['seconds']:.1f}s")
+            return True
+
+        final_report = None
+        overruns = []
+        if args.fused or args.single_call:
+            with maybe_stage(profiler, "specialists"):
+                print("🧩 Executando as seis análises numa chamada combinada...")
+                sections, overruns = analyze_fused(model, report_content, args.single_call, args.section_tokens)
+            analyses = [sections[spec["key"]] for spec in FUSED_ROLES]
+            final_report = sections.get("final")
+            for o in overruns:
+                print(f"   ✂️ Seção {o['section']} truncada: ~{o['estimated_tokens']} tokens "
+                      f"(orçamento ~{o['budget']})")
+        elif args.adaptive_concurrency is not None:
+            with maybe_stage(profiler, "specialists"):
+                print(f"🎚️ Executando as seis análises em paralelo (concorrência adaptativa, "
+                      f"até {args.adaptive_concurrency})...")
+                analyses, limiter_summary = analyze_specialists_adaptive(model, report_content,
+                                                                         args.adaptive_concurrency)
+            print(f"   Limite final {limiter_summary['limit']} (pico {limiter_summary['peak']}, "
+                  f"429 vistos: {limiter_summary['throttles']})")
+        else:
+            # Análises especializadas
+            with maybe_stage(profiler, "specialists"):
+                print("🏗️ Executando análise arquitetural...")
+                arch_analysis = analyze_architecture(model, report_content)
+            
+                print("🧪 Executando análise de qualidade...")
+                quality_analysis = analyze_quality(model, report_content)
+            
+                print("📄 Executando análise de documentação...")
+                doc_analysis = analyze_documentation(model, report_content)
+            
+                print("🚀 Executando análise de negócio...")
+                business_analysis = analyze_business(model, report_content)
+            
+                print("⚖️ Executando análise legal...")
+                legal_analysis = analyze_legal(model, report_content)
+            
+                print("🤖 Executando análise de IA...")
+                ai_analysis = analyze_ai(model, report_content)
+            
+            analyses = [
+                arch_analysis,
+                quality_analysis, 
+                doc_analysis,
+                business_analysis,
+                legal_analysis,
+                ai_analysis
+            ]
         
-        # Análises especializadas
-        print("🏗️ Executando análise arquitetural...")
-        arch_analysis = analyze_architecture(model, report_content)
-        
-        print("🧪 Executando análise de qualidade...")
-        quality_analysis = analyze_quality(model, report_content)
-        
-        print("📄 Executando análise de documentação...")
-        doc_analysis = analyze_documentation(model, report_content)
-        
-        print("🚀 Executando análise de negócio...")
-        business_analysis = analyze_business(model, report_content)
-        
-        print("⚖️ Executando análise legal...")
-        legal_analysis = analyze_legal(model, report_content)
-        
-        print("🤖 Executando análise de IA...")
-        ai_analysis = analyze_ai(model, report_content)
-        
-        # Consolidação final
-        print("📑 Gerando relatório final...")
-        analyses = [
-            arch_analysis,
-            quality_analysis, 
-            doc_analysis,
-            business_analysis,
-            legal_analysis,
-            ai_analysis
-        ]
-        
-        final_report = generate_final_report(model, analyses)
+        # Consolidação final (na chamada única, só se a seção final faltou na resposta)
+        if final_report is None:
+            print("📑 Gerando relatório final...")
+            with maybe_stage(profiler, "final_report", memory=True):
+                final_report = generate_final_report(final_model, analyses)
         
         # Salva resultado
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -287,14 +539,23 @@ def main():
 **Data**: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}  
 **Modelo**: Google Gemini 2.5 Flash  
 **Versão**: CrewAI Simplificado v1.0
-
----
-
 """
+            if overruns:
+                header += "**Seções truncadas (acima do orçamento)**: " + ", ".join(
+                    f"{o['section']} (~{o['estimated_tokens']}/{o['budget']} tokens)" for o in overruns) + "\n"
+            header += "\n---\n\n"
             f.write(header + final_report)
         
         print("\n✅ Análise concluída com sucesso!")
         print(f"📄 Relatório salvo: {output_file}")
+        if profiler is not None:
+            print(f"🔬 Perfil salvo em: {profiler.write_summary()}")
+        latency = CALLS.summary().get("gemini", {})
+        if latency.get("latency"):
+            print(f"⏳ Chamadas ao Gemini: {latency['calls']} (retentativas: {latency['retries']}, "
+                  f"duplicadas: {latency['hedges']}), p50={latency['latency']['p50']:.1f}s "
+                  f"p95={latency['latency']['p95']:.1f}s")
+        print(f"🧮 Tokens consumidos: {sum(u['total_tokens'] for u in usage_by_backend().values())}")
         
         # Preview
         print("\n👀 Preview do relatório:")
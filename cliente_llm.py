@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+🔌 Cliente LLM Unificado
+=======================
+
+Camada única de acesso ao LLM usada pelos dois pontos de entrada
+(``avaliacao_gemini.py`` e ``crew_avaliacao_completa.py``). Fala o protocolo
+OpenAI-compatível (``/chat/completions``), que o Gemini expõe nativamente, por
+um único ``httpx.Client`` com keep-alive e pool de conexões. A URL base é
+configurável (``LLM_BASE_URL``) para trocar o provedor por um proxy ou pelo
+``endpoint_fake.py`` local.
+
+A CrewAI usa o mesmo pool: o cliente HTTP é registrado no LiteLLM e os agentes
+recebem um ``crewai.LLM`` apontando para a mesma URL base. A chave vai só nas
+requisições para a URL base do próprio cliente, nunca como cabeçalho fixo do pool. Retentativas e
+timeouts vêm do ``CallExecutor`` compartilhado e o consumo de tokens passa por
+ganchos (``add_usage_hook``), qualquer que seja o caminho da chamada.
+
+Além do backend remoto há o ``local``: um servidor de inferência
+OpenAI-compatível próprio (vLLM, llama.cpp, TGI) em ``LLM_LOCAL_BASE_URL``, com
+modelo fixo (``LLM_LOCAL_MODEL``) e pool próprio. Cada etapa escolhe o backend
+(``parse_backends("file=local,consolidation=remote")``).
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from execucao_chamadas import CallExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+DEFAULT_MODEL = "gemini/gemini-2.5-flash"
+DEFAULT_MAX_CONNECTIONS = 16
+BACKENDS = ("remote", "local")
+DEFAULT_LOCAL_BASE_URL = "http://127.0.0.1:8000/v1"
+# Servidores locais com continuous batching rendem mais com muitas requisições em voo
+DEFAULT_LOCAL_MAX_CONNECTIONS = 32
+CONNECT_TIMEOUT_SECONDS = 10.0
+# Leitura longa: o timeout real de cada chamada é o da política do CallExecutor
+READ_TIMEOUT_SECONDS = 900.0
+
+
+class LLMError(RuntimeError):
+    """❌ Resposta de erro do endpoint (status HTTP ou corpo inválido)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UsageRecord:
+    """🧮 Consumo de tokens de uma chamada"""
+    model: str
+    call_type: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency_seconds: Optional[float] = None
+
+
+@dataclass
+class Completion:
+    """💬 Resposta de uma chamada (`.text` como no `GenerateContentResponse` do Gemini)"""
+    text: str
+    model: str
+    usage: UsageRecord
+
+
+def model_name(model: str) -> str:
+    """🏷️ Remove o prefixo de provedor do LiteLLM (`gemini/gemini-2.5-flash` → `gemini-2.5-flash`)"""
+    return model.split("/", 1)[1] if "/" in model else model
+
+
+class ModelHandle:
+    """🤖 Modelo fixo sobre o cliente, com a mesma interface usada do `genai.GenerativeModel`"""
+
+    def __init__(self, client: "LLMClient", model: str, call_type: str = "gemini"):
+        self.client = client
+        self.model = model
+        self.call_type = call_type
+
+    def generate_content(self, prompt: str, **params) -> Completion:
+        # Uma tentativa só: timeout, hedging e retentativas ficam com quem chama (`client.calls`).
+        # `params` vão no corpo da requisição (ex.: `max_tokens`)
+        return self.client.complete(prompt, self.model, self.call_type, **params)
+
+
+class _BaseURLAuth(httpx.Auth):
+    """🔐 Chave só nas requisições para a URL base do cliente
+
+    O pool do remoto é registrado no LiteLLM (processo inteiro) e também atende as chamadas da
+    CrewAI para o backend local; a chave do remoto não pode ir junto para outra URL.
+    """
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url
+        self.api_key = api_key
+
+    def auth_flow(self, request: httpx.Request):
+        if str(request.url).startswith(self.base_url) and "authorization" not in request.headers:
+            request.headers["Authorization"] = f"Bearer {self.api_key}"
+        yield request
+
+
+class LLMClient:
+    """🔌 Cliente OpenAI-compatível com pool de conexões, políticas e contabilidade de tokens"""
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_connections: Optional[int] = None, calls: Optional[CallExecutor] = None,
+                 model_override: Optional[str] = None, backend: str = "remote"):
+        self.base_url = (base_url or os.getenv("LLM_BASE_URL") or DEFAULT_BASE_URL).rstrip("/") + "/"
+        self.custom_base_url = bool(base_url or os.getenv("LLM_BASE_URL"))
+        # `api_key=""` explícito: nenhuma chave (não vaza a do Gemini para um servidor local)
+        self.api_key = (api_key if api_key is not None
+                        else os.getenv("LLM_API_KEY") or os.getenv("GEMINI_API_KEY") or "").strip()
+        # Modelo fixo do backend (um servidor local serve o modelo que carregou, não o `MODEL`)
+        self.model_override = model_override
+        self.backend = backend
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        # Orçamento único de conexões: quem passa do limite espera por uma conexão livre do pool
+        self.http = httpx.Client(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS, pool=None),
+            auth=_BaseURLAuth(self.base_url, self.api_key) if self.api_key else None,
+        )
+        self.calls = calls or CallExecutor()
+        self._hooks: List[Callable[[UsageRecord], None]] = []
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def add_usage_hook(self, hook: Callable[[UsageRecord], None]) -> None:
+        """🪝 Registra um gancho chamado com o `UsageRecord` de cada chamada concluída"""
+        self._hooks.append(hook)
+
+    def record_usage(self, record: UsageRecord) -> None:
+        with self._lock:
+            totals = self._usage.setdefault(record.model, {"calls": 0, "prompt_tokens": 0,
+                                                           "completion_tokens": 0, "total_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += record.prompt_tokens
+            totals["completion_tokens"] += record.completion_tokens
+            totals["total_tokens"] += record.total_tokens
+        for hook in self._hooks:
+            try:
+                hook(record)
+            except Exception as e:
+                logger.warning(f"⚠️ Gancho de uso falhou: {e}")
+
+    def complete(self, prompt: str, model: Optional[str] = None, call_type: str = "gemini",
+                 system: Optional[str] = None, **params) -> Completion:
+        """📨 Uma chamada a `/chat/completions` (sem retentativas; veja `generate`)"""
+        model = model_name(self.model_override or model or os.getenv("MODEL", DEFAULT_MODEL))
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        started = time.monotonic()
+        response = self.http.post("chat/completions", json={"model": model, "messages": messages, **params})
+        if response.status_code >= 400:
+            raise LLMError(f"{response.status_code} em {self.base_url}chat/completions: {response.text[:300]}",
+                           response.status_code)
+        try:
+            body = response.json()
+            text = body["choices"][0]["message"]["content"] or ""
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"resposta inválida de {self.base_url}: {e}") from e
+        usage = body.get("usage") or {}
+        record = UsageRecord(model=model, call_type=call_type,
+                             prompt_tokens=int(usage.get("prompt_tokens") or 0),
+                             completion_tokens=int(usage.get("completion_tokens") or 0),
+                             total_tokens=int(usage.get("total_tokens") or 0),
+                             latency_seconds=round(time.monotonic() - started, 3))
+        self.record_usage(record)
+        return Completion(text=text, model=model, usage=record)
+
+    def generate(self, prompt: str, model: Optional[str] = None, call_type: str = "gemini", **params) -> str:
+        """📞 Chamada com timeout, hedging e retentativas da política de `call_type`"""
+        return self.calls.call(call_type, self.complete, prompt, model, call_type, **params).text
+
+    def model(self, name: str, call_type: str = "gemini") -> ModelHandle:
+        return ModelHandle(self, name, call_type)
+
+    def crewai_llm(self, model: Optional[str] = None):
+        """🤝 LLM da CrewAI apontando para a mesma URL base (e, via LiteLLM, para o mesmo pool)"""
+        from crewai import LLM
+
+        # O prefixo `openai/` faz o LiteLLM usar o protocolo OpenAI-compatível com `base_url`
+        model = self.model_override or model or os.getenv("MODEL", DEFAULT_MODEL)
+        return LLM(model=f"openai/{model_name(model)}",
+                   base_url=self.base_url.rstrip("/"), api_key=self.api_key or "sem-chave")
+
+    def usage_summary(self) -> Dict:
+        """📊 Tokens por modelo e configuração do pool (para os metadados)"""
+        with self._lock:
+            usage = {m: dict(t) for m, t in self._usage.items()}
+        return {"backend": self.backend, "base_url": self.base_url, "max_connections": self.max_connections,
+                "by_model": usage,
+                "total_tokens": sum(t["total_tokens"] for t in usage.values())}
+
+    def close(self) -> None:
+        self.http.close()
+
+
+_clients: Dict[str, LLMClient] = {}
+_client_lock = threading.RLock()
+
+
+def _litellm_usage_callback(kwargs, completion_response, start_time, end_time) -> None:
+    """🧮 Repassa ao cliente o consumo das chamadas feitas pela CrewAI (LiteLLM)"""
+    usage = getattr(completion_response, "usage", None)
+    if not _clients or usage is None:
+        return
+    # Atribui ao backend pela URL base da chamada (agentes de etapas locais vs. remotas)
+    api_base = str(kwargs.get("api_base") or (kwargs.get("litellm_params") or {}).get("api_base") or "")
+    client = next((c for c in _clients.values() if api_base and c.base_url.rstrip("/") == api_base.rstrip("/")),
+                  _clients.get("remote") or next(iter(_clients.values())))
+    latency = (end_time - start_time).total_seconds() if start_time and end_time else None
+    client.record_usage(UsageRecord(
+        model=model_name(str(kwargs.get("model", ""))), call_type="crewai",
+        prompt_tokens=int(getattr(usage, "prompt_tokens", 0) or 0),
+        completion_tokens=int(getattr(usage, "completion_tokens", 0) or 0),
+        total_tokens=int(getattr(usage, "total_tokens", 0) or 0),
+        latency_seconds=round(latency, 3) if latency is not None else None))
+
+
+def _bridge_litellm(client: LLMClient) -> None:
+    """🌉 Faz o LiteLLM (usado pela CrewAI) compartilhar o pool HTTP e os ganchos de uso"""
+    try:
+        import litellm
+    except ImportError:
+        return
+    litellm.client_session = client.http
+    if _litellm_usage_callback not in litellm.success_callback:
+        litellm.success_callback.append(_litellm_usage_callback)
+
+
+def get_client(backend: str = "remote") -> LLMClient:
+    """🔌 Cliente do processo para o backend (criado na primeira chamada a partir das variáveis de ambiente)
+
+    `local` usa `LLM_LOCAL_BASE_URL`, `LLM_LOCAL_MODEL`, `LLM_LOCAL_API_KEY` e
+    `LLM_LOCAL_MAX_CONNECTIONS`, e compartilha o `CallExecutor` do remoto (timeouts e latências).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend desconhecido: {backend!r} (use {', '.join(BACKENDS)})")
+    with _client_lock:
+        if backend not in _clients:
+            if backend == "remote":
+                client = LLMClient()
+                _bridge_litellm(client)
+            else:
+                client = LLMClient(
+                    base_url=os.getenv("LLM_LOCAL_BASE_URL", DEFAULT_LOCAL_BASE_URL),
+                    api_key=os.getenv("LLM_LOCAL_API_KEY", ""),
+                    max_connections=int(os.getenv("LLM_LOCAL_MAX_CONNECTIONS", DEFAULT_LOCAL_MAX_CONNECTIONS)),
+                    calls=get_client("remote").calls,
+                    model_override=os.getenv("LLM_LOCAL_MODEL"),
+                    backend=backend,
+                )
+            _clients[backend] = client
+            logger.info(f"🔌 Cliente LLM ({backend}): {client.base_url} (até {client.max_connections} conexões)")
+        return _clients[backend]
+
+
+def parse_backends(text: str) -> Dict[str, str]:
+    """🔀 Converte `file=local,consolidation=remote` em {etapa: backend}"""
+    backends = {}
+    for item in filter(None, (p.strip() for p in text.split(","))):
+        stage, sep, backend = item.partition("=")
+        if not sep or backend.strip() not in BACKENDS:
+            raise ValueError(f"backend inválido: {item!r} (use etapa={'|'.join(BACKENDS)})")
+        backends[stage.strip()] = backend.strip()
+    return backends
+
+
+def usage_by_backend() -> Dict:
+    """📊 `usage_summary()` de cada backend já usado no processo"""
+    with _client_lock:
+        clients = dict(_clients)
+    return {backend: client.usage_summary() for backend, client in clients.items()}
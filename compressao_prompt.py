@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+🗜️ Compressão de Prompt por Tipo de Arquivo
+==========================================
+
+Etapa aplicada ao conteúdo de cada arquivo antes de montar o prompt por
+arquivo: colapsa espaços em branco, remove banners de comentário, encurta
+docstrings longas (e, opcionalmente, remove comentários), resume JSON/YAML
+grandes por schema e valores amostrados, elide literais de dados repetitivos,
+linhas minificadas e tabelas markdown longas e deduplica cabeçalhos de
+licença.
+
+O texto comprimido mantém um mapa de linhas: sempre que a numeração original
+deixa de ser contígua, uma linha ``@@ L<n>`` indica o número original da linha
+seguinte, para que os achados continuem citando as linhas do arquivo real.
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+HASH_COMMENT_EXTS = {".py", ".sh", ".yaml", ".yml", ".ini", ".cfg"}
+SLASH_COMMENT_EXTS = {".js", ".ts", ".tsx"}
+LOCKFILE_NAMES = {"package-lock.json", "npm-shrinkwrap.json", "composer.lock", "pipfile.lock",
+                  "yarn.lock", "poetry.lock", "pnpm-lock.yaml", "uv.lock"}
+
+DOCSTRING_MAX_LINES = 3
+DATA_RUN_MIN_LINES = 12
+MD_TABLE_MAX_ROWS = 12
+LONG_LINE_CHARS = 500
+STRUCTURED_SUMMARY_MIN_CHARS = 4000
+YAML_KEEP_DEEP_LINES = 3
+JSON_MAX_KEYS = 25
+JSON_MAX_DEPTH = 4
+
+BANNER_RE = re.compile(r"^\s*(?:#|//|/\*+|\*)?\s*([=\-*#~_+])\1{7,}\s*(?:\*+/)?\s*$")
+LICENSE_RE = re.compile(r"copyright|licensed under|license|spdx-license-identifier|permission is hereby granted",
+                        re.IGNORECASE)
+SPDX_RE = re.compile(r"SPDX-License-Identifier:\s*(\S+)")
+_SCALAR = r"""(?:[-+]?\d[\d_.eExXa-fA-F+-]*|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|True|False|None|null|true|false)"""
+DATA_LINE_RE = re.compile(rf"^\s*[\[\{{(]*\s*{_SCALAR}\s*(?:[,:]\s*{_SCALAR}\s*)*[\]\}})]*\s*,?\s*$")
+
+Line = Tuple[Optional[int], str]  # (linha original ou None para linha sintética, texto)
+
+
+@dataclass
+class CompressedSnippet:
+    """📦 Resultado da compressão de um arquivo"""
+    text: str
+    kind: str
+    original_chars: int
+    compressed_chars: int
+    line_map: List[Optional[int]] = field(default_factory=list)
+    steps: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_chars - self.compressed_chars) // CHARS_PER_TOKEN
+
+    def original_line(self, output_line: int) -> Optional[int]:
+        """🔢 Linha original correspondente a uma linha (1-based) do texto comprimido"""
+        if 1 <= output_line <= len(self.line_map):
+            return self.line_map[output_line - 1]
+        return None
+
+
+def _comment_prefix(ext: str) -> Optional[str]:
+    if ext in HASH_COMMENT_EXTS:
+        return "#"
+    if ext in SLASH_COMMENT_EXTS:
+        return "//"
+    return None
+
+
+def _is_comment(text: str, prefix: Optional[str]) -> bool:
+    stripped = text.lstrip()
+    if prefix is None or not stripped:
+        return False
+    if prefix == "//":
+        return stripped.startswith(("//", "/*", "*"))
+    return stripped.startswith("#") and not stripped.startswith("#!")
+
+
+def _elide(lines: List[Line], start: int, end: int, keep_head: int, keep_tail: int, note: str) -> List[Line]:
+    """✂️ Mantém `keep_head` e `keep_tail` linhas de lines[start:end] e troca o meio por uma nota"""
+    run = lines[start:end]
+    omitted = len(run) - keep_head - keep_tail
+    if omitted <= 0:
+        return run
+    indent = run[keep_head][1][: len(run[keep_head][1]) - len(run[keep_head][1].lstrip())]
+    tail = run[len(run) - keep_tail:] if keep_tail else []
+    return run[:keep_head] + [(None, f"{indent}… ({omitted} {note} omitidas)")] + tail
+
+
+def _json_schema(value, depth: int = 0, key: str = "") -> List[str]:
+    """🧬 Descreve um valor JSON por tipos, tamanhos e valores amostrados"""
+    pad = "  " * depth
+    label = f'"{key}": ' if key else ""
+    if isinstance(value, dict):
+        if depth >= JSON_MAX_DEPTH or not value:
+            sample = ", ".join(f'"{k}"' for k in list(value)[:3])
+            return [f"{pad}{label}object ({len(value)} chaves){' ex.: ' + sample if sample else ''}"]
+        lines = [f"{pad}{label}object ({len(value)} chaves)"]
+        for k in list(value)[:JSON_MAX_KEYS]:
+            lines.extend(_json_schema(value[k], depth + 1, k))
+        if len(value) > JSON_MAX_KEYS:
+            lines.append(f"{pad}  … (+{len(value) - JSON_MAX_KEYS} chaves)")
+        return lines
+    if isinstance(value, list):
+        if not value:
+            return [f"{pad}{label}list[0]"]
+        kinds = sorted({type(v).__name__ for v in value})
+        if all(not isinstance(v, (dict, list)) for v in value):
+            sample = ", ".join(json.dumps(v, ensure_ascii=False)[:40] for v in value[:3])
+            return [f"{pad}{label}list[{len(value)}] de {'/'.join(kinds)} ex.: {sample}"]
+        lines = [f"{pad}{label}list[{len(value)}] de {'/'.join(kinds)}; primeiro item:"]
+        lines.extend(_json_schema(value[0], depth + 1))
+        return lines
+    type_name = "null" if value is None else type(value).__name__
+    return [f"{pad}{label}{type_name} = {json.dumps(value, ensure_ascii=False)[:60]}"]
+
+
+class PromptCompressor:
+    """🗜️ Comprime conteúdo por tipo de arquivo e acumula a economia por tipo"""
+
+    def __init__(self, strip_comments: bool = False, shorten_docstrings: bool = True):
+        self.strip_comments = strip_comments
+        self.shorten_docstrings = shorten_docstrings
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.license_headers: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Estágios
+    # ------------------------------------------------------------------
+    def _license_header(self, lines: List[Line], prefix: Optional[str], steps: Dict[str, int]) -> List[Line]:
+        """⚖️ Troca o bloco de comentário inicial com licença por uma linha (deduplicado entre arquivos)"""
+        start = 0
+        while start < len(lines) and (not lines[start][1].strip() or lines[start][1].startswith("#!")):
+            start += 1
+        end = start
+        while end < len(lines) and _is_comment(lines[end][1], prefix):
+            end += 1
+        block = "\n".join(t for _, t in lines[start:end])
+        if end - start < 2 or not LICENSE_RE.search(block):
+            return lines
+        digest = hashlib.sha1(block.encode("utf-8", errors="ignore")).hexdigest()[:12]
+        self.license_headers[digest] = self.license_headers.get(digest, 0) + 1
+        spdx = SPDX_RE.search(block)
+        name = spdx.group(1) if spdx else lines[start][1].strip(" #/*")[:60]
+        steps["license_header"] = steps.get("license_header", 0) + end - start
+        return lines[:start] + [(None, f"{prefix} [cabeçalho de licença omitido: {name}]")] + lines[end:]
+
+    def _docstrings(self, content: str, lines: List[Line], steps: Dict[str, int]) -> List[Line]:
+        """📚 Encurta docstrings longas para a primeira linha"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return lines
+        ranges = {}
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+                doc = node.body[0]
+                if isinstance(doc, ast.Expr) and isinstance(getattr(doc, "value", None), ast.Constant) \
+                        and isinstance(doc.value.value, str) and doc.end_lineno - doc.lineno + 1 > DOCSTRING_MAX_LINES:
+                    first = next((l.strip() for l in doc.value.value.strip().splitlines() if l.strip()), "")
+                    ranges[doc.lineno] = (doc.end_lineno, doc.col_offset, first)
+        if not ranges:
+            return lines
+        out: List[Line] = []
+        skip_until = 0
+        for lineno, text in lines:
+            if lineno is not None and lineno <= skip_until:
+                continue
+            if lineno in ranges:
+                end, col, first = ranges[lineno]
+                out.append((lineno, f'{" " * col}"""{first} […]"""'))
+                steps["docstrings"] = steps.get("docstrings", 0) + end - lineno
+                skip_until = end
+                continue
+            out.append((lineno, text))
+        return out
+
+    def _line_filters(self, lines: List[Line], ext: str, prefix: Optional[str], steps: Dict[str, int]) -> List[Line]:
+        """🧹 Banners, comentários opcionais, linhas minificadas e espaços em branco"""
+        out: List[Line] = []
+        for lineno, text in lines:
+            text = text.rstrip()
+            if ext not in {".md", ".txt"} and BANNER_RE.match(text):
+                steps["banners"] = steps.get("banners", 0) + 1
+                continue
+            if self.strip_comments and _is_comment(text, prefix):
+                steps["comments"] = steps.get("comments", 0) + 1
+                continue
+            if len(text) > LONG_LINE_CHARS:
+                steps["long_lines"] = steps.get("long_lines", 0) + 1
+                text = f"{text[:300]} … (+{len(text) - 300} chars)"
+            if not text and out and not out[-1][1]:
+                steps["blank_lines"] = steps.get("blank_lines", 0) + 1
+                continue
+            out.append((lineno, text))
+        return out
+
+    def _runs(self, lines: List[Line], ext: str, steps: Dict[str, int]) -> List[Line]:
+        """🔁 Elide sequências longas de literais de dados e de linhas de tabela markdown"""
+        out: List[Line] = []
+        i = 0
+        while i < len(lines):
+            text = lines[i][1]
+            if ext == ".md" and text.lstrip().startswith("|"):
+                j = i
+                while j < len(lines) and lines[j][1].lstrip().startswith("|"):
+                    j += 1
+                if j - i > MD_TABLE_MAX_ROWS:
+                    steps["table_rows"] = steps.get("table_rows", 0) + (j - i) - 9
+                    out.extend(_elide(lines, i, j, 8, 1, "linhas da tabela"))
+                    i = j
+                    continue
+            elif text.strip() and DATA_LINE_RE.match(text):
+                j = i
+                while j < len(lines) and lines[j][1].strip() and DATA_LINE_RE.match(lines[j][1]):
+                    j += 1
+                if j - i >= DATA_RUN_MIN_LINES:
+                    steps["data_literals"] = steps.get("data_literals", 0) + (j - i) - 5
+                    out.extend(_elide(lines, i, j, 4, 1, "linhas de dados"))
+                    i = j
+                    continue
+            out.append(lines[i])
+            i += 1
+        return out
+
+    def _yaml_depth(self, lines: List[Line], steps: Dict[str, int]) -> List[Line]:
+        """🧬 YAML grande: mantém chaves rasas e amostra poucas linhas profundas por bloco"""
+        out: List[Line] = []
+        deep_run: List[Line] = []
+
+        def flush():
+            if len(deep_run) > YAML_KEEP_DEEP_LINES:
+                steps["yaml_sampled"] = steps.get("yaml_sampled", 0) + len(deep_run) - YAML_KEEP_DEEP_LINES
+                out.extend(_elide(deep_run, 0, len(deep_run), YAML_KEEP_DEEP_LINES, 0, "linhas aninhadas"))
+            else:
+                out.extend(deep_run)
+            deep_run.clear()
+
+        for line in lines:
+            text = line[1]
+            if text.strip() and len(text) - len(text.lstrip()) > 4:
+                deep_run.append(line)
+            else:
+                flush()
+                out.append(line)
+        flush()
+        return out
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def compress(self, rel_path: str, content: str) -> CompressedSnippet:
+        """🗜️ Comprime o conteúdo de um arquivo conforme o tipo (ou devolve o original se a compressão falhar)"""
+        try:
+            snippet = self._compress(rel_path, content)
+        except Exception as e:
+            # Um arquivo com formato inesperado não derruba a execução: segue sem compressão
+            logger.warning(f"⚠️ Compressão falhou para {rel_path} ({e}); usando o conteúdo original")
+            snippet = CompressedSnippet(text=content, kind="(sem compressão)", original_chars=len(content),
+                                        compressed_chars=len(content),
+                                        line_map=list(range(1, content.count("\n") + 2)),
+                                        steps={"compression_error": 1})
+        s = self.stats.setdefault(snippet.kind, {"files": 0, "original_tokens": 0, "compressed_tokens": 0})
+        s["files"] += 1
+        s["original_tokens"] += len(content) // CHARS_PER_TOKEN
+        s["compressed_tokens"] += snippet.compressed_chars // CHARS_PER_TOKEN
+        return snippet
+
+    def _compress(self, rel_path: str, content: str) -> CompressedSnippet:
+        name = os.path.basename(rel_path).lower()
+        ext = os.path.splitext(name)[1]
+        steps: Dict[str, int] = {}
+        kind = ext or "(sem ext)"
+
+        structured_text = None
+        if len(content) >= STRUCTURED_SUMMARY_MIN_CHARS and ext == ".json":
+            try:
+                data = json.loads(content)
+            except ValueError:
+                data = None
+            if data is not None:
+                if name in LOCKFILE_NAMES and isinstance(data, dict):
+                    kind = "lockfile"
+                    packages = data.get("packages") or data.get("dependencies") or {}
+                    structured_text = (f"Lockfile {name}: {len(packages)} pacotes fixados "
+                                       f"(ex.: {', '.join(list(packages)[:5])}); conteúdo omitido.")
+                else:
+                    kind = ".json (schema)"
+                    structured_text = "JSON resumido por schema e valores amostrados:\n" + "\n".join(_json_schema(data))
+                steps["structured_summary"] = content.count("\n") + 1
+
+        if structured_text is not None:
+            text = f"@@ L1\n{structured_text}"
+            line_map: List[Optional[int]] = [None] * (text.count("\n") + 1)
+        else:
+            lines: List[Line] = list(enumerate(content.splitlines(), start=1))
+            prefix = _comment_prefix(ext)
+            if ext in HASH_COMMENT_EXTS | SLASH_COMMENT_EXTS:
+                lines = self._license_header(lines, prefix, steps)
+            if ext == ".py" and self.shorten_docstrings:
+                lines = self._docstrings(content, lines, steps)
+            lines = self._line_filters(lines, ext, prefix, steps)
+            lines = self._runs(lines, ext, steps)
+            if ext in {".yaml", ".yml"} and len(content) >= STRUCTURED_SUMMARY_MIN_CHARS:
+                kind = ".yaml (amostrado)"
+                lines = self._yaml_depth(lines, steps)
+            if ext in SLASH_COMMENT_EXTS and steps.get("long_lines") and len(lines) <= 5:
+                kind = f"{ext} (minificado)"
+            text, line_map = self._render(lines)
+
+        return CompressedSnippet(text=text, kind=kind, original_chars=len(content),
+                                 compressed_chars=len(text), line_map=line_map, steps=steps)
+
+    @staticmethod
+    def _render(lines: List[Line]) -> Tuple[str, List[Optional[int]]]:
+        """🗺️ Junta as linhas inserindo marcadores `@@ L<n>` onde a numeração deixa de ser contígua"""
+        out: List[str] = []
+        line_map: List[Optional[int]] = []
+        expected = 1
+        for lineno, text in lines:
+            if lineno is not None:
+                if lineno != expected:
+                    out.append(f"@@ L{lineno}")
+                    line_map.append(None)
+                expected = lineno + 1
+            out.append(text)
+            line_map.append(lineno)
+        return "\n".join(out), line_map
+
+    def merge_stats(self, state: Dict) -> None:
+        """📥 Soma estatísticas de outro compressor (ex.: de um worker)"""
+        for kind, values in state.get("stats", {}).items():
+            target = self.stats.setdefault(kind, {"files": 0, "original_tokens": 0, "compressed_tokens": 0})
+            for key, value in values.items():
+                target[key] = target.get(key, 0) + value
+        for digest, count in state.get("license_headers", {}).items():
+            self.license_headers[digest] = self.license_headers.get(digest, 0) + count
+
+    def to_state(self) -> Dict:
+        """📤 Estado serializável (para workers devolverem ao coordenador)"""
+        return {"stats": self.stats, "license_headers": self.license_headers}
+
+    def summary(self) -> Dict:
+        """📊 Economia de tokens por tipo de arquivo (para os metadados)"""
+        by_type = {}
+        for kind, s in sorted(self.stats.items()):
+            saved = s["original_tokens"] - s["compressed_tokens"]
+            by_type[kind] = {**s, "saved_tokens": saved,
+                             "saved_pct": round(100.0 * saved / s["original_tokens"], 1) if s["original_tokens"] else 0.0}
+        original = sum(s["original_tokens"] for s in self.stats.values())
+        compressed = sum(s["compressed_tokens"] for s in self.stats.values())
+        return {
+            "strip_comments": self.strip_comments,
+            "shorten_docstrings": self.shorten_docstrings,
+            "original_tokens": original,
+            "compressed_tokens": compressed,
+            "saved_pct": round(100.0 * (original - compressed) / original, 1) if original else 0.0,
+            "license_headers_deduplicated": sum(self.license_headers.values()),
+            "by_type": by_type,
+        }
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+🎚️ Concorrência Adaptativa
+=========================
+
+Controlador AIMD do número de chamadas ao LLM em voo. O limite sobe 1 a cada
+janela (tantas conclusões quanto o limite atual) enquanto a latência fica perto
+da linha de base e a vazão não cai. Um 429 (limite de taxa) corta o limite pela
+metade na hora, e latência inflada (fila no provedor) corta 20%. O controlador
+observa cada tentativa pelo ``CallExecutor``, então vê também os 429 que as
+retentativas escondem. O limite e as decisões vão para os metadados.
+
+``python concorrencia_adaptativa.py --simulate`` valida o controlador contra o
+``endpoint_fake.py`` com a capacidade do provedor mudando no tempo, comparando
+com limites fixos.
+"""
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from execucao_chamadas import CallExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_LIMIT = 2
+DEFAULT_MAX_LIMIT = 32
+# Janela mínima (conclusões) entre decisões, para não decidir com 1-2 amostras
+MIN_WINDOW = 4
+THROTTLE_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.8
+# Latência mediana da janela acima de N× a linha de base = fila no provedor
+LATENCY_TOLERANCE = 2.0
+# A linha de base (menor mediana vista) sobe devagar, caso o provedor fique mais lento de vez
+BASELINE_DRIFT = 0.01
+# Queda de vazão tolerada (ruído) antes de segurar o aumento
+THROUGHPUT_NOISE = 0.1
+MAX_DECISIONS = 500
+THROTTLE_MARKERS = ("429", "rate limit", "ratelimit", "resource_exhausted", "too many requests")
+
+DECISION_LABELS = {
+    "increase": "vazão subindo",
+    "throttle": "limite de taxa (429)",
+    "latency": "latência inflada",
+    "hold_throughput": "vazão não melhorou",
+    "hold_errors": "erros na janela",
+    "hold_app_limited": "menos requisições que o limite",
+}
+
+
+def is_throttle(error: Optional[BaseException]) -> bool:
+    """🚧 O erro é limite de taxa? (status 429 do cliente, `RateLimitError` do LiteLLM, mensagens do Gemini)"""
+    if error is None:
+        return False
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class AdaptiveLimiter:
+    """🎚️ Limite AIMD de requisições em voo (thread-safe; o laço de envio lê `limit`)"""
+
+    def __init__(self, initial: int = DEFAULT_INITIAL_LIMIT, min_limit: int = 1,
+                 max_limit: int = DEFAULT_MAX_LIMIT, clock: Callable[[], float] = time.monotonic):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.clock = clock
+        self.started = clock()
+        self.baseline: Optional[float] = None
+        self.last_throughput: Optional[float] = None
+        self.peak = self.limit
+        self.observations = 0
+        self.throttles = 0
+        self.decisions: List[Dict] = []
+        self.decision_counts: Dict[str, int] = {}
+        self._cooldown = 0
+        self._observer: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self._reset_window()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def _reset_window(self) -> None:
+        self._window_start = self.clock()
+        self._latencies: List[float] = []
+        self._completions = 0
+        self._errors = 0
+        self._max_in_flight = 0
+
+    def note_in_flight(self, in_flight: int) -> None:
+        """📌 Requisições em voo agora (para não subir o limite quando ele nem é usado)"""
+        with self._lock:
+            self._max_in_flight = max(self._max_in_flight, in_flight)
+
+    def observe(self, seconds: float, error: Optional[BaseException] = None) -> None:
+        """👀 Registra o fim de uma tentativa e decide ao fechar a janela (ou na hora, em 429)"""
+        with self._lock:
+            self.observations += 1
+            if is_throttle(error):
+                self.throttles += 1
+                # Um corte por rodada: os 429 da mesma rajada não derrubam o limite em cascata
+                if self._cooldown <= 0:
+                    self._decide(self._limit * THROTTLE_BACKOFF, "throttle")
+                    self._cooldown = self.limit
+                    self._reset_window()
+                return
+            self._cooldown -= 1
+            self._completions += 1
+            if error is None:
+                self._latencies.append(seconds)
+            else:
+                self._errors += 1
+            if self._completions >= max(MIN_WINDOW, self.limit):
+                self._close_window()
+
+    def _close_window(self) -> None:
+        elapsed = max(self.clock() - self._window_start, 1e-6)
+        throughput = self._completions / elapsed
+        median = statistics.median(self._latencies) if self._latencies else None
+        if median is not None:
+            self.baseline = median if self.baseline is None else min(median, self.baseline * (1 + BASELINE_DRIFT))
+
+        if median is not None and median > LATENCY_TOLERANCE * self.baseline:
+            self._decide(self._limit * LATENCY_BACKOFF, "latency", median, throughput)
+        elif self._errors * 2 > self._completions:
+            self._decide(self._limit, "hold_errors", median, throughput)
+        elif self._max_in_flight < self.limit:
+            self._decide(self._limit, "hold_app_limited", median, throughput)
+        elif self.last_throughput is not None and throughput < self.last_throughput * (1 - THROUGHPUT_NOISE):
+            self._decide(self._limit, "hold_throughput", median, throughput)
+        else:
+            self._decide(self._limit + 1, "increase", median, throughput)
+        self.last_throughput = throughput
+        self._reset_window()
+
+    def _decide(self, new_limit: float, reason: str, median: Optional[float] = None,
+                throughput: Optional[float] = None) -> None:
+        before = self.limit
+        self._limit = float(min(self.max_limit, max(self.min_limit, new_limit)))
+        self.peak = max(self.peak, self.limit)
+        self.decision_counts[reason] = self.decision_counts.get(reason, 0) + 1
+        if self.limit == before and reason != "throttle":
+            return
+        self.decisions.append({
+            "t": round(self.clock() - self.started, 2),
+            "reason": reason,
+            "from": before,
+            "to": self.limit,
+            "latency_p50": round(median, 3) if median is not None else None,
+            "baseline": round(self.baseline, 3) if self.baseline is not None else None,
+            "throughput": round(throughput, 2) if throughput is not None else None,
+        })
+        del self.decisions[:-MAX_DECISIONS]
+        if self.limit != before:
+            logger.info(f"🎚️ Concorrência {before} → {self.limit} ({DECISION_LABELS[reason]})")
+
+    def attach(self, executor: CallExecutor, call_types: Sequence[str]) -> None:
+        """🔗 Passa a observar as tentativas de `call_types` no executor"""
+        def observer(call_type: str, seconds: float, error: Optional[BaseException]) -> None:
+            if call_type in call_types:
+                self.observe(seconds, error)
+
+        self.detach(executor)
+        self._observer = observer
+        executor.add_observer(observer)
+
+    def detach(self, executor: CallExecutor) -> None:
+        if self._observer is not None:
+            executor.remove_observer(self._observer)
+            self._observer = None
+
+    def summary(self) -> Dict:
+        """📊 Limite atual, pico, 429 vistos e decisões (para os metadados)"""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "peak": self.peak,
+                "baseline_latency": round(self.baseline, 3) if self.baseline is not None else None,
+                "observations": self.observations,
+                "throttles": self.throttles,
+                "decision_counts": dict(self.decision_counts),
+                "decisions": list(self.decisions),
+            }
+
+
+def run_in_flight(jobs: Iterable, work: Callable, done: Callable[[object, Future], None],
+                  limiter: Optional[AdaptiveLimiter] = None, max_in_flight: int = 1) -> None:
+    """🚦 Roda `work(job)` em threads com até `limiter.limit` (ou `max_in_flight`) jobs em voo.
+
+    `jobs` é consumido na thread chamadora (pode preparar cada job e pular os que não
+    precisam de LLM) e `done(job, future)` também roda nela, assim o estado da execução só é
+    alterado por uma thread.
+    """
+    in_flight: Dict[Future, object] = {}
+
+    def collect() -> None:
+        for future in wait(in_flight, return_when=FIRST_COMPLETED).done:
+            done(in_flight.pop(future), future)
+
+    pool_size = limiter.max_limit if limiter is not None else max(1, max_in_flight)
+    with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="llm-em-voo") as pool:
+        for job in jobs:
+            while in_flight and len(in_flight) >= (limiter.limit if limiter is not None else max_in_flight):
+                collect()
+            in_flight[pool.submit(work, job)] = job
+            if limiter is not None:
+                limiter.note_in_flight(len(in_flight))
+        while in_flight:
+            collect()
+
+
+# ----------------------------------------------------------------------
+# Simulação contra o endpoint fake
+# ----------------------------------------------------------------------
+def simulate(requests: int = 600, capacity: str = "0:12,4:3,8:20", latency: float = 0.1,
+             fixed_limits: Sequence[int] = (2, 8, 24), max_limit: int = 32, slots: int = 0,
+             port: int = 8790) -> Dict:
+    """🧪 Mesma carga e mesmo perfil de capacidade com o limite adaptativo e com limites fixos
+
+    `slots` > 0 faz o excedente esperar na fila do servidor (latência inflada em vez de 429).
+    """
+    from cliente_llm import LLMClient
+    from endpoint_fake import FakeConfig, parse_capacity, serve
+    from execucao_chamadas import CallPolicy
+
+    # Retentativas curtas: o custo de um 429 é a rodada perdida, não minutos de backoff
+    policy = CallPolicy(timeout_seconds=30.0, max_retries=20, backoff_base=0.5, backoff_max=4.0, hedge=False)
+    results = {}
+    for mode in ["adaptativo"] + [f"fixo_{n}" for n in fixed_limits]:
+        config = FakeConfig(latency=latency, jitter=latency * 0.2, seed=1, slots=slots,
+                            capacity=parse_capacity(capacity) if capacity else None)
+        server = serve(port, config)
+        calls = CallExecutor(policies={"file": policy})
+        client = LLMClient(base_url=f"http://127.0.0.1:{port}/v1", api_key="",
+                           max_connections=max(max_limit, *fixed_limits), calls=calls)
+        limiter = AdaptiveLimiter(max_limit=max_limit) if mode == "adaptativo" else None
+        if limiter is not None:
+            limiter.attach(calls, ("file",))
+        failures = []
+        started = time.monotonic()
+        run_in_flight(range(requests), lambda _: client.generate("simulação", "fake", "file"),
+                      lambda _, future: failures.append(future.exception()) if future.exception() else None,
+                      limiter, int(mode.split("_")[-1]) if limiter is None else 1)
+        elapsed = time.monotonic() - started
+        results[mode] = {
+            "seconds": round(elapsed, 2),
+            "requests_per_second": round(requests / elapsed, 1),
+            "throttled": config.throttled,
+            "failed": len(failures),
+            "adaptive": limiter.summary() if limiter is not None else None,
+        }
+        client.close()
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🎚️ Simulação do controle adaptativo de concorrência")
+    parser.add_argument("--simulate", action="store_true", help="Roda a simulação contra o endpoint fake")
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--capacity", default="0:12,4:3,8:20",
+                        help="Perfil de capacidade do provedor fake (segundos:requisições simultâneas)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Latência média (s) do endpoint fake")
+    parser.add_argument("--slots", type=int, default=0,
+                        help="Slots do servidor fake: o excedente faz fila (latência) em vez de 429")
+    parser.add_argument("--fixed", default="2,8,24", help="Limites fixos para comparar")
+    args = parser.parse_args(argv)
+    if not args.simulate:
+        parser.print_help()
+        return 0
+    results = simulate(args.requests, args.capacity, args.latency, [int(n) for n in args.fixed.split(",")],
+                       slots=args.slots)
+    print(f"🧪 {args.requests} requisições, capacidade {args.capacity or 'ilimitada'}, "
+          f"{args.slots or 'sem'} slots, latência {args.latency}s")
+    for mode, r in results.items():
+        extra = ""
+        if r["adaptive"]:
+            a = r["adaptive"]
+            extra = f", limite final {a['limit']} (pico {a['peak']}), {len(a['decisions'])} mudanças"
+        print(f"   {mode:<11} {r['seconds']:6.2f}s {r['requests_per_second']:6.1f} req/s, "
+              f"{r['throttled']} respostas 429, {r['failed']} falhas{extra}")
+    adaptive = results["adaptativo"]["adaptive"]
+    print("\n🎚️ Decisões do controlador:")
+    for d in adaptive["decisions"]:
+        print(f"   t={d['t']:5.2f}s {d['from']:>2} → {d['to']:<2} {DECISION_LABELS[d['reason']]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+🌳 Consolidação Incremental
+==========================
+
+Dois caches persistidos em ``.crew_cache`` para que o custo de uma nova
+execução acompanhe o tamanho da mudança, e não o tamanho do repositório:
+
+- ``FileResultCache``: relatório por arquivo (markdown + JSON estruturado)
+  indexado pelo hash do conteúdo e dos parâmetros da análise;
+- ``SummaryTree``: árvore de resumos por diretório indexada pelo hash das
+  entradas (estilo Merkle). Só os ramos cujos relatórios mudaram são
+  resumidos de novo; o restante reaproveita o resumo em cache e a execução
+  termina com um único merge na raiz (a consolidação da Crew).
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+FILE_DIGEST_CHARS = 1200
+
+
+def cache_dir_for(root_dir: str, kind: str, base_dir: Optional[str] = None) -> str:
+    """📁 Diretório de cache de um tipo (`resultados`, `resumos`) para uma raiz de codebase"""
+    key = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base_dir or os.getcwd(), ".crew_cache", kind, key)
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class FileResultCache:
+    """🗃️ Resultados por arquivo indexados por hash do conteúdo e dos parâmetros"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, rel_path: str, content: str, **params) -> str:
+        header = json.dumps({"v": CACHE_VERSION, "file": rel_path, "params": params}, sort_keys=True)
+        return _sha(header + "\0" + content)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        data = _read_json(self._path(key))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, markdown: str, structured: Optional[Dict]) -> None:
+        _write_json(self._path(key), {"markdown": markdown, "structured": structured})
+
+    def summary(self) -> Dict:
+        return {"cache_dir": self.cache_dir, "hits": self.hits, "misses": self.misses}
+
+
+def file_digest(rel_path: str, markdown: str, structured: Optional[Dict]) -> str:
+    """🧾 Entrada compacta de um arquivo para o resumo do seu diretório"""
+    if structured:
+        scores = structured.get("scores") or {}
+        score_text = ", ".join(f"{k}={v}" for k, v in scores.items() if v is not None)
+        findings = [f"[{f.get('severity')}] {f.get('description')}" for f in structured.get("findings", [])[:3]]
+        return (f"- {rel_path}: {structured.get('summary', '').strip()}"
+                + (f" | scores: {score_text}" if score_text else "")
+                + (f" | achados: {'; '.join(findings)}" if findings else ""))
+    text = " ".join(markdown.split())
+    return f"- {rel_path}: {text[:FILE_DIGEST_CHARS]}"
+
+
+class SummaryTree:
+    """🌳 Árvore de resumos por diretório com reaproveitamento de subárvores inalteradas"""
+
+    def __init__(self, cache_dir: str, summarize: Callable[[str, str], str],
+                 llm_min_chars: int = 6000, max_input_chars: int = 24000):
+        self.cache_dir = cache_dir
+        self.summarize = summarize
+        self.llm_min_chars = llm_min_chars
+        self.max_input_chars = max_input_chars
+        self.stats = {"directories": 0, "reused": 0, "summarized_llm": 0, "summarized_local": 0}
+        self.changed: List[str] = []
+
+    def _node_path(self, node_hash: str) -> str:
+        return os.path.join(self.cache_dir, "nos", node_hash[:2], f"{node_hash}.json")
+
+    def build(self, digests: Dict[str, str]) -> Dict:
+        """🏗️ Resume de baixo para cima e retorna a entrada do merge na raiz.
+
+        `digests` mapeia caminho relativo → entrada compacta do arquivo (`file_digest`).
+        """
+        children: Dict[str, Dict[str, List[str]]] = {"": {"files": [], "dirs": []}}
+        for rel_path in sorted(digests):
+            parts = rel_path.replace("\\", "/").split("/")
+            parent = ""
+            for depth in range(1, len(parts)):
+                directory = "/".join(parts[:depth])
+                if directory not in children:
+                    children[directory] = {"files": [], "dirs": []}
+                    children[parent]["dirs"].append(directory)
+                parent = directory
+            children[parent]["files"].append(rel_path)
+
+        node_hashes: Dict[str, str] = {}
+        summaries: Dict[str, str] = {}
+        previous = _read_json(os.path.join(self.cache_dir, "ultima_arvore.json")) or {}
+        # Mais profundos primeiro: cada diretório já encontra os resumos dos filhos prontos
+        for directory in sorted(children, key=lambda d: -d.count("/") if d else 1):
+            node = children[directory]
+            entries = [digests[f] for f in node["files"]]
+            entries += [f"### {d}/\n{summaries[d]}" for d in node["dirs"]]
+            node_input = "\n".join(entries)
+            node_hashes[directory] = _sha(json.dumps(
+                {"v": CACHE_VERSION, "dir": directory,
+                 "files": [(f, _sha(digests[f])) for f in node["files"]],
+                 "dirs": [(d, node_hashes[d]) for d in node["dirs"]]}, sort_keys=True))
+            if previous.get(directory) != node_hashes[directory]:
+                self.changed.append(directory or ".")
+            # A raiz só é resumida se não couber no merge final (que é a consolidação da Crew)
+            threshold = self.max_input_chars if directory == "" else self.llm_min_chars
+
+            self.stats["directories"] += 1
+            cached = _read_json(self._node_path(node_hashes[directory]))
+            if cached is not None:
+                summaries[directory] = cached["summary"]
+                self.stats["reused"] += 1
+                continue
+            if len(node_input) < threshold:
+                # Entradas pequenas sobem sem LLM; o pai resume se o conjunto ficar grande
+                summary = node_input
+                self.stats["summarized_local"] += 1
+            else:
+                try:
+                    summary = self.summarize(directory or ".", node_input[: self.max_input_chars])
+                    self.stats["summarized_llm"] += 1
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao resumir {directory}/ ({e}); usando entradas truncadas")
+                    summaries[directory] = node_input[: threshold]
+                    continue
+            summaries[directory] = summary
+            _write_json(self._node_path(node_hashes[directory]), {"dir": directory, "summary": summary})
+
+        _write_json(os.path.join(self.cache_dir, "ultima_arvore.json"), node_hashes)
+        return {"root_hash": node_hashes[""], "root_input": summaries[""]}
+
+    def summary(self) -> Dict:
+        """📊 Diretórios reaproveitados e resumidos de novo (para os metadados)"""
+        return {"cache_dir": self.cache_dir, **self.stats, "changed_directories": self.changed}
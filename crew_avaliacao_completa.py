@@ -9,7 +9,7 @@ Gera relatórios ultra-profissionais para devs juniores e seniores.
 Fluxo: Codebase → Script Python → Relatório → CrewAI → Relatório Ultra-Profissional
 """
 
-from crewai import Agent, Task, Crew, Process
+from crewai import Agent, Task, Crew, LLM, Process
 try:
     import crewai_tools
     HAVE_CREWAI_TOOLS = True
@@ -17,19 +17,61 @@ except Exception:
     crewai_tools = None
     HAVE_CREWAI_TOOLS = False
 from dotenv import load_dotenv
+import argparse
 import os
 import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO)
+from resultados_estruturados import (
+    STRUCTURED_OUTPUT_INSTRUCTIONS,
+    aggregate_results,
+    extract_structured_result,
+    render_aggregate_markdown,
+)
+from roteador_modelos import DEFAULT_LITE_MODEL, ModelRouter, RouteDecision, compute_signals, local_file_report
+from indice_recuperacao import RetrievalIndex, default_index_dir, format_evidence
+from roteamento_especialistas import SpecialistClassifier, render_skipped_markdown
+from fila_distribuida import LeaseKeeper, ShardQueue
+from inventario import FLAG_ANALYZED, FileInventory
+from varredura import MAX_CHARS, archive_members, cache_root_for, is_archive, iter_files, read_sources, truncate_for_prompt
+from planejador import DEFAULT_LATENCY_SECONDS, plan_analysis, render_plan
+from agendador_prazo import LEVEL_MAX_CHARS, DeadlineScheduler, parse_duration
+from execucao_chamadas import parse_timeouts
+from cliente_llm import get_client, parse_backends, usage_by_backend
+from predicao_lote import BatchJob, batch_request, write_batch_input
+from compressao_prompt import PromptCompressor
+from registro_execucao import LOG_MODES, PER_FILE, ProgressReporter, current_log_mode, setup_logging
+from perfilamento import Profiler, maybe_stage
+from gerar_relatorio_base import (
+    DEFAULT_MAX_TOKENS as DIGEST_MAX_TOKENS, DEFAULT_OUTPUT as DIGEST_OUTPUT, generate_report
+)
+from consolidacao_incremental import FileResultCache, SummaryTree, cache_dir_for, file_digest
+from analise_simbolos import SymbolUnit, merge_unit_results, plan_units, unit_snippet
+from concorrencia_adaptativa import DEFAULT_MAX_LIMIT, AdaptiveLimiter, run_in_flight
+
+# Logging configurado só em `main()` (importar o módulo não mexe nos handlers de quem importa)
 logger = logging.getLogger(__name__)
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+
+# Instrução anexada ao prompt por arquivo quando o conteúdo foi comprimido
+LINE_MAP_NOTE = ("O conteúdo acima foi comprimido: cada linha `@@ L<n>` indica que a linha seguinte é a "
+                 "linha <n> do arquivo original e `…` marca trechos omitidos. Cite sempre os números de "
+                 "linha do arquivo original.")
+# Etapas com backend selecionável (`--backends`); `consolidation` cobre especialistas e relatório final
+BACKEND_STAGES = ("file", "directory_summary", "consolidation")
+
+
 class CodebaseAnalysisCrew:
     """
     🤝 CrewAI para Avaliação Completa de Codebase
@@ -43,16 +85,30 @@ class CodebaseAnalysisCrew:
     🤖 Engenheiro de IA
     """
     
-    def __init__(self, gemini_api_key: Optional[str] = None):
-        """Inicializa a crew com configuração Gemini 2.5 Flash"""
-        self.gemini_api_key = gemini_api_key or os.getenv("GEMINI_API_KEY")
-        if not self.gemini_api_key:
+    def __init__(self, gemini_api_key: Optional[str] = None, call_timeouts: Optional[Dict[str, float]] = None,
+                 agent_verbose: bool = True, backends: Optional[Dict[str, str]] = None):
+        """Inicializa a crew com configuração Gemini 2.5 Flash.
+
+        `call_timeouts` sobrescreve o timeout (s) por tipo de chamada ao LLM
+        (file, specialist, consolidation, standard_flow). `agent_verbose` controla a
+        saída detalhada dos agentes e crews (desligue em execuções de alto volume).
+        `backends` escolhe o backend (`remote` ou `local`) por etapa de `BACKEND_STAGES`.
+        """
+        unknown = set(backends or {}) - set(BACKEND_STAGES)
+        if unknown:
+            raise ValueError(f"etapa de backend desconhecida: {', '.join(sorted(unknown))} "
+                             f"(use {', '.join(BACKEND_STAGES)})")
+        self.backends = {stage: "remote" for stage in BACKEND_STAGES}
+        self.backends.update(backends or {})
+        self.gemini_api_key = gemini_api_key or os.getenv("GEMINI_API_KEY") or os.getenv("LLM_API_KEY")
+        if not self.gemini_api_key and not os.getenv("LLM_BASE_URL"):
             raise ValueError("❌ GEMINI_API_KEY não encontrada! Configure no .env ou passe como parâmetro")
         
-        # Remove espaços em branco da API key se houver
-        self.gemini_api_key = self.gemini_api_key.strip()
+        # Remove espaços em branco da API key se houver (endpoints locais podem dispensar a chave)
+        self.gemini_api_key = (self.gemini_api_key or "").strip()
         
-        logger.info(f"✅ GEMINI_API_KEY carregada: {self.gemini_api_key[:10]}...")
+        logger.info("✅ GEMINI_API_KEY carregada")
+        self.agent_verbose = agent_verbose
         
         # Set environment variables for CrewAI's built-in LLM handling
         # Following the pattern from latest_ai_development example
@@ -60,9 +116,10 @@ class CodebaseAnalysisCrew:
         if "MODEL" not in os.environ:
             os.environ["MODEL"] = "gemini/gemini-2.5-flash"
         
-        # CrewAI will automatically handle LLM instantiation from env vars
-        # No need for manual LLM() instantiation
-        self.llm = None
+        # Cliente LLM do processo: mesmo pool HTTP, URL base, políticas e contagem de tokens
+        # do avaliacao_gemini.py; os agentes recebem um LLM da CrewAI apontando para ele
+        self.client = get_client()
+        self.llm = get_client(self.backends["consolidation"]).crewai_llm(os.environ["MODEL"])
         
         # Tools para leitura de arquivos (só instanciaremos ferramentas reais se disponíveis)
         if HAVE_CREWAI_TOOLS and crewai_tools is not None:
@@ -80,6 +137,15 @@ class CodebaseAnalysisCrew:
         # Cria agentes especializados
         self.agents = self._create_agents()
         self.tasks = self._create_tasks()
+        # LLMs dos analistas por arquivo por backend e modelo (criados sob demanda pelo roteador de modelos)
+        self._file_analyst_llms: Dict[str, LLM] = {}
+        # Timeouts, hedging e retentativas de todas as chamadas ao LLM (compartilhados pelo cliente)
+        self.calls = self.client.calls
+        self.calls.set_timeouts(call_timeouts or {})
+        # Guardados para irem na configuração da execução distribuída (workers em outros hosts)
+        self.call_timeouts = dict(call_timeouts or {})
+        # Contadores da execução atualizados pelas threads da fase por arquivo concorrente
+        self._stats_lock = threading.Lock()
         
     def _create_agents(self) -> Dict[str, Agent]:
         """🎭 Cria todos os agentes especializados"""
@@ -100,7 +166,8 @@ class CodebaseAnalysisCrew:
                           "e arquiteturas para SaaS. Conhece profundamente padrões como Repository, Factory, Observer e\n"
                           "estratégias de rate limiting para APIs."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -119,7 +186,8 @@ class CodebaseAnalysisCrew:
                           "Especialista em testes de APIs, mock de serviços externos e estratégias de teste para\n"
                           "sistemas que integram redes sociais."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -138,7 +206,8 @@ class CodebaseAnalysisCrew:
                           "desde devs juniores até arquitetos seniores. Conhece ferramentas como Sphinx,\n"
                           "MkDocs e padrões de documentação de APIs REST."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -157,7 +226,8 @@ class CodebaseAnalysisCrew:
                           "automação Instagram/WhatsApp. Expert em definir MVP, pricing strategy e user journey\n"
                           "para produtos B2B."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -175,7 +245,8 @@ class CodebaseAnalysisCrew:
                           "Expert em LGPD, GDPR e regulamentações de automação. Experiência em revisar contratos\n"
                           "de APIs, políticas de uso de dados e compliance para startups de tecnologia."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -194,7 +265,8 @@ class CodebaseAnalysisCrew:
                           "Expert em otimização de prompts, RAG systems e estratégias de personalização de conteúdo\n"
                           "para redes sociais."),
                 tools=tools_list,
-                verbose=True,
+                llm=self.llm,
+                verbose=self.agent_verbose,
                 max_iter=3,
                 allow_delegation=False,
             ),
@@ -358,6 +430,76 @@ class CodebaseAnalysisCrew:
         ]
         
         return tasks
+
+    def _backends_metadata(self) -> Dict:
+        """🔀 Backend de cada etapa e consumo de tokens por backend (para os metadados)"""
+        return {"stages": dict(self.backends), "usage": usage_by_backend()}
+
+    def _tasks_by_role(self, tasks: List[Task]) -> Dict[str, Task]:
+        """🗂️ Mapeia cada task de especialista para a chave do seu agente"""
+        by_agent = {id(agent): role for role, agent in self.agents.items()}
+        return {by_agent[id(t.agent)]: t for t in tasks if id(t.agent) in by_agent}
+
+    def _run_specialists_parallel(self, tasks: List[Task], max_workers: int):
+        """⚡ Executa tasks independentes de especialistas em crews separadas num pool limitado.
+
+        Retorna ({papel: saída}, estatísticas de tempo) preservando a ordem das tasks.
+        """
+        roles = {id(t): role for role, t in self._tasks_by_role(tasks).items()}
+
+        def run_one(task: Task):
+            started = time.perf_counter()
+            try:
+                output = str(self.calls.call("specialist", self._single_task_kickoff(task)))
+            except Exception as e:
+                logger.error(f"❌ Erro no especialista {roles.get(id(task))}: {e}")
+                output = f"❌ Erro na análise: {e}"
+            return output, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks) or 1))) as pool:
+            futures = [pool.submit(run_one, t) for t in tasks]
+            results = [f.result() for f in futures]
+        wall_time = time.perf_counter() - started
+
+        outputs = {roles.get(id(t), f"task_{i}"): out for i, (t, (out, _)) in enumerate(zip(tasks, results))}
+        durations = {roles.get(id(t), f"task_{i}"): round(d, 2) for i, (t, (_, d)) in enumerate(zip(tasks, results))}
+        stats = {
+            "max_workers": max_workers,
+            "wall_time_seconds": round(wall_time, 2),
+            "sum_of_task_seconds": round(sum(durations.values()), 2),
+            "task_seconds": durations,
+        }
+        return outputs, stats
+
+    def _active_roles(self, specialists: Optional[Dict]) -> List[str]:
+        """✅ Papéis efetivamente executados (todos, se não houver pré-classificação)"""
+        if specialists is None:
+            return list(self.agents.keys())
+        return [role for role in self.agents if role not in specialists or specialists[role].relevant]
+
+    @staticmethod
+    def _specialists_metadata(specialists: Optional[Dict]) -> Optional[Dict]:
+        """📊 Decisões de relevância por especialista para os metadados (sem listas enormes)"""
+        if specialists is None:
+            return None
+        return {
+            role: {"relevant": d.relevant, "reason": d.reason, "files_count": len(d.files)}
+            for role, d in specialists.items()
+        }
+
+    def _attach_role_evidence(self, index: RetrievalIndex, tasks_by_role: Dict[str, Task],
+                              top_k: int, token_budget: int) -> Dict[str, int]:
+        """📎 Anexa a cada task os trechos mais relevantes para o seu especialista"""
+        attached = {}
+        for role, task in tasks_by_role.items():
+            chunks = index.evidence_for_role(role, top_k=top_k, token_budget=token_budget)
+            task.description += (
+                f"\n\n**Evidências relevantes (top-{top_k}, recuperadas do índice local):**\n"
+                f"{format_evidence(chunks)}\n"
+            )
+            attached[role] = len(chunks)
+        return attached
     
     def create_final_report_task(self) -> Task:
         """📑 Cria task final para consolidação do relatório"""
@@ -413,9 +555,162 @@ class CodebaseAnalysisCrew:
             # O contexto completo será anexado textualmente à `description` antes da execução final.
         )
     
+    @staticmethod
+    def _copy_agent(agent: Agent, **overrides) -> Agent:
+        """👥 Agent novo com a mesma persona (o Agent da CrewAI guarda o estado da execução na instância)"""
+        fields = dict(role=agent.role, goal=agent.goal, backstory=agent.backstory, tools=agent.tools or None,
+                      llm=agent.llm, verbose=agent.verbose, max_iter=agent.max_iter,
+                      allow_delegation=agent.allow_delegation)
+        fields.update(overrides)
+        return Agent(**fields)
+
+    def _single_task_kickoff(self, task: Task, verbose: bool = False) -> Callable[[], object]:
+        """🔁 Kickoff que monta Crew, Task e Agent novos a cada tentativa.
+
+        O CallExecutor refaz a chamada enquanto a tentativa que estourou o timeout ainda roda
+        na thread dela; com objetos novos as duas não disputam o estado da mesma Crew.
+        """
+        def kickoff():
+            attempt = Task(description=task.description, expected_output=task.expected_output,
+                           agent=self._copy_agent(task.agent))
+            return Crew(agents=[attempt.agent], tasks=[attempt], process=Process.sequential,
+                        verbose=verbose, memory=False).kickoff()
+        return kickoff
+
+    def _get_file_analyst(self, model: Optional[str] = None, stage: str = "file") -> Agent:
+        """🧑‍💻 Cria um analista por arquivo (arquiteto) para o modelo e o backend da etapa.
+
+        O Agent da CrewAI guarda o estado da execução na instância (executor, crew), então cada
+        task recebe um analista novo: arquivos em paralelo e requisições duplicadas não
+        compartilham esse estado. Só o LLM (sem estado) é reaproveitado.
+        """
+        base = self.agents["arquiteto"]
+        backend = self.backends[stage]
+        if (not model or model == os.environ.get("MODEL")) and backend == self.backends["consolidation"]:
+            llm, verbose = base.llm, base.verbose
+        else:
+            key = f"{backend}:{model or os.environ['MODEL']}"
+            if key not in self._file_analyst_llms:
+                self._file_analyst_llms[key] = get_client(backend).crewai_llm(model)
+            llm, verbose = self._file_analyst_llms[key], False
+        return self._copy_agent(base, llm=llm, verbose=verbose, max_iter=3, allow_delegation=False)
+
+    @staticmethod
+    def _file_prompt(rel_path: str, snippet: str, max_chars: int, summary_only: bool = False):
+        """📝 Descrição e saída esperada do prompt por arquivo (tasks da Crew e modo em lote)"""
+        if summary_only:
+            # Degrau de prazo: prompt curto, só resumo e achados principais
+            return f"""RESUMO DO ARQUIVO: {rel_path}
+
+Resuma em poucas linhas a responsabilidade do arquivo e aponte apenas os riscos
+mais graves (se houver). Não detalhe refatorações nem testes.
+
+Trecho do arquivo (até {max_chars} chars):
+```
+{snippet}
+```
+{LINE_MAP_NOTE if "@@ L" in snippet else ""}
+{STRUCTURED_OUTPUT_INSTRUCTIONS}""", "Resumo (1-3 linhas), riscos principais e bloco ```json final"
+        return f"""ANÁLISE DO ARQUIVO: {rel_path}
+
+Leia atentamente o conteúdo do arquivo abaixo e gere um relatório focado em:
+- Função do arquivo no projeto (responsabilidade)
+- Pontos de acoplamento e dependências externas
+- Complexidade e sugestões de refatoração
+- Riscos de segurança ou má práticas
+- Recomendações de testes (unitários/integração)
+
+Conteúdo do arquivo (até {max_chars} chars):
+```
+{snippet}
+```
+{LINE_MAP_NOTE if "@@ L" in snippet else ""}
+{STRUCTURED_OUTPUT_INSTRUCTIONS}""", """Relatório por arquivo em markdown com:
+- Resumo (1-3 linhas)
+- Pontos críticos e recomendações
+- Sugestões de testes
+- Linha de ação rápida (quick win)
+- Bloco ```json final com findings, scores e quick_wins
+"""
+
+    def _build_file_task(self, rel_path: str, snippet: str, max_chars: int,
+                         model: Optional[str] = None, summary_only: bool = False) -> Task:
+        """🔎 Cria task dedicada para um arquivo (usando arquiteto como analista por arquivo)"""
+        description, expected_output = self._file_prompt(rel_path, snippet, max_chars, summary_only)
+        return Task(description=description, expected_output=expected_output, agent=self._get_file_analyst(model))
+
+    def _run_file_task(self, make_task: Callable[[], Task], file_path: str, call_type: str = "file") -> str:
+        """⚙️ Executa uma crew rápida apenas para a task de um arquivo.
+
+        `make_task` cria uma task nova a cada chamada para que a requisição duplicada
+        (hedging) e as retentativas não compartilhem estado com a chamada original.
+        """
+        def kickoff():
+            task = make_task()
+            crew_single = Crew(
+                agents=[task.agent],
+                tasks=[task],
+                process=Process.sequential,
+                verbose=False,
+                memory=False,
+            )
+            return crew_single.kickoff()
+
+        try:
+            return str(self.calls.call(call_type, kickoff))
+        except Exception as e:
+            logger.error(f"❌ Erro ao analisar {file_path}: {e}")
+            # registramos o erro no resultado para posterior salvamento
+            return f"❌ Erro ao analisar {file_path}: {e}"
+
+    def _summarize_directory(self, directory: str, inputs: str) -> str:
+        """🌳 Resume um diretório a partir dos resumos dos arquivos e subdiretórios (modelo lite)"""
+        def make_task() -> Task:
+            return Task(
+                description=f"""RESUMO DO DIRETÓRIO: {directory}/
+
+A partir dos resumos abaixo (arquivos e subdiretórios), escreva um resumo em até 15 linhas:
+- Responsabilidade do diretório no projeto
+- Principais riscos e achados (cite o arquivo)
+- Tendência dos scores e quick wins mais relevantes
+
+Resumos de entrada:
+{inputs}""",
+                expected_output="Resumo curto em markdown do diretório",
+                agent=self._get_file_analyst(os.getenv("MODEL_LITE", DEFAULT_LITE_MODEL), "directory_summary"),
+            )
+
+        result = self._run_file_task(make_task, directory, call_type="directory_summary")
+        if result.startswith("❌"):
+            # Não deixa o erro entrar no cache de resumos
+            raise RuntimeError(result)
+        return result
+
     def  run_analysis(self, report_path: str = "relatorio_codebase_turbinado.md",
                      max_files: int = 300,
-                     max_size_bytes: int = 2 * 1024 * 1024) -> str:
+                     max_size_bytes: int = 2 * 1024 * 1024,
+                     model_routing: bool = True,
+                     escalate: bool = True,
+                     retrieval: bool = True,
+                     evidence_top_k: int = 6,
+                     evidence_token_budget: int = 1500,
+                     specialist_gating: bool = True,
+                     parallel_specialists: bool = False,
+                     max_parallel_specialists: int = 6,
+                     workers: Optional[int] = None,
+                     queue_path: Optional[str] = None,
+                     shard_size: int = 25,
+                     deadline_seconds: Optional[float] = None,
+                     deadline_reserve_seconds: Optional[float] = None,
+                     prompt_compression: bool = True,
+                     strip_comments: bool = False,
+                     profiler: Optional[Profiler] = None,
+                     incremental: bool = True,
+                     symbol_level: bool = True,
+                     batch_submit: bool = False,
+                     batch_resume_path: Optional[str] = None,
+                     batch_poll_seconds: float = 60.0,
+                     adaptive_concurrency: Optional[int] = None) -> str:
         """🚀 Percorre a codebase lendo arquivos e gerando relatório por arquivo, depois consolida.
 
         Comportamento:
@@ -423,44 +718,166 @@ class CodebaseAnalysisCrew:
         - Caso contrário: trata `report_path` como diretório (se for) ou usa cwd como root e
           analisa arquivos da codebase gerando relatórios por arquivo.
         - Para evitar custos/overload, existe um limite `max_files` e um limite de tamanho por arquivo.
+        - Com `model_routing`, cada arquivo é roteado entre curto-circuito local, modelo lite
+          (`MODEL_LITE`) e modelo completo (`MODEL`); com `escalate`, análises lite com risco
+          alto são refeitas no modelo completo. As decisões vão para os metadados.
+        - Com `retrieval`, um índice local (TF-IDF por hashing) sobre relatórios e código é
+          atualizado incrementalmente e cada especialista recebe apenas os top-k trechos
+          relevantes dentro de `evidence_token_budget` tokens.
+        - Com `specialist_gating`, uma pré-classificação (imports, palavras-chave) decide quais
+          especialistas são relevantes e quais arquivos cada um vê; os pulados aparecem no
+          relatório final com o motivo.
+        - Com `parallel_specialists` (fluxo padrão), as tasks dos especialistas rodam em crews
+          separadas num pool limitado a `max_parallel_specialists`; o tempo total tende ao do
+          especialista mais lento em vez da soma.
+        - Com `workers` (modo coordenador), a lista de arquivos é fatiada em shards de
+          `shard_size` numa fila SQLite (`queue_path`); `workers` processos locais (e workers em
+          outros hosts com `--worker --queue`) analisam os shards e a consolidação roda ao final.
+        - Com `deadline_seconds`, os arquivos são processados em ordem de importância e o
+          agendador replaneja pela latência observada, degradando em degraus (trechos menores,
+          modelo lite, prompts só de resumo, pular baixa prioridade) e sempre reservando tempo
+          para a consolidação. As degradações vão para os metadados.
+        - Com `prompt_compression`, o conteúdo de cada arquivo passa por uma compressão por
+          tipo (espaços, banners, docstrings longas, JSON/YAML por schema, literais repetitivos,
+          cabeçalhos de licença; comentários com `strip_comments`) antes do prompt, mantendo
+          marcadores `@@ L<n>` com as linhas originais. A economia por tipo vai para os metadados.
+        - Com `profiler` (`--profile`), cada etapa gera cProfile, pilhas amostradas (folded),
+          tracemalloc e o tempo bloqueado no LLM versus CPU no diretório da execução.
+        - Com `incremental`, relatórios por arquivo são reaproveitados pelo hash do conteúdo e a
+          consolidação usa uma árvore de resumos por diretório em cache: só os ramos alterados
+          são resumidos de novo antes do merge final na raiz.
+        - Com `symbol_level` (e `incremental`), arquivos grandes de Python/JS/TS são analisados
+          por unidades de símbolos de topo, cada uma com hash e resultado em cache: uma edição
+          reanalisa só as unidades alteradas e o relatório do arquivo é remontado localmente.
+        - Com `batch_submit`, os prompts por arquivo são submetidos como um job JSONL na Batch
+          API (mais barata por token); o estado fica em `lote_estado.json` no diretório de
+          relatórios e `batch_resume_path` retoma o polling de um job já submetido. Os
+          resultados são ingeridos em `reports_by_file_*` e a consolidação segue normal.
+        - Se `report_path` é um arquivo compactado (`.tar.gz`, `.tar.zst`, `.zip`), os membros
+          passam pelos mesmos filtros e truncamento em streaming, sem extração. Os caches são
+          chaveados pelo nome do projeto sem versão, então releases seguintes reaproveitam os
+          resultados dos membros inalterados. Não combina com `workers`.
+        - Com o backend `local` na etapa `file` (`backends` do construtor), os prompts por arquivo
+          vão para o servidor local com várias requisições em voo, aproveitando o continuous
+          batching dele; especialistas e consolidação seguem no backend da sua etapa.
+        - Com `adaptive_concurrency`, a fase por arquivo roda com vários arquivos em voo e o
+          limite se ajusta sozinho (AIMD, até `adaptive_concurrency`): sobe enquanto a vazão
+          cresce e a latência fica perto da linha de base, e cai pela metade a cada 429. A
+          trajetória do limite vai para os metadados. Não combina com `workers` nem com o prazo.
         """
         logger.info("🚀 Iniciando análise completa da codebase (análise por arquivo)...")
         
         # Gera timestamp único para esta execução
         execution_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        batch_job = None
+        if batch_resume_path is not None:
+            # Retomada: mesma raiz, timestamp e diretório de relatórios do job submetido
+            batch_job = BatchJob.load(self.client, batch_resume_path)
+            report_path = batch_job.state["root_dir"]
+            execution_timestamp = batch_job.state["timestamp"]
+        if profiler is not None and profiler.io_clock is None:
+            # Tempo bloqueado esperando o LLM (soma das chamadas do CallExecutor)
+            profiler.io_clock = lambda: self.calls.blocked_seconds
 
         # Se for arquivo existente, mantemos o comportamento original (usa o relatório como insumo)
-        if os.path.exists(report_path) and os.path.isfile(report_path):
+        if os.path.exists(report_path) and os.path.isfile(report_path) and not is_archive(report_path):
             logger.info(f"📄 Relatório de entrada encontrado: {report_path} — executando fluxo padrão.")
+            if deadline_seconds is not None:
+                logger.warning("⚠️ --deadline só se aplica à análise por arquivo; ignorado no fluxo padrão")
+            if batch_submit:
+                logger.warning("⚠️ --batch-submit só se aplica à análise por arquivo; ignorado no fluxo padrão")
             # Reutiliza o fluxo original: verifica e executa crew com as tasks definidas mais a task final
-            all_tasks = self.tasks + [self.create_final_report_task()]
+            specialist_tasks = self._create_tasks()
+            with open(report_path, "r", encoding="utf-8", errors="ignore") as f:
+                report_text = f.read()
 
-            crew = Crew(
-                agents=list(self.agents.values()),
-                tasks=all_tasks,
-                process=Process.sequential,
-                verbose=True,
-                # Avoid initializing persistent memory here to prevent external
-                # dependencies (e.g. Chroma) from being required in minimal runs.
-                # Per-file runs use memory=False already.
-                memory=False,
-            )
+            specialists = None
+            skipped_markdown = ""
+            if specialist_gating:
+                classifier = SpecialistClassifier()
+                classifier.observe(os.path.basename(report_path), report_text)
+                specialists = classifier.decide()
+                relevant_tasks = {id(t) for role, t in self._tasks_by_role(specialist_tasks).items()
+                                  if specialists[role].relevant}
+                specialist_tasks = [t for t in specialist_tasks if id(t) in relevant_tasks]
+                skipped_markdown = render_skipped_markdown(specialists)
+                for d in specialists.values():
+                    if not d.relevant:
+                        logger.info(f"🚦 Especialista pulado: {d.role} ({d.reason})")
+
+            evidence_counts = None
+            if retrieval:
+                index = RetrievalIndex(default_index_dir(os.path.dirname(os.path.abspath(report_path))))
+                input_id = f"input:{os.path.basename(report_path)}"
+                index.add_document(input_id, report_text, "input", os.path.basename(report_path))
+                index.prune({input_id}, prefixes=("input:",))
+                index.save()
+                evidence_counts = self._attach_role_evidence(
+                    index, self._tasks_by_role(specialist_tasks), evidence_top_k, evidence_token_budget
+                )
+            final_task = self.create_final_report_task()
+            if skipped_markdown:
+                final_task.description += (
+                    "\n\nOs especialistas abaixo não foram executados por não serem relevantes para esta "
+                    f"codebase; não invente análises para eles:\n{skipped_markdown}"
+                )
+            all_tasks = specialist_tasks + [final_task]
+            active_roles = self._active_roles(specialists)
+            parallel_stats = None
 
             try:
-                logger.info("🔄 Executando análise com CrewAI (fluxo padrão)...")
-                result = crew.kickoff()
+                if parallel_specialists:
+                    # Especialistas não dependem uns dos outros: executam em paralelo e a
+                    # consolidação recebe as saídas explicitamente como contexto.
+                    logger.info(f"🔄 Executando {len(specialist_tasks)} especialistas em paralelo "
+                                f"(máx. {max_parallel_specialists})...")
+                    with maybe_stage(profiler, "specialists"):
+                        outputs, parallel_stats = self._run_specialists_parallel(
+                            specialist_tasks, max_parallel_specialists
+                        )
+                    final_task.description += "\n\n**Análises dos especialistas (contexto):**\n" + "\n\n".join(
+                        f"### {role}\n\n{text}" for role, text in outputs.items()
+                    )
+                    kickoff = self._single_task_kickoff(final_task, self.agent_verbose)
+                    logger.info("🔄 Executando consolidação (fluxo padrão paralelo)...")
+                else:
+                    crew = Crew(
+                        agents=[self.agents[role] for role in active_roles],
+                        tasks=all_tasks,
+                        process=Process.sequential,
+                        verbose=self.agent_verbose,
+                        # Avoid initializing persistent memory here to prevent external
+                        # dependencies (e.g. Chroma) from being required in minimal runs.
+                        # Per-file runs use memory=False already.
+                        memory=False,
+                    )
+                    # Tasks encadeadas numa Crew só: "standard_flow" não tem retentativas, então
+                    # nenhuma tentativa nova disputa esta Crew com uma que estourou o timeout
+                    kickoff = crew.kickoff
+                    logger.info("🔄 Executando análise com CrewAI (fluxo padrão)...")
+                stage_name = "consolidation" if parallel_specialists else "standard_flow"
+                with maybe_stage(profiler, stage_name, memory=True):
+                    result = self.calls.call(stage_name, kickoff)
 
                 output_file = f"relatorio_final_startup_{execution_timestamp}.md"
                 with open(output_file, "w", encoding="utf-8") as f:
                     f.write(str(result))
+                    if skipped_markdown:
+                        f.write("\n\n" + skipped_markdown)
 
                 metadata = {
                     "timestamp": execution_timestamp,
                     "input_file": report_path,
                     "output_file": output_file,
-                    "agents_used": list(self.agents.keys()),
+                    "agents_used": active_roles,
+                    "specialists": self._specialists_metadata(specialists),
                     "total_tasks": len(all_tasks),
-                    "llm_model": "gemini-2.5-flash"
+                    "llm_model": "gemini-2.5-flash",
+                    "retrieval_evidence": evidence_counts,
+                    "parallel_specialists": parallel_stats,
+                    "llm_calls": self.calls.summary(),
+                    "llm_usage": self.client.usage_summary(),
+                    "llm_backends": self._backends_metadata(),
                 }
                 metadata_file = f"metadata_analise_{execution_timestamp}.json"
                 with open(metadata_file, "w", encoding="utf-8") as f:
@@ -474,127 +891,778 @@ class CodebaseAnalysisCrew:
             except Exception as e:
                 logger.error(f"❌ Erro durante análise (fluxo padrão): {e}")
                 raise
+            finally:
+                if profiler is not None:
+                    logger.info(f"🔬 Perfil salvo em: {profiler.write_summary()}")
 
-        # Caso contrário, tratamos report_path como diretório ou usamos cwd
+        # Caso contrário, tratamos report_path como diretório (ou arquivo compactado) ou usamos cwd
         if os.path.isdir(report_path):
             root_dir = report_path
             logger.info(f"📁 Usando diretório informado como root da codebase: {root_dir}")
+        elif is_archive(report_path):
+            root_dir = report_path
+            logger.info(f"📦 Analisando o arquivo compactado sem extrair: {root_dir}")
+            if workers is not None:
+                raise ValueError("--workers exige uma pasta: workers releem os arquivos pelo caminho")
         else:
             # report_path não existe como arquivo nem diretório -> usamos cwd como fallback
             root_dir = os.getcwd()
             logger.warning(f"⚠️ '{report_path}' não encontrado como arquivo; usando root: {root_dir}")
 
-        # filtros e extensões de interesse
-        skip_dirs = {".git", "__pycache__", "node_modules", "venv", ".venv", ".idea", ".env", ".venv"}
-        allowed_exts = {".py", ".md", ".txt", ".json", ".yaml", ".yml", ".ini", ".cfg", ".sh", ".tsx", ".ts", ".js"}
-
-        per_file_reports = []
         # Cria diretório de relatórios com timestamp para isolar execuções
-        reports_dir = os.path.join(os.getcwd(), f"reports_by_file_{execution_timestamp}")
+        reports_dir = (batch_job.state["reports_dir"] if batch_job is not None
+                       else os.path.join(os.getcwd(), f"reports_by_file_{execution_timestamp}"))
         os.makedirs(reports_dir, exist_ok=True)
         logger.info(f"📁 Diretório de relatórios: {reports_dir}")
 
-        files_analyzed = 0
+        run = self._new_run_state(root_dir, reports_dir, execution_timestamp, model_routing, escalate)
+        run["index"] = RetrievalIndex(default_index_dir(cache_root_for(root_dir))) if retrieval else None
+        run["classifier"] = SpecialistClassifier() if specialist_gating else None
+        run["compressor"] = PromptCompressor(strip_comments=strip_comments) if prompt_compression else None
+        run["result_cache"] = (FileResultCache(cache_dir_for(cache_root_for(root_dir), "resultados"))
+                               if incremental else None)
+        run["symbols"] = self._new_symbol_stats() if incremental and symbol_level else None
+        if deadline_seconds is not None:
+            run["scheduler"] = DeadlineScheduler(
+                deadline_seconds,
+                consolidation_reserve=deadline_reserve_seconds,
+                initial_latency=DEFAULT_LATENCY_SECONDS["full"],
+                consolidation_latency=DEFAULT_LATENCY_SECONDS["consolidation"],
+                concurrency=workers or 1,
+            )
+            logger.info(f"⏱️ Prazo de {deadline_seconds:.0f}s "
+                        f"({run['scheduler'].consolidation_reserve:.0f}s reservados para a consolidação)")
 
-        # Percorre arquivos
-        for dirpath, dirnames, filenames in os.walk(root_dir):
-            # pular diretórios indesejados
-            dirnames[:] = [d for d in dirnames if d not in skip_dirs]
+        if profiler is not None and (profiler.out_dir is None or profiler.dir_is_default):
+            profiler.set_output_dir(os.path.join(reports_dir, "perfil"))
 
-            for fname in filenames:
-                if files_analyzed >= max_files:
-                    logger.info(f"ℹ️ Limite de arquivos alcançado ({max_files}). Parando análise por arquivo.")
-                    break
+        limiter = None
+        if adaptive_concurrency is not None and workers is None and run["scheduler"] is None \
+                and not batch_submit and batch_job is None:
+            limiter = AdaptiveLimiter(
+                max_limit=min(adaptive_concurrency, get_client(self.backends["file"]).max_connections)
+            )
+            limiter.attach(self.calls, ("file",))
+            logger.info(f"🎚️ Concorrência adaptativa na fase por arquivo (limite inicial {limiter.limit}, "
+                        f"máximo {limiter.max_limit})")
 
-                _, ext = os.path.splitext(fname)
-                if ext.lower() not in allowed_exts:
-                    continue
+        if workers is not None:
+            with maybe_stage(profiler, "per_file", memory=True):
+                self._run_distributed_phase(run, queue_path, workers, shard_size, max_files, max_size_bytes)
+        elif batch_submit or batch_job is not None:
+            with maybe_stage(profiler, "per_file", memory=True):
+                self._run_batch_phase(run, max_files, max_size_bytes, batch_job, batch_poll_seconds)
+        elif run["scheduler"] is not None:
+            with maybe_stage(profiler, "per_file", memory=True):
+                self._run_deadline_phase(run, max_files, max_size_bytes)
+        elif self.backends["file"] == "local":
+            with maybe_stage(profiler, "per_file", memory=True):
+                self._run_local_phase(run, max_files, max_size_bytes, limiter)
+        elif limiter is not None:
+            with maybe_stage(profiler, "per_file", memory=True):
+                self._run_concurrent_phase(run, max_files, max_size_bytes, limiter)
+        else:
+            # Contagem barata (sem ler conteúdo) só para a linha de progresso com ETA
+            with maybe_stage(profiler, "scan"):
+                total = sum(1 for _ in iter_files(root_dir, max_files, max_size_bytes, read_content=False))
+            progress = ProgressReporter(total, logger)
+            with maybe_stage(profiler, "per_file", memory=True):
+                for file_path, rel_path, content in iter_files(root_dir, max_files, max_size_bytes):
+                    self._process_file(run, file_path, rel_path, content)
+                    progress.advance()
+            progress.finish()
+            if len(run["per_file_reports"]) >= max_files:
+                logger.info(f"ℹ️ Limite de arquivos alcançado ({max_files}). Análise por arquivo encerrada.")
+        if limiter is not None:
+            limiter.detach(self.calls)
+            run["extra_metadata"]["adaptive_concurrency"] = limiter.summary()
 
-                file_path = os.path.join(dirpath, fname)
+        try:
+            with maybe_stage(profiler, "consolidation", memory=True):
+                return self._consolidate(run, evidence_top_k, evidence_token_budget)
+        finally:
+            if profiler is not None:
+                logger.info(f"🔬 Perfil salvo em: {profiler.write_summary()}")
 
-                # evitar arquivos binários grandes
-                try:
-                    size = os.path.getsize(file_path)
-                    if size > max_size_bytes:
-                        logger.info(f"⏭️ Pulando arquivo grande (>{max_size_bytes} bytes): {file_path}")
-                        continue
-                except Exception:
-                    logger.warning(f"⚠️ Não foi possível ler tamanho do arquivo, pulando: {file_path}")
+    # ------------------------------------------------------------------
+    # Fase por arquivo
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _new_run_state(root_dir: str, reports_dir: str, execution_timestamp: str,
+                       model_routing: bool = True, escalate: bool = True) -> Dict:
+        """🧾 Estado da fase por arquivo compartilhado entre execução local, workers e consolidação"""
+        return {
+            "root_dir": root_dir,
+            "reports_dir": reports_dir,
+            "timestamp": execution_timestamp,
+            "per_file_reports": [],
+            "structured_entries": [],
+            "router": ModelRouter(escalate=escalate) if model_routing else None,
+            "index": None,
+            "classifier": None,
+            "scheduler": None,
+            "compressor": None,
+            "result_cache": None,
+            "inventory": FileInventory(),
+            "symbols": None,
+            "extra_metadata": {},
+        }
+
+    @staticmethod
+    def _new_symbol_stats() -> Dict:
+        return {"files": 0, "units": 0, "reused": 0, "analyzed": 0}
+
+    def _analyze_file(self, run: Dict, file_path: str, rel_path: str, snippet: str, content: str,
+                      level: str = "normal"):
+        """🔬 Analisa um arquivo (roteamento, execução e escalada).
+
+        `level` é o degrau de degradação do agendador de prazo: a partir de `lite_model` o
+        modelo completo é trocado pelo lite e não há escalada; `summary_only` (e o último
+        degrau) usam o prompt de resumo. Retorna (markdown, resultado_estruturado, erro_estruturado).
+        """
+        router = run["router"]
+        scheduler = run["scheduler"]
+        decision = router.route(rel_path, content) if router else None
+        max_chars = LEVEL_MAX_CHARS.get(level) or MAX_CHARS
+        cheap = level in ("lite_model", "summary_only", "skip_low_priority")
+        summary_only = level in ("summary_only", "skip_low_priority")
+
+        if decision is not None and decision.tier == "local":
+            logger.info(f"🏠 Curto-circuito local para {rel_path}: {decision.reason}", extra=PER_FILE)
+            markdown, structured = local_file_report(decision)
+            return markdown, structured, None
+
+        model = decision.model if decision is not None else None
+        if cheap and router is not None and decision.tier == "full":
+            model = decision.model = router.lite_model
+            decision.reason += f"; prazo: degradado para {router.lite_model}"
+        if decision is not None:
+            logger.info(f"🧭 {rel_path} → {decision.tier} ({decision.reason})", extra=PER_FILE)
+        if run["symbols"] is not None and level == "normal" and scheduler is None:
+            units = plan_units(rel_path, content)
+            if units is not None:
+                return self._analyze_by_symbols(run, file_path, rel_path, units, model)
+        started = time.monotonic()
+        result = self._run_file_task(
+            lambda: self._build_file_task(rel_path, snippet, max_chars, model, summary_only), file_path
+        )
+        if scheduler is not None:
+            scheduler.observe(level, time.monotonic() - started)
+        # Separa markdown do bloco JSON estruturado (quando houver)
+        markdown, structured, structured_error = extract_structured_result(result)
+
+        escalation = router.escalation_reason(decision, structured) if decision is not None and not cheap else None
+        if escalation:
+            logger.info(f"⬆️ Escalando {rel_path} para {router.full_model}: {escalation}")
+            router.mark_escalated(decision, escalation)
+            started = time.monotonic()
+            result = self._run_file_task(
+                lambda: self._build_file_task(rel_path, snippet, max_chars, router.full_model), file_path
+            )
+            if scheduler is not None:
+                scheduler.observe(level, time.monotonic() - started)
+            markdown, structured, structured_error = extract_structured_result(result)
+        return markdown, structured, structured_error
+
+    def _analyze_by_symbols(self, run: Dict, file_path: str, rel_path: str, units: List[SymbolUnit],
+                            model: Optional[str]):
+        """🧩 Analisa um arquivo grande por unidades de símbolos, reaproveitando as inalteradas do cache.
+
+        Cada unidade vira uma chamada curta com marcadores das linhas originais; o relatório do
+        arquivo é remontado localmente. Não há escalada lite → completo por unidade.
+        """
+        cache = run["result_cache"]
+        compressor = run["compressor"]
+        parts = []
+        reused = failed = 0
+        for unit in units:
+            text = unit.text
+            cache_key = cached = None
+            if cache is not None:
+                cache_key = cache.key(
+                    rel_path, text, symbol_unit=True, relative_lines=True, model=model or os.getenv("MODEL"),
+                    compression=compressor is not None,
+                    strip_comments=compressor.strip_comments if compressor is not None else False,
+                )
+                cached = cache.get(cache_key)
+            if cached is not None:
+                parts.append((unit, cached["markdown"], cached["structured"]))
+                reused += 1
+                continue
+            snippet = truncate_for_prompt(unit_snippet(unit, compressor.compress(rel_path, text).text
+                                                       if compressor is not None else text))
+            # Sem as linhas absolutas no prompt: a resposta em cache não depende da posição da unidade
+            label = f"{rel_path} ({unit.label})"
+            result = self._run_file_task(
+                lambda: self._build_file_task(label, snippet, MAX_CHARS, model), file_path
+            )
+            markdown, structured, _ = extract_structured_result(result)
+            if markdown.lstrip().startswith("❌"):
+                failed += 1
+            elif cache is not None:
+                cache.put(cache_key, markdown, structured)
+            parts.append((unit, markdown, structured))
+
+        with self._stats_lock:
+            stats = run["symbols"]
+            stats["files"] += 1
+            stats["units"] += len(units)
+            stats["reused"] += reused
+            stats["analyzed"] += len(units) - reused
+        logger.info(f"🧩 {rel_path}: {len(units) - reused} de {len(units)} unidades reanalisadas", extra=PER_FILE)
+        markdown, structured = merge_unit_results(rel_path, parts)
+        if failed:
+            # Mantém o relatório remontado fora do cache por arquivo; as unidades boas já estão em cache
+            markdown = f"❌ {failed} unidade(s) de {rel_path} falharam nesta execução.\n\n{markdown}"
+        return markdown, structured, None
+
+    def _prepare_file(self, run: Dict, rel_path: str, content: str, level: str = "normal"):
+        """🗜️ Comprime e trunca o conteúdo para o prompt e consulta o cache de resultados.
+
+        Retorna (trecho, chave_do_cache, resultado_em_cache_ou_None).
+        """
+        prompt_content = content
+        if run["compressor"] is not None:
+            compressed = run["compressor"].compress(rel_path, content)
+            prompt_content = compressed.text
+            if compressed.saved_tokens:
+                logger.info(f"🗜️ {rel_path}: -{compressed.saved_tokens} tokens ({compressed.kind})", extra=PER_FILE)
+        snippet = truncate_for_prompt(prompt_content, LEVEL_MAX_CHARS.get(level) or MAX_CHARS)
+
+        if run["classifier"] is not None:
+            run["classifier"].observe(rel_path, content)
+
+        cache = run["result_cache"]
+        cached = cache_key = None
+        if cache is not None:
+            cache_key = cache.key(
+                rel_path, content, level=level, model=os.getenv("MODEL"), lite_model=os.getenv("MODEL_LITE"),
+                routing=run["router"] is not None, compression=run["compressor"] is not None,
+                strip_comments=run["compressor"].strip_comments if run["compressor"] is not None else False,
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"♻️ {rel_path}: conteúdo inalterado, reaproveitando relatório em cache", extra=PER_FILE)
+        return snippet, cache_key, cached
+
+    def _process_file(self, run: Dict, file_path: str, rel_path: str, content: str,
+                      level: str = "normal") -> Optional[Dict]:
+        """🔎 Analisa um arquivo e salva seu relatório (markdown + JSON estruturado)"""
+        logger.info(f"🔎 Gerando análise para: {file_path}", extra=PER_FILE)
+        snippet, cache_key, cached = self._prepare_file(run, rel_path, content, level)
+        if cached is not None:
+            return self._save_file_report(run, file_path, rel_path, content, snippet,
+                                          cached["markdown"], cached["structured"])
+        result = self._analyze_file(run, file_path, rel_path, snippet, content, level)
+        return self._finish_file(run, file_path, rel_path, content, snippet, cache_key, *result)
+
+    def _finish_file(self, run: Dict, file_path: str, rel_path: str, content: str, snippet: str,
+                     cache_key: Optional[str], markdown: str, structured: Optional[Dict],
+                     structured_error: Optional[str]) -> Optional[Dict]:
+        """🏁 Guarda a análise nova no cache (se não for erro) e salva o relatório do arquivo"""
+        if run["result_cache"] is not None and not markdown.lstrip().startswith("❌"):
+            run["result_cache"].put(cache_key, markdown, structured)
+        if structured_error:
+            logger.warning(f"⚠️ Resultado estruturado inválido para {rel_path}: {structured_error}")
+        return self._save_file_report(run, file_path, rel_path, content, snippet, markdown, structured)
+
+    def _run_concurrent_phase(self, run: Dict, max_files: int, max_size_bytes: int,
+                              limiter: AdaptiveLimiter) -> None:
+        """🎚️ Fase por arquivo com análises em paralelo sob o limite adaptativo (AIMD).
+
+        Varredura, cache e salvamento ficam na thread principal; só `_analyze_file` (as chamadas
+        ao LLM) roda nas threads, com até `limiter.limit` arquivos em voo.
+        """
+        total = sum(1 for _ in iter_files(run["root_dir"], max_files, max_size_bytes, read_content=False))
+        progress = ProgressReporter(total, logger)
+
+        def jobs():
+            for file_path, rel_path, content in iter_files(run["root_dir"], max_files, max_size_bytes):
+                logger.info(f"🔎 Gerando análise para: {file_path}", extra=PER_FILE)
+                snippet, cache_key, cached = self._prepare_file(run, rel_path, content)
+                if cached is not None:
+                    self._save_file_report(run, file_path, rel_path, content, snippet,
+                                           cached["markdown"], cached["structured"])
+                    progress.advance()
                     continue
+                yield file_path, rel_path, content, snippet, cache_key
+
+        def done(job, future) -> None:
+            self._finish_file(run, *job, *future.result())
+            progress.advance()
+
+        run_in_flight(jobs(), lambda job: self._analyze_file(run, job[0], job[1], job[3], job[2]), done, limiter)
+        progress.finish()
+
+    def _save_file_report(self, run: Dict, file_path: str, rel_path: str, content: str, snippet: str,
+                          markdown: str, structured: Optional[Dict]) -> Optional[Dict]:
+        """💾 Salva o relatório do arquivo e o registra no estado da execução (e no índice)"""
+        # Salva relatório por arquivo (sempre tentamos salvar, mesmo que a análise falhe)
+        safe_name = rel_path.replace(os.sep, "_").replace("..", "")
+        if not safe_name:
+            safe_name = os.path.basename(file_path)
+        out_name = f"{safe_name}_{run['timestamp']}.md"
+        out_path = os.path.join(run["reports_dir"], out_name)
+        try:
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(f"# Análise do arquivo: {rel_path}\n\n")
+                f.write(markdown.strip() or "(sem resultado)")
+            entry = {"file": rel_path, "report_path": out_path, "structured_path": None}
+            if structured is not None:
+                structured_path = os.path.join(run["reports_dir"], f"{safe_name}_{run['timestamp']}.json")
+                with open(structured_path, "w", encoding="utf-8") as f:
+                    json.dump(structured, f, indent=2, ensure_ascii=False)
+                entry["structured_path"] = structured_path
+        except Exception as e:
+            logger.error(f"❌ Falha ao salvar relatório para {file_path}: {e}")
+            # mesmo se salvar falhar, continuamos com os próximos arquivos
+            return None
 
+        run["per_file_reports"].append(entry)
+        run["structured_entries"].append({
+            "file": rel_path,
+            "lines": content.count("\n") + 1,
+            "structured": structured,
+        })
+        i = run["inventory"].add_file(run["root_dir"], rel_path, content, flags=FLAG_ANALYZED)
+        if structured is not None:
+            run["inventory"].set_scores(i, structured.get("scores") or {})
+        if run["index"] is not None:
+            run["index"].add_document(f"report:{rel_path}", markdown, "report", rel_path)
+            run["index"].add_document(f"source:{rel_path}", snippet, "source", rel_path)
+        logger.info(f"✅ Relatório salvo: {out_path} ({len(run['per_file_reports'])} arquivos)", extra=PER_FILE)
+        return entry
+
+    def _run_deadline_phase(self, run: Dict, max_files: int, max_size_bytes: int) -> None:
+        """⏱️ Fase por arquivo com prazo: ordem de importância e degradação em degraus"""
+        scheduler = run["scheduler"]
+        # Primeira passada barata: só sinais estáticos (o conteúdo é relido na análise; de um arquivo
+        # compactado não há releitura barata, então o conteúdo fica guardado)
+        keep_content = is_archive(run["root_dir"])
+        candidates = [
+            (compute_signals(rel_path, content)["importance"], file_path, rel_path, content if keep_content else None)
+            for file_path, rel_path, content in iter_files(run["root_dir"], max_files, max_size_bytes)
+        ]
+        candidates = scheduler.ordered(candidates)
+        logger.info(f"⏱️ {len(candidates)} arquivos ordenados por importância")
+
+        progress = ProgressReporter(len(candidates), logger)
+        for i, (importance, file_path, rel_path, content) in enumerate(candidates):
+            progress.update(i)
+            level, skip_reason = scheduler.decide(rel_path, importance, len(candidates) - i)
+            if skip_reason:
+                logger.info(f"⏭️ {rel_path}: {skip_reason}", extra=PER_FILE)
+                continue
+            if level != "normal":
+                logger.info(f"⏱️ {rel_path}: degrau {level} ({scheduler.time_left():.0f}s restantes)", extra=PER_FILE)
+            if content is None:
                 try:
                     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                         content = f.read()
-                except Exception as e:
+                except OSError as e:
                     logger.warning(f"⚠️ Falha ao ler {file_path}: {e}")
                     continue
+            self._process_file(run, file_path, rel_path, content, level)
+        progress.update(len(candidates), force=True)
 
-                # Trunca conteúdo muito grande para colocar no prompt
-                max_chars = 50000
-                snippet = content if len(content) <= max_chars else content[:max_chars] + "\n\n... (truncated)"
+        summary = scheduler.summary()
+        logger.info(f"⏱️ Fase por arquivo encerrada em {summary['elapsed_seconds']}s; "
+                    f"degradados: {summary['degraded_counts']}, pulados: {len(summary['skipped_files'])}")
 
-                logger.info(f"🔎 Gerando análise para: {file_path}")
+    # ------------------------------------------------------------------
+    # Modo em lote (Batch API)
+    # ------------------------------------------------------------------
+    def _analyst_system_prompt(self) -> str:
+        """🧑‍💻 Persona do analista por arquivo para requisições fora da Crew (lote e backend local)"""
+        analyst = self.agents["arquiteto"]
+        return f"Você é {analyst.role}.\n\nObjetivo:\n{analyst.goal}\n\nContexto:\n{analyst.backstory}"
 
-                # Cria task dedicada para o arquivo (usando arquiteto como analista por arquivo)
-                per_file_task = Task(
-                    description=f"""ANÁLISE DO ARQUIVO: {os.path.relpath(file_path, root_dir)}
+    def _pending_request(self, run: Dict, file_path: str, rel_path: str, content: str) -> Optional[Dict]:
+        """📨 Requisição por arquivo fora da Crew, ou None se o arquivo já foi salvo sem LLM.
 
-Leia atentamente o conteúdo do arquivo abaixo e gere um relatório focado em:
-- Função do arquivo no projeto (responsabilidade)
-- Pontos de acoplamento e dependências externas
-- Complexidade e sugestões de refatoração
-- Riscos de segurança ou má práticas
-- Recomendações de testes (unitários/integração)
+        Arquivos em cache e de curto-circuito local são salvos na hora; a requisição leva o
+        prompt em `prompt` e o que a ingestão precisa (caminhos, modelo, chave do cache).
+        """
+        router = run["router"]
+        snippet, cache_key, cached = self._prepare_file(run, rel_path, content)
+        if cached is not None:
+            self._save_file_report(run, file_path, rel_path, content, snippet,
+                                   cached["markdown"], cached["structured"])
+            return None
+        decision = router.route(rel_path, content) if router else None
+        if decision is not None and decision.tier == "local":
+            markdown, structured = local_file_report(decision)
+            self._save_file_report(run, file_path, rel_path, content, snippet, markdown, structured)
+            return None
+        model = (decision.model if decision is not None else None) or os.environ["MODEL"]
+        description, expected_output = self._file_prompt(rel_path, snippet, MAX_CHARS)
+        return {"file_path": file_path, "rel_path": rel_path, "model": model, "cache_key": cache_key,
+                "prompt": f"{description}\n\nSaída esperada:\n{expected_output}"}
 
-Conteúdo do arquivo (até {max_chars} chars):
-```
-{snippet}
-```""",
-                    expected_output="""Relatório por arquivo em markdown com:
-- Resumo (1-3 linhas)
-- Pontos críticos e recomendações
-- Sugestões de testes
-- Linha de ação rápida (quick win)
-""",
-                    agent=self.agents["arquiteto"]
-                )
+    def _ingest_response(self, run: Dict, request: Dict, content: str, text: Optional[str],
+                         error: Optional[str], source: str) -> bool:
+        """📥 Salva a resposta de uma requisição fora da Crew; retorna False se ela falhou"""
+        file_path, rel_path = request["file_path"], request["rel_path"]
+        if error is not None:
+            logger.error(f"❌ Erro ao analisar {file_path} {source}: {error}")
+            markdown, structured = f"❌ Erro ao analisar {file_path}: {error}", None
+        else:
+            markdown, structured, structured_error = extract_structured_result(text)
+            if structured_error:
+                logger.warning(f"⚠️ Resultado estruturado inválido para {rel_path}: {structured_error}")
+            if run["result_cache"] is not None and request.get("cache_key"):
+                run["result_cache"].put(request["cache_key"], markdown, structured)
+        self._save_file_report(run, file_path, rel_path, content, content[:MAX_CHARS], markdown, structured)
+        return error is None
 
-                # Executa uma execução rápida da crew apenas para este arquivo
-                result = None
-                try:
-                    crew_single = Crew(
-                        agents=[self.agents["arquiteto"]],
-                        tasks=[per_file_task],
-                        process=Process.sequential,
-                        verbose=False,
-                        memory=False,
-                    )
-                    result = crew_single.kickoff()
-                except Exception as e:
-                    logger.error(f"❌ Erro ao analisar {file_path}: {e}")
-                    # registramos o erro no resultado para posterior salvamento
-                    result = f"❌ Erro ao analisar {file_path}: {e}"
-
-                # Salva relatório por arquivo (sempre tentamos salvar, mesmo que a análise falhe)
-                safe_name = os.path.relpath(file_path, root_dir).replace(os.sep, "_").replace("..", "")
-                if not safe_name:
-                    safe_name = fname
-                out_name = f"{safe_name}_{execution_timestamp}.md"
-                out_path = os.path.join(reports_dir, out_name)
-                try:
-                    with open(out_path, "w", encoding="utf-8") as f:
-                        f.write(f"# Análise do arquivo: {os.path.relpath(file_path, root_dir)}\n\n")
-                        f.write(str(result) if result is not None else "(sem resultado)")
-                    per_file_reports.append({"file": os.path.relpath(file_path, root_dir), "report_path": out_path})
-                    files_analyzed += 1
-                    logger.info(f"✅ Relatório salvo: {out_path} ({files_analyzed}/{max_files})")
-                except Exception as e:
-                    logger.error(f"❌ Falha ao salvar relatório para {file_path}: {e}")
-                    # mesmo se salvar falhar, continuamos com os próximos arquivos
+    def _run_batch_phase(self, run: Dict, max_files: int, max_size_bytes: int,
+                         job: Optional[BatchJob] = None, poll_seconds: float = 60.0) -> None:
+        """📦 Fase por arquivo em lote: submete os prompts como JSONL, aguarda e ingere os resultados.
+
+        Arquivos em cache e de curto-circuito local são salvos na hora; os demais viram uma
+        requisição do lote. Com `job` (retomada), pula a varredura e a submissão. No modo em lote
+        não há escalada lite → completo (exigiria um segundo lote).
+        """
+        router = run["router"]
+        if job is None:
+            job = BatchJob(self.client, os.path.join(run["reports_dir"], "lote_estado.json"))
+            requests_by_id: Dict[str, Dict] = {}
+            batch_lines: List[Dict] = []
+            system = self._analyst_system_prompt()
+            for file_path, rel_path, content in iter_files(run["root_dir"], max_files, max_size_bytes):
+                request = self._pending_request(run, file_path, rel_path, content)
+                if request is None:
+                    continue
+                custom_id = f"arquivo-{len(batch_lines)}"
+                batch_lines.append(batch_request(custom_id, request["model"], request.pop("prompt"), system))
+                requests_by_id[custom_id] = request
+            job.state = {
+                "root_dir": run["root_dir"],
+                "reports_dir": run["reports_dir"],
+                "timestamp": run["timestamp"],
+                "requests": requests_by_id,
+                # Já salvos (cache e curto-circuito) e estado dos classificadores, para a retomada
+                "per_file_reports": run["per_file_reports"],
+                "structured_entries": run["structured_entries"],
+                "routing": [d.to_dict() for d in router.decisions] if router else [],
+                "classifier": run["classifier"].to_state() if run["classifier"] else None,
+                "compression": run["compressor"].to_state() if run["compressor"] else None,
+            }
+            if batch_lines:
+                input_path = os.path.join(run["reports_dir"], "lote_entrada.jsonl")
+                size = write_batch_input(input_path, batch_lines)
+                logger.info(f"📦 {len(batch_lines)} requisições no lote ({size / 1e6:.1f} MB): {input_path}")
+                # Salvo antes da submissão: se o upload falhar, --batch-resume submete este JSONL
+                job.state["input_path"] = input_path
+                job.save()
+                job.submit(input_path)
+            else:
+                job.save()
+        else:
+            logger.info(f"📦 Retomando lote {job.state.get('batch_id')} a partir de {job.state_path}")
+            job.ensure_submitted()
+            run["per_file_reports"].extend(job.state.get("per_file_reports", []))
+            run["structured_entries"].extend(job.state.get("structured_entries", []))
+            if router is not None:
+                router.decisions.extend(RouteDecision(**d) for d in job.state.get("routing", []))
+            if run["classifier"] is not None and job.state.get("classifier"):
+                run["classifier"].merge_state(job.state["classifier"])
+            if run["compressor"] is not None and job.state.get("compression"):
+                run["compressor"].merge_stats(job.state["compression"])
+            if run["index"] is not None:
+                self._index_reports(run)
+
+        requests_by_id = job.state.get("requests", {})
+        failed = 0
+        if requests_by_id:
+            batch = job.wait(poll_seconds)
+            if batch.get("status") == "failed":
+                raise RuntimeError(f"❌ Lote {job.state['batch_id']} falhou: {batch.get('errors')}")
+            results = job.results()
+            sources = read_sources(run["root_dir"], {r["rel_path"]: r["file_path"] for r in requests_by_id.values()})
+            progress = ProgressReporter(len(requests_by_id), logger)
+            for custom_id, request in requests_by_id.items():
+                text, error = results.get(custom_id, (None, f"sem resultado no lote ({batch.get('status')})"))
+                content = sources.get(request["rel_path"], "")
+                if not self._ingest_response(run, request, content, text, error, "no lote"):
+                    failed += 1
+                progress.advance()
+            progress.finish()
+
+        run["extra_metadata"]["batch"] = {**job.summary(), "failed_requests": failed}
+        logger.info(f"📦 Lote ingerido: {len(requests_by_id) - failed} resultados, {failed} falhas")
+
+    def _run_local_phase(self, run: Dict, max_files: int, max_size_bytes: int,
+                         limiter: Optional[AdaptiveLimiter] = None) -> None:
+        """🖥️ Fase por arquivo no backend local, mantendo o continuous batching do servidor cheio.
+
+        Servidores locais (vLLM, llama.cpp, TGI) juntam as requisições abertas num lote a cada
+        passo de decodificação: a fase mantém até `max_connections` requisições do cliente local
+        em voo (ou `limiter.limit`, com o limite adaptativo) enquanto a varredura segue, e ingere
+        cada resposta assim que ela chega. Como no modo em lote, não há escalada lite → completo
+        nem análise por símbolo.
+        """
+        client = get_client("local")
+        window = client.max_connections
+        system = self._analyst_system_prompt()
+        total = sum(1 for _ in iter_files(run["root_dir"], max_files, max_size_bytes, read_content=False))
+        progress = ProgressReporter(total, logger)
+        sent = failed = 0
+        started = time.monotonic()
+
+        def jobs():
+            nonlocal sent
+            for file_path, rel_path, content in iter_files(run["root_dir"], max_files, max_size_bytes):
+                request = self._pending_request(run, file_path, rel_path, content)
+                if request is None:
+                    progress.advance()
                     continue
+                sent += 1
+                yield request, content
+
+        def done(job, future) -> None:
+            nonlocal failed
+            request, content = job
+            error = future.exception()
+            if not self._ingest_response(run, request, content, None if error else future.result(),
+                                         str(error) if error else None, "no backend local"):
+                failed += 1
+            progress.advance()
+
+        logger.info(f"🖥️ Backend local: {client.base_url} (até "
+                    f"{limiter.max_limit if limiter is not None else window} requisições em voo)")
+        run_in_flight(jobs(), lambda job: client.generate(job[0].pop("prompt"), job[0]["model"], "file", system=system),
+                      done, limiter, 2 * window)
+        progress.finish()
+
+        elapsed = time.monotonic() - started
+        run["extra_metadata"]["local_backend"] = {
+            "base_url": client.base_url,
+            "model": client.model_override,
+            "max_in_flight": limiter.max_limit if limiter is not None else window,
+            "requests": sent,
+            "failed_requests": failed,
+            "seconds": round(elapsed, 2),
+            "requests_per_second": round(sent / elapsed, 2) if elapsed > 0 else None,
+        }
+        logger.info(f"🖥️ Backend local: {sent - failed} respostas, {failed} falhas em {elapsed:.1f}s")
+
+    # ------------------------------------------------------------------
+    # Modo coordenador/worker (shards numa fila SQLite)
+    # ------------------------------------------------------------------
+    def _run_distributed_phase(self, run: Dict, queue_path: Optional[str], workers: int,
+                               shard_size: int, max_files: int, max_size_bytes: int,
+                               poll_seconds: float = 2.0) -> None:
+        """🛰️ Coordenador: fatia a lista de arquivos em shards, aguarda os workers e junta os resultados.
+
+        Com `workers > 0`, sobe essa quantidade de workers locais (processos); workers em outros
+        hosts podem se juntar apontando para a mesma fila (`--worker --queue <db>`).
+        """
+        queue_path = queue_path or os.path.join(os.getcwd(), f"fila_analise_{run['timestamp']}.db")
+        queue = ShardQueue(queue_path)
+        run_id = run["timestamp"]
+
+        # Coordenador só varre e filtra; o conteúdo é lido pelos workers. Os shards são faixas de
+        # índices do inventário salvo ao lado da fila, que os workers abrem com mmap
+        inventory = FileInventory()
+        for _, rel, _ in iter_files(run["root_dir"], max_files, max_size_bytes, read_content=False):
+            inventory.add_file(run["root_dir"], rel)
+        inventory_dir = inventory.save(f"{os.path.splitext(queue_path)[0]}_inventario")
+        step = max(1, shard_size)
+        shards = [{"range": [i, min(i + step, len(inventory))]} for i in range(0, len(inventory), step)]
+        queue.enqueue_run(run_id, {
+            "root_dir": os.path.abspath(run["root_dir"]),
+            "reports_dir": run["reports_dir"],
+            "timestamp": run["timestamp"],
+            "model_routing": run["router"] is not None,
+            "escalate": run["router"].escalate if run["router"] is not None else True,
+            "specialist_gating": run["classifier"] is not None,
+            "prompt_compression": run["compressor"] is not None,
+            "incremental": run["result_cache"] is not None,
+            "symbol_level": run["symbols"] is not None,
+            "strip_comments": run["compressor"].strip_comments if run["compressor"] is not None else False,
+            "inventory": os.path.abspath(inventory_dir),
+            "call_timeouts": self.call_timeouts,
+        }, shards)
+        logger.info(f"🛰️ {len(inventory)} arquivos em {len(shards)} shards na fila {queue_path}")
+
+        procs: List[subprocess.Popen] = []
+
+        def spawn(i: int) -> subprocess.Popen:
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--queue", queue_path,
+                   "--worker-id", f"{socket.gethostname()}-local-{i}", "--log-mode", current_log_mode()]
+            if not self.agent_verbose:
+                cmd.append("--quiet-agents")
+            cmd += ["--backends", ",".join(f"{stage}={backend}" for stage, backend in self.backends.items())]
+            return subprocess.Popen(cmd)
+
+        procs = [spawn(i) for i in range(workers)]
+        reclaimed = 0
+        reporter = ProgressReporter(len(shards), logger, unit="shards")
+        try:
+            while True:
+                reclaimed += queue.reclaim_expired(run_id)
+                progress = queue.progress(run_id)
+                remaining = progress.get("pending", 0) + progress.get("leased", 0)
+                reporter.update(progress.get("done", 0) + progress.get("failed", 0))
+                if remaining == 0:
+                    break
+                scheduler = run["scheduler"]
+                if scheduler is not None and scheduler.budget_for_files() <= 0:
+                    logger.warning(f"⏱️ Prazo: {remaining} shard(s) sem concluir; consolidando resultados parciais")
+                    scheduler.skipped.append({"shards_pending": remaining,
+                                              "reason": "prazo: tempo restante reservado para a consolidação"})
+                    break
+                # Reinicia workers locais que morreram enquanto ainda há trabalho
+                for i, p in enumerate(procs):
+                    if p.poll() is not None:
+                        logger.warning(f"⚠️ Worker local {i} saiu (código {p.returncode}); reiniciando")
+                        procs[i] = spawn(i)
+                time.sleep(poll_seconds)
+        finally:
+            for p in procs:
+                if p.poll() is None:
+                    p.terminate()
+
+        reporter.finish()
+        failed = queue.failed_shards(run_id)
+        for shard_result in queue.results(run_id):
+            run["per_file_reports"].extend(shard_result["per_file_reports"])
+            run["structured_entries"].extend(shard_result["structured_entries"])
+            if run["router"] is not None:
+                run["router"].decisions.extend(RouteDecision(**d) for d in shard_result.get("routing", []))
+            if run["classifier"] is not None and shard_result.get("classifier"):
+                run["classifier"].merge_state(shard_result["classifier"])
+            if run["compressor"] is not None and shard_result.get("compression"):
+                run["compressor"].merge_stats(shard_result["compression"])
+            if run["symbols"] is not None and shard_result.get("symbols"):
+                for key, value in shard_result["symbols"].items():
+                    run["symbols"][key] += value
+        for entry in run["structured_entries"]:
+            i = inventory.find(entry["file"])
+            if i is not None:
+                inventory.set_flags(i, FLAG_ANALYZED)
+                if entry.get("structured"):
+                    inventory.set_scores(i, entry["structured"].get("scores") or {})
+        run["inventory"] = inventory
+        if run["index"] is not None:
+            self._index_reports(run)
+
+        run["extra_metadata"]["distributed"] = {
+            "queue": queue_path,
+            "shards": len(shards),
+            "local_workers": workers,
+            "reclaimed_leases": reclaimed,
+            "failed_shards": failed,
+        }
+        if failed:
+            logger.warning(f"⚠️ {len(failed)} shard(s) falharam definitivamente; consolidando resultados parciais")
 
-            if files_analyzed >= max_files:
-                break
+    @staticmethod
+    def _save_inventory(run: Dict) -> Optional[Dict]:
+        """🗂️ Salva o inventário colunar da execução (scores, tamanhos, hashes) ao lado dos relatórios"""
+        inventory = run["inventory"]
+        if not len(inventory):
+            return None
+        out_dir = inventory.save(os.path.join(run["reports_dir"], f"inventario_{run['timestamp']}"))
+        return {**inventory.summary(), "path": out_dir}
+
+    def _index_reports(self, run: Dict) -> None:
+        """🔎 Indexa relatórios e fontes já salvos (usado após a fase distribuída e na retomada do lote)"""
+        sources = read_sources(run["root_dir"], {r["file"]: os.path.join(run["root_dir"], r["file"])
+                                                 for r in run["per_file_reports"]})
+        for r in run["per_file_reports"]:
+            try:
+                with open(r["report_path"], "r", encoding="utf-8", errors="ignore") as f:
+                    run["index"].add_document(f"report:{r['file']}", f.read(), "report", r["file"])
+            except OSError as e:
+                logger.warning(f"⚠️ Não foi possível indexar {r['file']}: {e}")
+                continue
+            if r["file"] in sources:
+                run["index"].add_document(f"source:{r['file']}", sources[r["file"]][:MAX_CHARS], "source", r["file"])
+
+    def run_worker(self, queue_path: str, worker_id: Optional[str] = None,
+                   idle_exit_seconds: float = 30.0, poll_seconds: float = 2.0) -> int:
+        """👷 Worker: retira shards da fila, analisa os arquivos e devolve os resultados.
+
+        Renova o lease numa thread de fundo (`LeaseKeeper`), também durante chamadas longas ao LLM;
+        se o lease foi recuperado por expiração, abandona o shard.
+        Sai após `idle_exit_seconds` sem encontrar trabalho. Retorna o número de shards concluídos.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        queue = ShardQueue(queue_path)
+        done = 0
+        idle_since = time.monotonic()
+        inventories: Dict[str, FileInventory] = {}
+        logger.info(f"👷 Worker {worker_id} conectado à fila {queue_path}")
+
+        while True:
+            claimed = queue.claim(worker_id)
+            if claimed is None:
+                if time.monotonic() - idle_since > idle_exit_seconds:
+                    logger.info(f"👷 Worker {worker_id} ocioso; encerrando ({done} shards concluídos)")
+                    return done
+                time.sleep(poll_seconds)
+                continue
+            idle_since = time.monotonic()
+            shard_id, config, files = claimed
+            # Timeouts do coordenador; os passados ao próprio worker (`--call-timeouts`) prevalecem
+            self.calls.set_timeouts({**config.get("call_timeouts", {}), **self.call_timeouts})
+            if isinstance(files, dict):
+                # Faixa do inventário mmap: as páginas são compartilhadas entre os workers do host
+                if config["inventory"] not in inventories:
+                    inventories[config["inventory"]] = FileInventory.load(config["inventory"], mmap=True)
+                files = list(inventories[config["inventory"]].paths(*files["range"]))
+
+            run = self._new_run_state(config["root_dir"], config["reports_dir"], config["timestamp"],
+                                      config.get("model_routing", True), config.get("escalate", True))
+            run["classifier"] = SpecialistClassifier() if config.get("specialist_gating", True) else None
+            if config.get("prompt_compression", True):
+                run["compressor"] = PromptCompressor(strip_comments=config.get("strip_comments", False))
+            if config.get("incremental", True):
+                run["result_cache"] = FileResultCache(cache_dir_for(cache_root_for(config["root_dir"]), "resultados"))
+                if config.get("symbol_level", True):
+                    run["symbols"] = self._new_symbol_stats()
+            try:
+                with LeaseKeeper(queue, shard_id, worker_id) as lease:
+                    for rel_path in files:
+                        if lease.lost.is_set():
+                            break
+                        file_path = os.path.join(config["root_dir"], rel_path)
+                        try:
+                            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                                content = f.read()
+                        except OSError as e:
+                            logger.warning(f"⚠️ Falha ao ler {file_path}: {e}")
+                            continue
+                        self._process_file(run, file_path, rel_path, content)
+                if lease.lost.is_set() or not queue.heartbeat(shard_id, worker_id):
+                    logger.warning(f"⚠️ Lease do shard {shard_id} perdido; abandonando")
+                    continue
+                queue.complete(shard_id, worker_id, {
+                    "per_file_reports": run["per_file_reports"],
+                    "structured_entries": run["structured_entries"],
+                    "routing": [d.to_dict() for d in run["router"].decisions] if run["router"] else [],
+                    "classifier": run["classifier"].to_state() if run["classifier"] else None,
+                    "compression": run["compressor"].to_state() if run["compressor"] else None,
+                    "symbols": run["symbols"],
+                })
+                done += 1
+            except Exception as e:
+                logger.error(f"❌ Falha no shard {shard_id}: {e}")
+                queue.fail(shard_id, worker_id, str(e))
+
+    # ------------------------------------------------------------------
+    # Consolidação
+    # ------------------------------------------------------------------
+    def _consolidate(self, run: Dict, evidence_top_k: int, evidence_token_budget: int) -> str:
+        """📑 Consolida os relatórios por arquivo (Crew) com fallback local"""
+        per_file_reports = run["per_file_reports"]
+        execution_timestamp = run["timestamp"]
+        reports_dir = run["reports_dir"]
+        router = run["router"]
+        index = run["index"]
+        classifier = run["classifier"]
 
         if not per_file_reports:
             logger.error("❌ Nenhum arquivo foi analisado. Verifique permissões, filtros e paths.")
@@ -602,42 +1670,133 @@ Conteúdo do arquivo (até {max_chars} chars):
 
         # Cria task final de consolidação incluindo lista de relatórios por arquivo
         final_task = self.create_final_report_task()
-        # Anexa sumário dos relatórios por arquivo na descrição para fornecer contexto
-        reports_summary_lines = [f"- {r['file']}: {r['report_path']}" for r in per_file_reports]
-        reports_summary = "\n".join(reports_summary_lines)
-        final_task.description += f"\n\n\n\n**Relatórios por arquivo (resumo):**\n{reports_summary}\n"
+        incremental = None
+        if run["result_cache"] is not None:
+            # Árvore de resumos por diretório: só os ramos alterados são resumidos de novo
+            digests = {}
+            for r, entry in zip(per_file_reports, run["structured_entries"]):
+                try:
+                    with open(r["report_path"], "r", encoding="utf-8", errors="ignore") as f:
+                        report_markdown = f.read()
+                except OSError:
+                    report_markdown = ""
+                digests[r["file"]] = file_digest(r["file"], report_markdown, entry["structured"])
+            tree = SummaryTree(cache_dir_for(cache_root_for(run["root_dir"]), "resumos"), self._summarize_directory)
+            tree_result = tree.build(digests)
+            incremental = {**tree.summary(), "root_hash": tree_result["root_hash"],
+                           "file_cache": run["result_cache"].summary()}
+            logger.info(f"🌳 Resumos por diretório: {incremental['reused']} reaproveitados, "
+                        f"{incremental['summarized_llm']} resumidos com LLM")
+            final_task.description += (
+                "\n\n\n\n**Resumo hierárquico por diretório (arquivos e subdiretórios):**\n"
+                f"{tree_result['root_input']}\n"
+            )
+        else:
+            # Anexa sumário dos relatórios por arquivo na descrição para fornecer contexto
+            reports_summary_lines = [f"- {r['file']}: {r['report_path']}" for r in per_file_reports]
+            reports_summary = "\n".join(reports_summary_lines)
+            final_task.description += f"\n\n\n\n**Relatórios por arquivo (resumo):**\n{reports_summary}\n"
+
+        # Pré-classificação: quais especialistas são relevantes e quais arquivos cada um vê
+        specialists = classifier.decide() if classifier is not None else None
+        active_roles = self._active_roles(specialists)
+        skipped_markdown = render_skipped_markdown(specialists) if specialists else ""
+        if skipped_markdown:
+            for d in specialists.values():
+                if not d.relevant:
+                    logger.info(f"🚦 Especialista pulado: {d.role} ({d.reason})")
+            final_task.description += (
+                "\n\nOs especialistas abaixo não foram executados por não serem relevantes para esta "
+                f"codebase; não invente análises para eles:\n{skipped_markdown}"
+            )
+
+        # Evidências por especialista recuperadas do índice local (só o relevante de cada papel)
+        evidence_counts = None
+        if index is not None:
+            # Arquivos apagados ou renomeados saem do índice; os só não visitados nesta execução ficam
+            if is_archive(run["root_dir"]):
+                removed = index.prune_missing(archive_members(run["root_dir"]).__contains__)
+            else:
+                removed = index.prune_missing(lambda rel: os.path.exists(os.path.join(run["root_dir"], rel)))
+            if removed:
+                logger.info(f"🧹 {removed} documentos de arquivos que não existem mais removidos do índice")
+            index.save()
+            evidence_counts = {}
+            for role in active_roles:
+                role_files = set(specialists[role].files) if specialists and specialists[role].files else None
+                chunks = index.evidence_for_role(role, top_k=evidence_top_k,
+                                                 token_budget=evidence_token_budget, sources=role_files)
+                final_task.description += (
+                    f"\n\n**Evidências para {role} (top-{evidence_top_k}, índice local):**\n"
+                    f"{format_evidence(chunks)}\n"
+                )
+                evidence_counts[role] = len(chunks)
+
+        # Agregação local (sem LLM) dos resultados estruturados: alimenta a consolidação e o fallback
+        aggregate = aggregate_results(run["structured_entries"])
+        aggregate_markdown = render_aggregate_markdown(aggregate)
+        logger.info(f"📊 Agregação local: {aggregate['files_with_structured']}/{aggregate['files_total']} "
+                    f"arquivos com resultado estruturado")
+        final_task.description += (
+            "\n\n**Métricas agregadas localmente (use como base para scores, hotspots e riscos):**\n"
+            f"{aggregate_markdown}\n"
+        )
+
+        metadata = {
+            "timestamp": execution_timestamp,
+            "root_dir": run["root_dir"],
+            "per_file_reports": per_file_reports,
+            "output_file": None,
+            "agents_used": active_roles,
+            "specialists": self._specialists_metadata(specialists),
+            "total_files_analyzed": len(per_file_reports),
+            "llm_model": "gemini-2.5-flash",
+            "reports_directory": reports_dir,
+            "aggregate": aggregate,
+            "routing": router.summary() if router else None,
+            "retrieval_evidence": evidence_counts,
+            "prompt_compression": run["compressor"].summary() if run["compressor"] else None,
+            "incremental_consolidation": incremental,
+            "symbol_level": run["symbols"],
+            "inventory": self._save_inventory(run),
+            **run["extra_metadata"],
+        }
+        metadata_file = f"metadata_analise_{execution_timestamp}.json"
+        scheduler = run["scheduler"]
 
         # Executa a consolidação final usando toda a crew
         try:
+            if scheduler is not None:
+                metadata["deadline"] = scheduler.summary()
+                if not scheduler.can_consolidate():
+                    # Sem tempo para a consolidação com LLM: cai direto no fallback local
+                    raise TimeoutError(f"prazo: {scheduler.time_left():.0f}s restantes, "
+                                       "consolidação feita localmente")
             logger.info("🔄 Executando consolidação final com todos os agentes...")
-            crew_all = Crew(
-                agents=list(self.agents.values()),
-                tasks=[final_task],
-                process=Process.sequential,
-                verbose=True,
-                # disable memory to avoid requiring Chroma or other external
-                # vectorstore env vars during light-weight consolidation runs
-                memory=False,
-            )
-            final_result = crew_all.kickoff()
+
+            def kickoff():
+                # Crew, Task e Agents novos a cada tentativa (veja `_single_task_kickoff`); memória
+                # desligada para não exigir Chroma ou outras variáveis de vector store
+                agents = {role: self._copy_agent(self.agents[role]) for role in active_roles}
+                task = Task(description=final_task.description, expected_output=final_task.expected_output,
+                            agent=agents.setdefault("arquiteto", self._copy_agent(final_task.agent)))
+                return Crew(agents=list(agents.values()), tasks=[task], process=Process.sequential,
+                            verbose=self.agent_verbose, memory=False).kickoff()
+
+            final_result = self.calls.call("consolidation", kickoff)
 
             # Salva resultado final consolidado
             output_file = f"relatorio_final_startup_{execution_timestamp}.md"
             with open(output_file, "w", encoding="utf-8") as f:
                 f.write(str(final_result))
+                if skipped_markdown:
+                    f.write("\n\n" + skipped_markdown)
 
             # Salva metadados
-            metadata = {
-                "timestamp": execution_timestamp,
-                "root_dir": root_dir,
-                "per_file_reports": per_file_reports,
-                "output_file": output_file,
-                "agents_used": list(self.agents.keys()),
-                "total_files_analyzed": len(per_file_reports),
-                "llm_model": "gemini-2.5-flash",
-                "reports_directory": reports_dir,
-            }
-            metadata_file = f"metadata_analise_{execution_timestamp}.json"
+            metadata["output_file"] = output_file
+            metadata["llm_calls"] = self.calls.summary()
+            metadata["llm_usage"] = self.client.usage_summary()
+            metadata["llm_backends"] = self._backends_metadata()
             with open(metadata_file, "w", encoding="utf-8") as f:
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
 
@@ -649,14 +1808,18 @@ Conteúdo do arquivo (até {max_chars} chars):
             return output_file
         except Exception as e:
             # Se a consolidação com a Crew falhar (por exemplo, validação de env vars
-            # de memória vetorial), geramos um fallback: concatenamos todos os
-            # relatórios por arquivo salvos e produzimos um relatório final simples.
+            # de memória vetorial), geramos um fallback: métricas agregadas localmente
+            # mais a concatenação dos relatórios por arquivo salvos.
             logger.error(f"❌ Erro durante consolidação com Crew (usando fallback): {e}")
             try:
                 fallback_output = f"relatorio_final_fallback_{execution_timestamp}.md"
                 with open(fallback_output, "w", encoding="utf-8") as out_f:
                     out_f.write("# Relatório Consolidado (fallback)\n\n")
-                    out_f.write("_A consolidação automática com a Crew falhou; este é um fallback que concatena os relatórios por arquivo gerados previamente._\n\n")
+                    out_f.write("_A consolidação automática com a Crew falhou; este é um fallback com as métricas agregadas localmente e os relatórios por arquivo gerados previamente._\n\n")
+                    out_f.write(aggregate_markdown)
+                    out_f.write("\n")
+                    if skipped_markdown:
+                        out_f.write(skipped_markdown + "\n")
 
                     for r in per_file_reports:
                         try:
@@ -667,19 +1830,9 @@ Conteúdo do arquivo (até {max_chars} chars):
                         except Exception as inner_e:
                             out_f.write(f"\n(Erro ao incluir {r['file']}: {inner_e})\n")
 
-                metadata = {
-                    "timestamp": execution_timestamp,
-                    "root_dir": root_dir,
-                    "per_file_reports": per_file_reports,
-                    "output_file": fallback_output,
-                    "agents_used": list(self.agents.keys()),
-                    "total_files_analyzed": len(per_file_reports),
-                    "llm_model": "gemini-2.5-flash",
-                    "reports_directory": reports_dir,
-                    "fallback": True,
-                    "error": str(e),
-                }
-                metadata_file = f"metadata_analise_{execution_timestamp}.json"
+                metadata.update({"output_file": fallback_output, "fallback": True, "error": str(e),
+                                 "llm_calls": self.calls.summary(), "llm_usage": self.client.usage_summary(),
+                                 "llm_backends": self._backends_metadata()})
                 with open(metadata_file, "w", encoding="utf-8") as f:
                     json.dump(metadata, f, indent=2, ensure_ascii=False)
 
@@ -697,18 +1850,193 @@ Conteúdo do arquivo (até {max_chars} chars):
 
 def main():
     """🎯 Função principal para execução direta"""
-    
+    parser = argparse.ArgumentParser(
+        description="🚀 CrewAI - Análise Completa de Codebase",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  # Relatório base (relatorio_codebase_turbinado.md) ou pasta atual
+  python crew_avaliacao_completa.py
+
+  # Pasta específica com limite de arquivos
+  python crew_avaliacao_completa.py --path ./meu-projeto --max-files 10
+
+  # Fluxo padrão com especialistas em paralelo
+  python crew_avaliacao_completa.py --parallel-specialists
+
+  # Coordenador com 4 workers locais; outros hosts podem se juntar à mesma fila
+  python crew_avaliacao_completa.py --path ./monorepo --max-files 100000 --workers 4 --queue /shared/fila.db
+  python crew_avaliacao_completa.py --worker --queue /shared/fila.db
+
+  # Execução de alto volume: logging assíncrono, amostrado e com linha de progresso
+  python crew_avaliacao_completa.py --path ./monorepo --max-files 5000 --log-mode throughput
+
+  # Gate de PR com orçamento de tempo: degrada a análise para terminar em 20 minutos
+  python crew_avaliacao_completa.py --path . --max-files 500 --deadline 20m
+
+  # Varredura noturna pela Batch API (retome com --batch-resume se o processo cair)
+  python crew_avaliacao_completa.py --path ./monorepo --max-files 5000 --batch-submit --batch-poll 300
+  python crew_avaliacao_completa.py --batch-resume reports_by_file_20250101_020000/lote_estado.json
+
+  # Release ou tarball do GitHub analisado direto do arquivo compactado (sem extrair)
+  python crew_avaliacao_completa.py --path ./projeto-1.4.0.tar.gz --max-files 200
+
+  # Relatório base gerado localmente (sem LLM) e fluxo dos seis especialistas sobre ele
+  python crew_avaliacao_completa.py --path ./meu-projeto --digest --parallel-specialists
+
+  # Estimativa de tokens, chamadas, tempo e custo antes de executar
+  python crew_avaliacao_completa.py --path ./monorepo --max-files 5000 --plan --concurrency 8 --rpm 1000
+        """
+    )
+    parser.add_argument("--path", default="relatorio_codebase_turbinado.md",
+                        help="Relatório base (arquivo), pasta da codebase ou arquivo compactado "
+                             "(.tar.gz, .tar.zst, .zip; lido sem extrair)")
+    # Use max_files=3 for quick testing with a valid API key
+    parser.add_argument("--max-files", type=int, default=3, help="Máximo de arquivos a analisar")
+    parser.add_argument("--max-size", type=int, default=2 * 1024 * 1024, help="Tamanho máximo por arquivo (bytes)")
+    parser.add_argument("--parallel-specialists", action="store_true",
+                        help="Executa os especialistas do fluxo padrão em paralelo")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Modo coordenador: fatia os arquivos em shards e sobe N workers locais "
+                             "(0 = só workers externos)")
+    parser.add_argument("--queue", default=None, help="Arquivo SQLite da fila de shards")
+    parser.add_argument("--shard-size", type=int, default=25, help="Arquivos por shard no modo coordenador")
+    parser.add_argument("--worker", action="store_true", help="Executa como worker da fila informada em --queue")
+    parser.add_argument("--worker-id", default=None, help="Identificador do worker (padrão: host-pid)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Só estima tokens, chamadas, tempo e custo (sem chamadas de rede)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Chamadas simultâneas assumidas pelo --plan (padrão: --workers ou 1)")
+    parser.add_argument("--rpm", type=float, default=None, help="Rate limit (requisições/min) assumido pelo --plan")
+    parser.add_argument("--prices", default=None, help="JSON com preços por modelo (USD por 1M tokens) para o --plan")
+    parser.add_argument("--deadline", default=None,
+                        help="Prazo total da execução (ex.: 20m, 1h30m); degrada a análise para cumpri-lo")
+    parser.add_argument("--deadline-reserve", default=None,
+                        help="Tempo reservado para a consolidação dentro do prazo (padrão: automático)")
+    parser.add_argument("--no-compression", action="store_true",
+                        help="Envia o conteúdo dos arquivos sem a compressão por tipo de arquivo")
+    parser.add_argument("--strip-comments", action="store_true",
+                        help="Remove comentários de linha inteira na compressão do prompt")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default="normal",
+                        help="throughput: logging assíncrono, mensagens por arquivo amostradas e agentes silenciosos")
+    parser.add_argument("--log-sample", type=int, default=50,
+                        help="No modo throughput, registra 1 a cada N mensagens por arquivo")
+    parser.add_argument("--quiet-agents", action="store_true", help="Desliga a saída detalhada dos agentes")
+    parser.add_argument("--profile", action="store_true",
+                        help="Gera cProfile, flamegraph (folded), tracemalloc e tempo LLM vs CPU por etapa")
+    parser.add_argument("--no-symbols", action="store_true",
+                        help="Analisa arquivos grandes inteiros, sem o cache por unidade de símbolos")
+    parser.add_argument("--no-incremental", action="store_true",
+                        help="Ignora os caches de relatórios por arquivo e de resumos por diretório")
+    parser.add_argument("--digest", action="store_true",
+                        help="Gera relatorio_codebase_turbinado.md localmente (sem LLM) a partir da pasta em --path "
+                             "e executa o fluxo padrão dos especialistas sobre ele")
+    parser.add_argument("--digest-tokens", type=int, default=DIGEST_MAX_TOKENS,
+                        help="Orçamento de tokens do relatório gerado por --digest")
+    parser.add_argument("--batch-submit", action="store_true",
+                        help="Submete os prompts por arquivo como um job na Batch API e aguarda o resultado")
+    parser.add_argument("--batch-resume", default=None, metavar="ESTADO",
+                        help="Retoma o polling de um lote já submetido (lote_estado.json da execução)")
+    parser.add_argument("--batch-poll", type=float, default=60.0, help="Intervalo (s) entre consultas ao lote")
+    parser.add_argument("--call-timeouts", default=None,
+                        help="Timeout (s) por tipo de chamada ao LLM, ex.: file=120,specialist=600,consolidation=900")
+    parser.add_argument("--backends", default=None,
+                        help="Backend por etapa (file, directory_summary, consolidation), ex.: "
+                             "file=local,consolidation=remote; o local usa LLM_LOCAL_BASE_URL e LLM_LOCAL_MODEL")
+    parser.add_argument("--adaptive-concurrency", type=int, nargs="?", const=DEFAULT_MAX_LIMIT, default=None,
+                        metavar="MAX",
+                        help="Analisa vários arquivos em paralelo com limite ajustado pela latência e pelos 429 "
+                             f"(AIMD, até MAX em voo; padrão {DEFAULT_MAX_LIMIT})")
+    args = parser.parse_args()
+
+    try:
+        deadline_seconds = parse_duration(args.deadline) if args.deadline else None
+        deadline_reserve = parse_duration(args.deadline_reserve) if args.deadline_reserve else None
+        call_timeouts = parse_timeouts(args.call_timeouts) if args.call_timeouts else None
+        backends = parse_backends(args.backends) if args.backends else None
+    except ValueError as e:
+        parser.error(str(e))
+    if (args.batch_submit or args.batch_resume) and (backends or {}).get("file") == "local":
+        parser.error("--batch-submit/--batch-resume usam a Batch API remota; não combinam com file=local")
+    if (args.batch_submit or args.batch_resume) and (args.workers is not None or args.deadline):
+        parser.error("--batch-submit/--batch-resume não combinam com --workers nem --deadline")
+    if args.adaptive_concurrency is not None and (args.workers is not None or args.deadline
+                                                  or args.batch_submit or args.batch_resume):
+        parser.error("--adaptive-concurrency não combina com --workers, --deadline nem --batch-submit/--batch-resume")
+    if args.adaptive_concurrency is not None and args.adaptive_concurrency < 1:
+        parser.error("--adaptive-concurrency precisa ser ao menos 1")
+    setup_logging(args.log_mode, sample_every=args.log_sample)
+    agent_verbose = not (args.quiet_agents or args.log_mode == "throughput")
+
+    if args.plan:
+        plan = plan_analysis(
+            args.path,
+            max_files=args.max_files,
+            max_size_bytes=args.max_size,
+            concurrency=args.concurrency or args.workers or (6 if args.parallel_specialists else 1),
+            parallel_specialists=args.parallel_specialists,
+            prompt_compression=not args.no_compression,
+            strip_comments=args.strip_comments,
+            incremental=not args.no_incremental,
+            symbol_level=not args.no_symbols,
+            rpm=args.rpm,
+            prices_path=args.prices,
+        )
+        print(render_plan(plan))
+        plan_file = f"plano_analise_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(plan_file, "w", encoding="utf-8") as f:
+            json.dump(plan, f, indent=2, ensure_ascii=False)
+        print(f"\n📊 Plano salvo em: {plan_file}")
+        return 0
+
+    if args.worker:
+        if not args.queue:
+            parser.error("--worker exige --queue")
+        try:
+            CodebaseAnalysisCrew(call_timeouts=call_timeouts, agent_verbose=agent_verbose, backends=backends).run_worker(
+                args.queue, args.worker_id
+            )
+        except Exception as e:
+            print(f"❌ Erro no worker: {str(e)}")
+            return 1
+        return 0
+
     print("🚀 CrewAI - Análise Completa de Codebase")
     print("=" * 50)
+
+    if args.digest:
+        if not os.path.isdir(args.path):
+            parser.error("--digest exige --path apontando para uma pasta")
+        _, stats = generate_report(args.path, DIGEST_OUTPUT, args.digest_tokens)
+        print(f"🧾 Relatório base gerado: {DIGEST_OUTPUT} ({stats['files']} arquivos em {stats['total_seconds']}s, "
+              f"~{stats['tokens']} tokens)")
+        args.path = DIGEST_OUTPUT
     
     try:
         # Inicializa a crew
-        crew_analyzer = CodebaseAnalysisCrew()
+        crew_analyzer = CodebaseAnalysisCrew(call_timeouts=call_timeouts, agent_verbose=agent_verbose, backends=backends)
 
         # Executa análise (se o relatório não existir, run_analysis fará a varredura da codebase)
-        report_path = "relatorio_codebase_turbinado.md"
-        # Use max_files=3 for quick testing with a valid API key
-        output_file = crew_analyzer.run_analysis(report_path, max_files=3)
+        output_file = crew_analyzer.run_analysis(
+            args.path,
+            max_files=args.max_files,
+            max_size_bytes=args.max_size,
+            parallel_specialists=args.parallel_specialists,
+            workers=args.workers,
+            queue_path=args.queue,
+            shard_size=args.shard_size,
+            deadline_seconds=deadline_seconds,
+            deadline_reserve_seconds=deadline_reserve,
+            prompt_compression=not args.no_compression,
+            strip_comments=args.strip_comments,
+            profiler=Profiler() if args.profile else None,
+            incremental=not args.no_incremental,
+            symbol_level=not args.no_symbols,
+            batch_submit=args.batch_submit,
+            batch_resume_path=args.batch_resume,
+            batch_poll_seconds=args.batch_poll,
+            adaptive_concurrency=args.adaptive_concurrency,
+        )
 
         print("\n🎉 Análise concluída com sucesso!")
         print(f"📄 Relatório final: {output_file}")
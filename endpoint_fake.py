@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+🧪 Endpoint Fake OpenAI-compatível
+=================================
+
+Servidor local que imita ``/chat/completions`` para rodar a ferramenta sem
+gastar cota: latência configurável (com jitter e cauda lenta), taxa de falhas
+e campo ``usage`` aproximado. As respostas seguem o formato pedido pelos
+prompts por arquivo (markdown + bloco ``json`` estruturado), ou uma seção por
+delimitador ``=== SEÇÃO: <chave> ===`` nos prompts combinados. Também atende a
+Batch API (``/files``, ``/batches``) usada por ``--batch-submit``: o lote
+conclui ``--batch-delay`` segundos após a criação. Com ``--slots N`` ele imita um
+servidor de inferência local com continuous batching: até N requisições são
+atendidas ao mesmo tempo e as demais esperam um slot. Com ``--capacity``
+(ex.: ``0:16,30:4,60:16``) a capacidade de requisições simultâneas muda no
+tempo e o excedente recebe 429, como um provedor sob carga variável.
+
+Uso: ``python endpoint_fake.py --port 8765 --latency 0.5`` e
+``LLM_BASE_URL=http://127.0.0.1:8765/v1`` nos pontos de entrada.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+CANNED_STRUCTURED = {
+    "summary": "Resposta simulada pelo endpoint fake.",
+    "findings": [{"severity": "low", "category": "docs", "description": "Resposta simulada", "line": 1}],
+    "scores": {"quality": 70, "security": 70, "complexity": 40, "test_coverage": 50},
+    "quick_wins": ["Nenhum (endpoint fake)"],
+}
+# Delimitadores pedidos pelo modo combinado do `avaliacao_gemini.py`
+SECTION_MARKER_RE = re.compile(r"^=== SEÇÃO: ([\w-]+) ===$", re.MULTILINE)
+
+
+def parse_capacity(text: str) -> List[Tuple[float, int]]:
+    """📈 Converte `0:16,30:4` em [(segundos desde o início, requisições simultâneas)]"""
+    profile = []
+    for item in filter(None, (p.strip() for p in text.split(","))):
+        start, sep, capacity = item.partition(":")
+        if not sep:
+            raise ValueError(f"capacidade inválida: {item!r} (use segundos:requisições)")
+        profile.append((float(start), int(capacity)))
+    return sorted(profile)
+
+
+def approx_tokens(text: str) -> int:
+    """🔢 Estimativa grosseira de tokens (~4 caracteres por token)"""
+    return max(1, len(text) // 4)
+
+
+def canned_completion(model: str, prompt: str) -> Dict:
+    """💬 Corpo de resposta OpenAI-compatível com markdown e bloco JSON estruturado (ou seções pedidas)"""
+    sections = list(dict.fromkeys(SECTION_MARKER_RE.findall(prompt)))
+    if sections:
+        text = "\n\n".join(f"=== SEÇÃO: {key} ===\n## {key} (endpoint fake)\n\nScore: 70/100" for key in sections)
+    else:
+        text = ("## Análise (endpoint fake)\n\n"
+                f"Prompt recebido com {len(prompt)} caracteres.\n\n"
+                f"```json\n{json.dumps(CANNED_STRUCTURED, ensure_ascii=False)}\n```\n")
+    prompt_tokens, completion_tokens = approx_tokens(prompt), approx_tokens(text)
+    return {
+        "id": f"fake-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+class FakeConfig:
+    """⚙️ Comportamento do servidor (latência, cauda lenta, falhas e slots de inferência)"""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, fail_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_factor: float = 10.0, seed: Optional[int] = None,
+                 batch_delay: float = 2.0, slots: int = 0,
+                 capacity: Optional[List[Tuple[float, int]]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.batch_delay = batch_delay
+        # 0 = ilimitado; N = no máximo N requisições em processamento (as demais fazem fila)
+        self.slots = threading.BoundedSemaphore(slots) if slots > 0 else None
+        # Perfil de capacidade (requisições simultâneas no tempo); acima dela, 429
+        self.capacity = capacity or []
+        self.started = time.monotonic()
+        self.active = 0
+        self.throttled = 0
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def admit(self) -> bool:
+        """🚪 Reserva uma vaga na capacidade atual; False = responder 429 (libere com `release`)"""
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            current = [c for start, c in self.capacity if start <= elapsed]
+            if current and self.active >= current[-1]:
+                self.throttled += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self) -> None:
+        with self.lock:
+            self.active -= 1
+
+    def delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            if self.random.random() < self.slow_rate:
+                delay *= self.slow_factor
+        return delay
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.fail_rate
+
+
+class FakeBatchStore:
+    """🗄️ Arquivos e lotes em memória da Batch API fake"""
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def add_file(self, content: str) -> str:
+        with self.lock:
+            file_id = f"file-{len(self.files) + 1}"
+            self.files[file_id] = content
+        return file_id
+
+    def create_batch(self, input_file_id: str) -> Dict:
+        with self.lock:
+            lines = [line for line in self.files.get(input_file_id, "").splitlines() if line.strip()]
+            batch = {"id": f"batch-{len(self.batches) + 1}", "object": "batch", "status": "in_progress",
+                     "input_file_id": input_file_id, "created_at": time.time(),
+                     "output_file_id": None, "error_file_id": None,
+                     "request_counts": {"total": len(lines), "completed": 0, "failed": 0}}
+            self.batches[batch["id"]] = batch
+        return batch
+
+    def complete(self, batch: Dict, config: FakeConfig) -> None:
+        """✅ Gera as saídas (com falhas por linha segundo `fail_rate`) e conclui o lote"""
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if config.should_fail():
+                errors.append({"custom_id": request["custom_id"], "response": {"status_code": 500, "body": {
+                    "error": {"message": "falha simulada"}}}, "error": None})
+                continue
+            body = request.get("body", {})
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            outputs.append({"custom_id": request["custom_id"], "error": None, "response": {
+                "status_code": 200, "body": canned_completion(body.get("model", "fake"), prompt)}})
+        to_jsonl = lambda items: "".join(json.dumps(i, ensure_ascii=False) + "\n" for i in items)  # noqa: E731
+        batch["output_file_id"] = self.add_file(to_jsonl(outputs)) if outputs else None
+        batch["error_file_id"] = self.add_file(to_jsonl(errors)) if errors else None
+        batch["request_counts"].update({"completed": len(outputs), "failed": len(errors)})
+        batch["status"] = "completed"
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """🧪 Atende `.../chat/completions`, `.../files` e `.../batches` (qualquer prefixo, ex.: `/v1`)"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, como um provedor real
+    config = FakeConfig()
+    store = FakeBatchStore()
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _read_multipart(self) -> Tuple[Dict[str, str], Optional[str]]:
+        """📎 Campos e conteúdo do arquivo de um `multipart/form-data` (upload do lote)"""
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("utf-8") + self.rfile.read(length)
+        fields, content = {}, None
+        for part in BytesParser(policy=HTTP).parsebytes(raw).iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = (part.get_payload(decode=True) or b"").decode("utf-8", errors="replace")
+            if part.get_filename():
+                content = payload
+            else:
+                fields[name] = payload
+        return fields, content
+
+    def do_GET(self) -> None:  # noqa: N802 - nome exigido pelo BaseHTTPRequestHandler
+        path = self.path.rstrip("/")
+        store = self.store
+        batch_match = re.search(r"/batches/([\w-]+)$", path)
+        file_match = re.search(r"/files/([\w-]+)/content$", path)
+        if batch_match and batch_match.group(1) in store.batches:
+            batch = store.batches[batch_match.group(1)]
+            with store.lock:
+                ready = batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.config.batch_delay
+            if ready:
+                store.complete(batch, self.config)
+            self._send_json(200, batch)
+        elif file_match and file_match.group(1) in store.files:
+            data = store.files[file_match.group(1)].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802 - nome exigido pelo BaseHTTPRequestHandler
+        path = self.path.rstrip("/")
+        if path.endswith("/files"):
+            fields, content = self._read_multipart()
+            if content is None:
+                self._send_json(400, {"error": {"message": "arquivo ausente"}})
+                return
+            self._send_json(200, {"id": self.store.add_file(content), "object": "file",
+                                  "purpose": fields.get("purpose"), "bytes": len(content)})
+            return
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": {"message": "JSON inválido"}})
+            return
+        if path.endswith("/batches"):
+            if payload.get("input_file_id") not in self.store.files:
+                self._send_json(400, {"error": {"message": "input_file_id desconhecido"}})
+                return
+            self._send_json(200, self.store.create_batch(payload["input_file_id"]))
+            return
+        if not path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+            return
+        if not self.config.admit():
+            self._send_json(429, {"error": {"message": "limite de taxa simulado", "code": 429}})
+            return
+        try:
+            if self.config.slots is not None:
+                with self.config.slots:
+                    time.sleep(self.config.delay())
+            else:
+                time.sleep(self.config.delay())
+        finally:
+            self.config.release()
+        if self.config.should_fail():
+            self._send_json(500, {"error": {"message": "falha simulada"}})
+            return
+        prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        self._send_json(200, canned_completion(payload.get("model", "fake"), prompt))
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - assinatura da classe base
+        pass
+
+
+def serve(port: int = 8765, config: Optional[FakeConfig] = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """🚀 Sobe o servidor numa thread daemon e o retorna (use `.shutdown()` para parar)"""
+    handler = type("ConfiguredFakeHandler", (FakeHandler,),
+                   {"config": config or FakeConfig(), "store": FakeBatchStore()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="endpoint-fake", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🧪 Endpoint fake OpenAI-compatível")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latência média (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Variação uniforme da latência (±s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fração de respostas lentas (cauda)")
+    parser.add_argument("--slow-factor", type=float, default=10.0, help="Multiplicador da latência na cauda")
+    parser.add_argument("--batch-delay", type=float, default=2.0, help="Tempo (s) até um lote concluir")
+    parser.add_argument("--slots", type=int, default=0,
+                        help="Requisições atendidas ao mesmo tempo, como um servidor local (0 = ilimitado)")
+    parser.add_argument("--capacity", default=None,
+                        help="Capacidade (requisições simultâneas) no tempo, ex.: 0:16,30:4,60:16; acima dela, 429")
+    args = parser.parse_args(argv)
+    try:
+        capacity = parse_capacity(args.capacity) if args.capacity else None
+    except ValueError as e:
+        parser.error(str(e))
+    config = FakeConfig(args.latency, args.jitter, args.fail_rate, args.slow_rate, args.slow_factor,
+                        batch_delay=args.batch_delay, slots=args.slots, capacity=capacity)
+    server = serve(args.port, config, args.host)
+    print(f"🧪 Endpoint fake em http://{args.host}:{args.port}/v1 (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+⏳ Execução de Chamadas ao LLM
+=============================
+
+Camada única para executar chamadas ao LLM (``crew.kickoff()``,
+``model.generate_content()``) com timeout por tipo de chamada, requisição
+duplicada (hedging) quando a chamada passa do p95 observado, retentativas
+limitadas com backoff e jitter e um histograma de latência por execução para
+acompanhar a cauda.
+
+Threads do Python não podem ser interrompidas: a chamada que perde a corrida
+(ou estoura o timeout) é abandonada numa thread daemon e seu resultado é
+descartado, sem travar a execução nem a saída do processo.
+"""
+
+import bisect
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores (s) dos baldes do histograma; o último balde é "acima de 600s"
+HISTOGRAM_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+MAX_SAMPLES = 2048
+
+
+class CallTimeout(TimeoutError):
+    """⌛ A chamada (e suas duplicatas) não terminou dentro do timeout"""
+
+
+@dataclass
+class CallPolicy:
+    """⚙️ Política de execução de um tipo de chamada"""
+    timeout_seconds: float = 300.0
+    max_retries: int = 2
+    backoff_base: float = 2.0
+    backoff_max: float = 30.0
+    hedge: bool = True
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 5
+    hedge_min_delay: float = 2.0
+
+
+# Chamadas por arquivo, resumos de diretório e do Gemini podem ser duplicadas com segurança
+# (a task é recriada);
+# especialistas e consolidações são longos e caros, então só têm timeout e retentativas.
+DEFAULT_POLICIES: Dict[str, CallPolicy] = {
+    "file": CallPolicy(timeout_seconds=180.0),
+    "gemini": CallPolicy(timeout_seconds=300.0),
+    "directory_summary": CallPolicy(timeout_seconds=300.0),
+    "specialist": CallPolicy(timeout_seconds=600.0, max_retries=1, hedge=False),
+    "consolidation": CallPolicy(timeout_seconds=900.0, max_retries=1, hedge=False),
+    "standard_flow": CallPolicy(timeout_seconds=3600.0, max_retries=0, hedge=False),
+}
+
+
+def parse_timeouts(text: str) -> Dict[str, float]:
+    """⏲️ Converte `file=120,consolidation=600` em {tipo: segundos}"""
+    timeouts = {}
+    for item in filter(None, (p.strip() for p in text.split(","))):
+        call_type, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"timeout inválido: {item!r} (use tipo=segundos)")
+        timeouts[call_type.strip()] = float(value)
+    return timeouts
+
+
+class LatencyHistogram:
+    """📊 Histograma de latências com baldes fixos e quantis sobre amostras recentes"""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.samples: List[float] = []
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        if len(self.samples) > MAX_SAMPLES:
+            del self.samples[: len(self.samples) - MAX_SAMPLES]
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={b}s" for b in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}s"]
+        return {
+            "count": self.total,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 3),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class CallExecutor:
+    """⏳ Executa chamadas com timeout, hedging, retentativas e histograma por tipo"""
+
+    def __init__(self, policies: Optional[Dict[str, CallPolicy]] = None,
+                 timeouts: Optional[Dict[str, float]] = None, sleep: Callable[[float], None] = time.sleep):
+        self.policies = {k: replace(v) for k, v in DEFAULT_POLICIES.items()}
+        self.policies.update(policies or {})
+        self.set_timeouts(timeouts or {})
+        self.sleep = sleep
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        # Soma do tempo bloqueado em chamadas (inclui retentativas); usado pelo --profile
+        self.blocked_seconds = 0.0
+        # Observadores de cada tentativa: (tipo, segundos, erro ou None); ex.: controle de concorrência
+        self._observers: List[Callable[[str, float, Optional[BaseException]], None]] = []
+        self._lock = threading.Lock()
+
+    def policy(self, call_type: str) -> CallPolicy:
+        if call_type not in self.policies:
+            self.policies[call_type] = CallPolicy()
+        return self.policies[call_type]
+
+    def set_timeouts(self, timeouts: Dict[str, float]) -> None:
+        """⏲️ Sobrescreve o timeout (s) dos tipos informados"""
+        for call_type, seconds in timeouts.items():
+            self.policy(call_type).timeout_seconds = seconds
+
+    def add_observer(self, observer: Callable[[str, float, Optional[BaseException]], None]) -> None:
+        """👀 Registra um observador chamado ao fim de cada tentativa (inclusive as que falham)"""
+        with self._lock:
+            self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[str, float, Optional[BaseException]], None]) -> None:
+        with self._lock:
+            if observer in self._observers:
+                self._observers.remove(observer)
+
+    def _notify(self, call_type: str, seconds: float, error: Optional[BaseException]) -> None:
+        with self._lock:
+            observers = list(self._observers)
+        for observer in observers:
+            try:
+                observer(call_type, seconds, error)
+            except Exception as e:
+                logger.warning(f"⚠️ Observador de chamadas falhou: {e}")
+
+    def _count(self, call_type: str, key: str) -> None:
+        with self._lock:
+            s = self.stats.setdefault(call_type, {"calls": 0, "retries": 0, "timeouts": 0, "errors": 0,
+                                                  "hedges": 0, "hedge_wins": 0, "failures": 0})
+            s[key] += 1
+
+    @staticmethod
+    def _start(fn: Callable, args, kwargs) -> Future:
+        """🧵 Roda `fn` numa thread daemon (abandonável) e devolve um Future"""
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+
+        def target():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:  # noqa: B902 - repassado ao chamador
+                future.set_exception(e)
+
+        threading.Thread(target=target, daemon=True).start()
+        return future
+
+    def _hedge_delay(self, call_type: str, policy: CallPolicy) -> Optional[float]:
+        hist = self.histograms.get(call_type)
+        if not policy.hedge or hist is None or len(hist.samples) < policy.hedge_min_samples:
+            return None
+        return max(policy.hedge_min_delay, hist.quantile(policy.hedge_quantile))
+
+    def _attempt(self, call_type: str, policy: CallPolicy, fn: Callable, args, kwargs):
+        started = time.monotonic()
+        deadline = started + policy.timeout_seconds
+        hedge_delay = self._hedge_delay(call_type, policy)
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+        hedged: Optional[Future] = None
+        pending = {self._start(fn, args, kwargs)}
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=wake - now, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    with self._lock:
+                        self.histograms.setdefault(call_type, LatencyHistogram()).record(time.monotonic() - started)
+                    if f is hedged:
+                        self._count(call_type, "hedge_wins")
+                    return f.result()
+                last_error = f.exception()
+            if not pending:
+                raise last_error
+            if hedge_at is not None and hedge_at <= time.monotonic() < deadline:
+                # Passou do p95: dispara a duplicata; a que perder é descartada
+                logger.info(f"🪞 Chamada {call_type} passou do p95 ({hedge_delay:.1f}s); disparando duplicata")
+                self._count(call_type, "hedges")
+                hedged = self._start(fn, args, kwargs)
+                pending.add(hedged)
+                hedge_at = None
+
+        for f in pending:
+            f.cancel()
+        raise CallTimeout(f"chamada {call_type} excedeu {policy.timeout_seconds:.0f}s")
+
+    def call(self, call_type: str, fn: Callable, *args, **kwargs):
+        """📞 Executa `fn(*args, **kwargs)` sob a política de `call_type`.
+
+        `fn` deve ser seguro para chamadas concorrentes quando o hedging está ativo (ex.: criar
+        uma Crew/Task nova a cada chamada). Após esgotar as retentativas, propaga o último erro.
+        """
+        started = time.monotonic()
+        try:
+            return self._call(call_type, fn, args, kwargs)
+        finally:
+            with self._lock:
+                self.blocked_seconds += time.monotonic() - started
+
+    def _call(self, call_type: str, fn: Callable, args, kwargs):
+        policy = self.policy(call_type)
+        self._count(call_type, "calls")
+        for attempt in range(policy.max_retries + 1):
+            started = time.monotonic()
+            try:
+                result = self._attempt(call_type, policy, fn, args, kwargs)
+                self._notify(call_type, time.monotonic() - started, None)
+                return result
+            except CallTimeout as e:
+                self._count(call_type, "timeouts")
+                error: BaseException = e
+            except Exception as e:
+                self._count(call_type, "errors")
+                error = e
+            self._notify(call_type, time.monotonic() - started, error)
+            if attempt == policy.max_retries:
+                break
+            self._count(call_type, "retries")
+            # Backoff exponencial com jitter completo
+            delay = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+            logger.warning(f"🔁 Chamada {call_type} falhou ({error}); nova tentativa "
+                           f"{attempt + 1}/{policy.max_retries} em {delay:.1f}s")
+            self.sleep(delay)
+        self._count(call_type, "failures")
+        raise error
+
+    def summary(self) -> Dict:
+        """📊 Histogramas, contadores e políticas por tipo de chamada (para os metadados)"""
+        with self._lock:
+            return {
+                call_type: {
+                    **self.stats.get(call_type, {}),
+                    "latency": self.histograms[call_type].to_dict() if call_type in self.histograms else None,
+                    "policy": asdict(self.policies[call_type]),
+                }
+                for call_type in self.stats
+            }
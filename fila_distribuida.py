@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+🛰️ Fila de Shards para Análise Distribuída
+=========================================
+
+Fila baseada em SQLite (modo WAL) usada pelo modo coordenador/worker de
+``crew_avaliacao_completa.py``. O coordenador enfileira shards (listas de
+arquivos ou faixas ``{"range": [início, fim]}`` do inventário mmap salvo ao
+lado da fila) de uma execução; workers locais ou em outros hosts (com o
+arquivo ``.db`` num disco compartilhado) pegam shards com lease, renovam o lease numa
+thread de fundo (``LeaseKeeper``) enquanto analisam e devolvem os resultados. Leases expirados de workers perdidos são
+recuperados e o shard volta para a fila.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    files TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(status, run_id);
+"""
+
+
+class ShardQueue:
+    """📬 Fila de shards com leases sobre SQLite"""
+
+    def __init__(self, db_path: str, lease_seconds: float = 600.0, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # autocommit + transações explícitas (BEGIN IMMEDIATE) onde há leitura-e-escrita
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue_run(self, run_id: str, config: Dict, shards: List) -> None:
+        """➕ Registra uma execução e enfileira seus shards"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO runs(run_id, config, created) VALUES (?, ?, ?)",
+                         (run_id, json.dumps(config, ensure_ascii=False), now))
+            conn.executemany(
+                "INSERT INTO shards(run_id, files, updated) VALUES (?, ?, ?)",
+                [(run_id, json.dumps(files, ensure_ascii=False), now) for files in shards],
+            )
+            conn.execute("COMMIT")
+
+    def claim(self, worker_id: str, run_id: Optional[str] = None) -> Optional[Tuple[int, Dict, Any]]:
+        """🎫 Pega o próximo shard pendente (ou com lease expirado). Retorna (id, config, arquivos)
+
+        Um lease expirado que já esgotou `max_attempts` (shard que derruba o worker) é marcado
+        como falho em vez de ser entregue de novo.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE shards SET status = 'failed', error = 'lease expirado', worker = NULL, "
+                "lease_expires = NULL, updated = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            query = ("SELECT s.id, s.files, r.config FROM shards s JOIN runs r ON r.run_id = s.run_id "
+                     "WHERE (s.status = 'pending' OR (s.status = 'leased' AND s.lease_expires < ? "
+                     "AND s.attempts < ?))")
+            params: list = [now, self.max_attempts]
+            if run_id is not None:
+                query += " AND s.run_id = ?"
+                params.append(run_id)
+            row = conn.execute(query + " ORDER BY s.id LIMIT 1", params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row[0]),
+            )
+            conn.execute("COMMIT")
+        return row[0], json.loads(row[2]), json.loads(row[1])
+
+    def heartbeat(self, shard_id: int, worker_id: str) -> bool:
+        """💓 Renova o lease; retorna False se o shard não pertence mais a este worker"""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, shard_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, shard_id: int, worker_id: str, result: Dict) -> bool:
+        """✅ Publica o resultado do shard (ignorado se o lease foi perdido)"""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE shards SET status = 'done', result = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False), time.time(), shard_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, shard_id: int, worker_id: str, error: str) -> None:
+        """❌ Devolve o shard à fila, ou marca como falho após `max_attempts` tentativas"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, worker = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ?",
+                (self.max_attempts, error, time.time(), shard_id, worker_id),
+            )
+
+    def reclaim_expired(self, run_id: Optional[str] = None) -> int:
+        """♻️ Devolve à fila shards cujo lease expirou (worker perdido). Retorna quantos"""
+        query = ("UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                 "error = 'lease expirado', worker = NULL, lease_expires = NULL, updated = ? "
+                 "WHERE status = 'leased' AND lease_expires < ?")
+        now = time.time()
+        params: list = [self.max_attempts, now, now]
+        if run_id is not None:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def progress(self, run_id: str) -> Dict[str, int]:
+        """📊 Contagem de shards por status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM shards WHERE run_id = ? GROUP BY status",
+                                (run_id,)).fetchall()
+        return {status: count for status, count in rows}
+
+    def results(self, run_id: str) -> List[Dict]:
+        """📦 Resultados dos shards concluídos, na ordem de enfileiramento"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT result FROM shards WHERE run_id = ? AND status = 'done' ORDER BY id",
+                                (run_id,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def failed_shards(self, run_id: str) -> List[Dict]:
+        """🚨 Shards que esgotaram as tentativas"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, files, error FROM shards WHERE run_id = ? AND status = 'failed'",
+                                (run_id,)).fetchall()
+        return [{"id": r[0], "files": json.loads(r[1]), "error": r[2]} for r in rows]
+
+
+class LeaseKeeper:
+    """💓 Renova o lease de um shard numa thread de fundo enquanto o worker o processa
+
+    A renovação independe de quanto demora cada arquivo (chamadas longas ao LLM, retentativas);
+    `lost` fica marcado quando o shard deixou de pertencer ao worker.
+    """
+
+    def __init__(self, queue: ShardQueue, shard_id: int, worker_id: str, interval: Optional[float] = None):
+        self.queue = queue
+        self.shard_id = shard_id
+        self.worker_id = worker_id
+        self.interval = interval if interval is not None else queue.lease_seconds / 3
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{shard_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                renewed = self.queue.heartbeat(self.shard_id, self.worker_id)
+            except sqlite3.Error:
+                continue  # banco ocupado/indisponível: tenta de novo no próximo intervalo
+            if not renewed:
+                self.lost.set()
+                return
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+🧾 Gerador Local do Relatório Base
+=================================
+
+Gera ``relatorio_codebase_turbinado.md``, a entrada do fluxo padrão dos seis
+especialistas e do ``avaliacao_gemini.py``, sem nenhuma chamada ao LLM:
+árvore de diretórios, LOC por linguagem, manifestos de dependências
+(lockfiles resumidos), pontos de entrada, resumo do grafo de imports,
+módulos maiores e mais complexos e layout de testes.
+
+A leitura e a análise dos arquivos rodam em paralelo (processos) e o
+markdown final é limitado a um orçamento de tokens: as seções perdem detalhe
+(menos níveis na árvore, listas menores) até caber.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import tomllib
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from roteador_modelos import ENTRYPOINT_NAMES, compute_signals
+from roteamento_especialistas import extract_imports
+from varredura import skip_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = "relatorio_codebase_turbinado.md"
+DEFAULT_MAX_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+# Abaixo disso o custo de subir processos não compensa
+PARALLEL_MIN_FILES = 200
+
+LANGUAGES = {
+    ".py": "Python", ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript", ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin",
+    ".rb": "Ruby", ".php": "PHP", ".c": "C", ".h": "C", ".cpp": "C++", ".cc": "C++", ".hpp": "C++",
+    ".cs": "C#", ".swift": "Swift", ".sh": "Shell", ".sql": "SQL", ".html": "HTML", ".css": "CSS",
+    ".scss": "CSS", ".md": "Markdown", ".rst": "reStructuredText", ".json": "JSON", ".yaml": "YAML",
+    ".yml": "YAML", ".toml": "TOML", ".ini": "Config", ".cfg": "Config",
+}
+CODE_LANGUAGES = {"Python", "JavaScript", "TypeScript", "Go", "Rust", "Java", "Kotlin", "Ruby", "PHP",
+                  "C", "C++", "C#", "Swift", "Shell"}
+LOCKFILES = {"uv.lock": r"^\[\[package\]\]", "poetry.lock": r"^\[\[package\]\]", "Cargo.lock": r"^\[\[package\]\]",
+             "yarn.lock": r'^"?[^\s#][^\n]*:\s*$', "pnpm-lock.yaml": r"^  /?['\"]?[@\w][^\s]*:\s*$",
+             "go.sum": r"^\S+ v\S+ h1:", "Gemfile.lock": r"^    \S+ \(", "composer.lock": r'"name":'}
+JSON_LOCKFILES = {"package-lock.json", "npm-shrinkwrap.json", "Pipfile.lock"}
+OTHER_MANIFESTS = {"setup.py", "setup.cfg", "go.mod", "Cargo.toml", "Gemfile", "composer.json", "Dockerfile",
+                   "docker-compose.yml", "docker-compose.yaml", "Makefile", "Procfile", "tox.ini", "noxfile.py"}
+TEST_CONFIGS = {"pytest.ini", "conftest.py", "tox.ini", "noxfile.py", "jest.config.js", "jest.config.ts",
+                "vitest.config.ts", "vitest.config.js", "karma.conf.js", ".mocharc.json", "playwright.config.ts"}
+TEST_FRAMEWORKS = {"pytest": "pytest", "unittest": "unittest", "jest": "jest", "vitest": "vitest",
+                   "mocha": "mocha", "@playwright/test": "playwright", "hypothesis": "hypothesis"}
+MAIN_GUARD_RE = re.compile(r"""if\s+__name__\s*==\s*['"]__main__['"]""")
+REQUIREMENT_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def is_test_path(rel_path: str) -> bool:
+    parts = rel_path.replace("\\", "/").lower().split("/")
+    name = parts[-1]
+    return (any(p in ("test", "tests", "__tests__", "spec", "specs") for p in parts[:-1])
+            or name.startswith("test_") or name.endswith(("_test.py", "_test.go"))
+            or ".test." in name or ".spec." in name)
+
+
+def _analyze_path(args: Tuple[str, str, int]) -> Optional[Dict]:
+    """🔬 Analisa um arquivo (roda nos processos do pool; só tipos simples no retorno)"""
+    file_path, rel_path, max_size_bytes = args
+    ext = os.path.splitext(rel_path)[1].lower()
+    language = LANGUAGES.get(ext)
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return None
+    info = {"file": rel_path, "language": language, "size": size, "lines": 0, "code_lines": 0,
+            "complexity": 0, "imports": [], "main_guard": False}
+    if language is None or size > max_size_bytes:
+        return info
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+    except OSError:
+        return info
+    signals = compute_signals(rel_path, content)
+    info.update({"lines": signals["lines"], "code_lines": signals["nonblank_lines"],
+                 "complexity": signals["complexity"], "main_guard": bool(MAIN_GUARD_RE.search(content))})
+    if language in ("Python", "JavaScript", "TypeScript"):
+        info["imports"] = sorted(extract_imports(rel_path, content))
+    return info
+
+
+def scan_codebase(root_dir: str, max_files: int = 200000, max_size_bytes: int = 1024 * 1024,
+                  workers: Optional[int] = None) -> List[Dict]:
+    """📂 Lista todos os arquivos (fora de SKIP_DIRS e de caches ocultos) e os analisa em paralelo"""
+    jobs = []
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames[:] = sorted(d for d in dirnames if not skip_dir(d))
+        for fname in sorted(filenames):
+            if len(jobs) >= max_files:
+                break
+            file_path = os.path.join(dirpath, fname)
+            jobs.append((file_path, os.path.relpath(file_path, root_dir), max_size_bytes))
+    if len(jobs) < PARALLEL_MIN_FILES or workers == 1:
+        results = map(_analyze_path, jobs)
+        return [r for r in results if r is not None]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for r in pool.map(_analyze_path, jobs, chunksize=64) if r is not None]
+
+
+# ----------------------------------------------------------------------
+# Manifestos
+# ----------------------------------------------------------------------
+def _read(path: str, limit: int = 4 * 1024 * 1024) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read(limit)
+    except OSError:
+        return ""
+
+
+def _summarize_pyproject(text: str) -> List[str]:
+    try:
+        data = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as e:
+        return [f"(pyproject.toml inválido: {e})"]
+    project = data.get("project") or data.get("tool", {}).get("poetry") or {}
+    deps = project.get("dependencies") or []
+    if isinstance(deps, dict):
+        deps = [f"{k} {v}" for k, v in deps.items() if k != "python"]
+    lines = [f"nome: {project.get('name', '?')} {project.get('version', '')}".rstrip(),
+             f"python: {project.get('requires-python') or '?'}",
+             f"dependências ({len(deps)}): {', '.join(deps)}"]
+    optional = project.get("optional-dependencies") or {}
+    if optional:
+        lines.append("extras: " + "; ".join(f"{k} ({len(v)})" for k, v in optional.items()))
+    scripts = project.get("scripts") or {}
+    if scripts:
+        lines.append("scripts: " + ", ".join(f"{k} → {v}" for k, v in scripts.items()))
+    return lines
+
+
+def _summarize_package_json(text: str) -> List[str]:
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        return [f"(package.json inválido: {e})"]
+    deps, dev = data.get("dependencies") or {}, data.get("devDependencies") or {}
+    lines = [f"nome: {data.get('name', '?')} {data.get('version', '')}".rstrip(),
+             f"dependências ({len(deps)}): {', '.join(f'{k}@{v}' for k, v in deps.items())}",
+             f"devDependencies ({len(dev)}): {', '.join(dev)}"]
+    if data.get("scripts"):
+        lines.append("scripts: " + ", ".join(f"{k}: `{v}`" for k, v in data["scripts"].items()))
+    if data.get("main") or data.get("bin"):
+        lines.append(f"entrada: main={data.get('main')} bin={data.get('bin')}")
+    return lines
+
+
+def _summarize_lockfile(name: str, text: str) -> str:
+    if name in JSON_LOCKFILES:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return "inválido"
+        packages = data.get("packages") or data.get("dependencies") or data.get("default") or {}
+        return f"{len(packages)} pacotes fixados"
+    count = len(re.findall(LOCKFILES[name], text, re.MULTILINE))
+    return f"~{count} pacotes fixados"
+
+
+def collect_manifests(root_dir: str, files: List[Dict]) -> Dict:
+    """📦 Resume manifestos de dependências e lockfiles (conteúdo dos lockfiles omitido)"""
+    manifests: Dict[str, List[str]] = {}
+    lockfiles: List[str] = []
+    others: List[str] = []
+    scripts: Dict[str, str] = {}
+    for info in files:
+        rel = info["file"]
+        name = os.path.basename(rel)
+        path = os.path.join(root_dir, rel)
+        if name == "pyproject.toml":
+            text = _read(path)
+            manifests[rel] = _summarize_pyproject(text)
+            try:
+                scripts.update((tomllib.loads(text).get("project") or {}).get("scripts") or {})
+            except tomllib.TOMLDecodeError:
+                pass
+        elif name == "package.json" and "node_modules" not in rel:
+            text = _read(path)
+            manifests[rel] = _summarize_package_json(text)
+            try:
+                data = json.loads(text)
+                for key, value in (data.get("scripts") or {}).items():
+                    scripts[f"npm run {key}"] = value
+            except ValueError:
+                pass
+        elif re.match(r"requirements.*\.txt$", name):
+            reqs = [m.group(1) for m in map(REQUIREMENT_NAME_RE.match, _read(path).splitlines())
+                    if m and not m.group(1).startswith("-")]
+            manifests[rel] = [f"{len(reqs)} requisitos: {', '.join(reqs)}"]
+        elif name in LOCKFILES or name in JSON_LOCKFILES:
+            lockfiles.append(f"{rel} — {_summarize_lockfile(name, _read(path))}")
+        elif name in OTHER_MANIFESTS:
+            others.append(rel)
+    return {"manifests": manifests, "lockfiles": lockfiles, "others": others, "scripts": scripts}
+
+
+# ----------------------------------------------------------------------
+# Análises
+# ----------------------------------------------------------------------
+def _module_name(rel_path: str) -> Optional[str]:
+    rel = rel_path.replace("\\", "/")
+    if not rel.endswith(".py"):
+        return None
+    parts = rel[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) if parts else None
+
+
+def import_graph(files: List[Dict]) -> Dict:
+    """🕸️ Arestas internas (fan-in/fan-out), dependências externas mais usadas e ciclos diretos"""
+    py_modules = {}
+    for info in files:
+        module = _module_name(info["file"])
+        if module:
+            py_modules[module] = info["file"]
+            # Layout src/: `src/pkg/mod.py` é importado como `pkg.mod`
+            if module.startswith("src."):
+                py_modules[module[4:]] = info["file"]
+    known_paths = {info["file"].replace("\\", "/") for info in files}
+    internal_roots = {m.split(".")[0] for m in py_modules}
+    edges = set()
+    external: Counter = Counter()
+    for info in files:
+        source = info["file"].replace("\\", "/")
+        directory = os.path.dirname(source)
+        internal = [m for m in info["imports"] if m in py_modules]
+        for imported in internal:
+            # extract_imports devolve todos os prefixos; a aresta fica no módulo mais específico
+            if not any(other.startswith(imported + ".") for other in internal) and py_modules[imported] != source:
+                edges.add((source, py_modules[imported]))
+        for imported in info["imports"]:
+            if imported.startswith("."):
+                # JS/TS relativo: resolve contra o diretório do arquivo
+                base = os.path.normpath(os.path.join(directory, imported)).replace("\\", "/")
+                candidates = [base + ext for ext in ("", ".ts", ".tsx", ".js", ".jsx", "/index.ts", "/index.js")]
+                target = next((c for c in candidates if c in known_paths), None)
+                if target and target != source:
+                    edges.add((source, target))
+            elif imported.startswith("@"):
+                if imported.count("/") == 1:
+                    external[imported] += 1
+            elif ("." not in imported and "/" not in imported and imported not in internal_roots
+                  and imported not in sys.stdlib_module_names):
+                external[imported] += 1
+    fan_in: Counter = Counter(target for _, target in edges)
+    fan_out: Counter = Counter(source for source, _ in edges)
+    cycles = sorted({tuple(sorted((a, b))) for a, b in edges if (b, a) in edges})
+    return {"edges": len(edges), "fan_in": fan_in, "fan_out": fan_out, "external": external, "cycles": cycles}
+
+
+def entry_points(files: List[Dict], scripts: Dict[str, str]) -> List[str]:
+    found = []
+    for info in files:
+        name = os.path.basename(info["file"])
+        if name in ENTRYPOINT_NAMES or info["main_guard"]:
+            reason = "nome de entrada" if name in ENTRYPOINT_NAMES else "`if __name__ == '__main__'`"
+            found.append(f"`{info['file']}` ({reason}, {info['code_lines']} LOC)")
+    found += [f"`{name}` → `{target}`" for name, target in scripts.items()]
+    return found
+
+
+def test_layout(files: List[Dict]) -> Dict:
+    tests = [f for f in files if is_test_path(f["file"]) and f["language"] in CODE_LANGUAGES]
+    sources = [f for f in files if not is_test_path(f["file"]) and f["language"] in CODE_LANGUAGES]
+    frameworks: Counter = Counter()
+    for info in tests:
+        for module in info["imports"]:
+            if module in TEST_FRAMEWORKS:
+                frameworks[TEST_FRAMEWORKS[module]] += 1
+    dirs = Counter(os.path.dirname(f["file"]) or "." for f in tests)
+    test_loc, source_loc = sum(f["code_lines"] for f in tests), sum(f["code_lines"] for f in sources)
+    return {
+        "test_files": len(tests),
+        "test_loc": test_loc,
+        "source_loc": source_loc,
+        "ratio": round(test_loc / source_loc, 2) if source_loc else None,
+        "frameworks": frameworks,
+        "dirs": dirs,
+        "configs": sorted(f["file"] for f in files if os.path.basename(f["file"]) in TEST_CONFIGS),
+    }
+
+
+def directory_tree(files: List[Dict], max_depth: int, max_children: int) -> List[str]:
+    """🌲 Árvore com arquivos e LOC agregados por diretório (profundidade e largura limitadas)"""
+    totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    children: Dict[str, set] = defaultdict(set)
+    for info in files:
+        parts = info["file"].replace("\\", "/").split("/")
+        for depth in range(len(parts)):
+            directory = "/".join(parts[:depth])
+            totals[directory][0] += 1
+            totals[directory][1] += info["code_lines"]
+            if depth < len(parts) - 1:
+                children[directory].add("/".join(parts[:depth + 1]))
+
+    lines = [f"./ ({totals[''][0]} arquivos, {totals[''][1]} LOC)"]
+
+    def walk(directory: str, depth: int) -> None:
+        if depth >= max_depth:
+            return
+        subdirs = sorted(children[directory], key=lambda d: -totals[d][1])
+        for sub in subdirs[:max_children]:
+            count, loc = totals[sub]
+            lines.append(f"{'  ' * (depth + 1)}{sub.rsplit('/', 1)[-1]}/ ({count} arquivos, {loc} LOC)")
+            walk(sub, depth + 1)
+        if len(subdirs) > max_children:
+            lines.append(f"{'  ' * (depth + 1)}… (+{len(subdirs) - max_children} diretórios)")
+
+    walk("", 0)
+    return lines
+
+
+# ----------------------------------------------------------------------
+# Renderização com orçamento de tokens
+# ----------------------------------------------------------------------
+def _table(header: List[str], rows: List[List]) -> List[str]:
+    out = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    out += ["| " + " | ".join(str(c) for c in row) + " |" for row in rows]
+    return out
+
+
+def render_report(root_dir: str, files: List[Dict], manifests: Dict, detail: float = 1.0) -> str:
+    """📝 Monta o markdown; `detail` (0-1] encolhe árvores e listas para caber no orçamento"""
+    top = max(3, int(15 * detail))
+    languages: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for info in files:
+        if info["language"]:
+            languages[info["language"]][0] += 1
+            languages[info["language"]][1] += info["code_lines"]
+    code_files = [f for f in files if f["language"] in CODE_LANGUAGES]
+    graph = import_graph(files)
+    tests = test_layout(files)
+    entries = entry_points(files, manifests["scripts"])
+
+    out = [f"# 📊 Relatório da Codebase: {os.path.basename(os.path.abspath(root_dir))}", "",
+           f"_Gerado localmente (sem LLM) em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} por "
+           f"`gerar_relatorio_base.py`._", "",
+           f"**Resumo:** {len(files)} arquivos, {len(code_files)} de código, "
+           f"{sum(f['code_lines'] for f in code_files)} LOC de código, "
+           f"{graph['edges']} imports internos, {tests['test_files']} arquivos de teste.", ""]
+
+    out += ["## 🌲 Estrutura de diretórios", "", "```"]
+    out += directory_tree(files, max_depth=max(1, int(3 * detail + 0.5)), max_children=max(3, int(12 * detail)))
+    out += ["```", ""]
+
+    out += ["## 🗣️ Linguagens (LOC sem linhas em branco)", ""]
+    out += _table(["Linguagem", "Arquivos", "LOC"],
+                  [[lang, n, loc] for lang, (n, loc) in sorted(languages.items(), key=lambda kv: -kv[1][1])][:top])
+    out.append("")
+
+    out += ["## 📦 Dependências e manifestos", ""]
+    for rel, lines in manifests["manifests"].items():
+        out.append(f"**`{rel}`**")
+        out += [f"- {line[:int(600 * detail) + 120]}" for line in lines]
+        out.append("")
+    if manifests["lockfiles"]:
+        out += ["**Lockfiles (conteúdo omitido):**"] + [f"- {line}" for line in manifests["lockfiles"][:top]] + [""]
+    if manifests["others"]:
+        out += [f"**Outros arquivos de build/deploy:** {', '.join(f'`{o}`' for o in manifests['others'][:top])}", ""]
+
+    out += ["## 🚪 Pontos de entrada", ""]
+    out += [f"- {e}" for e in entries[:top]] or ["- (nenhum identificado)"]
+    out.append("")
+
+    out += ["## 🕸️ Grafo de imports", "",
+            f"- Arestas internas: {graph['edges']}"]
+    if graph["fan_in"]:
+        out.append("- Mais importados (fan-in): " + ", ".join(f"`{m}` ({n})" for m, n in graph["fan_in"].most_common(top)))
+    if graph["fan_out"]:
+        out.append("- Mais acoplados (fan-out): " + ", ".join(f"`{m}` ({n})" for m, n in graph["fan_out"].most_common(top)))
+    if graph["external"]:
+        out.append("- Dependências externas mais usadas (fora da stdlib): " + ", ".join(
+            f"`{m}` ({n})" for m, n in graph["external"].most_common(top * 2)))
+    if graph["cycles"]:
+        out.append("- Ciclos diretos: " + ", ".join(f"`{a}` ↔ `{b}`" for a, b in graph["cycles"][:top]))
+    out.append("")
+
+    out += ["## 🏋️ Maiores módulos", ""]
+    out += _table(["Arquivo", "LOC", "Complexidade"],
+                  [[f"`{f['file']}`", f["code_lines"], f["complexity"]]
+                   for f in sorted(code_files, key=lambda f: -f["code_lines"])[:top]])
+    out += ["", "## 🌀 Módulos mais complexos (ramificações + aninhamento)", ""]
+    out += _table(["Arquivo", "Complexidade", "LOC"],
+                  [[f"`{f['file']}`", f["complexity"], f["code_lines"]]
+                   for f in sorted(code_files, key=lambda f: -f["complexity"])[:top] if f["complexity"]])
+    out.append("")
+
+    out += ["## 🧪 Testes", "",
+            f"- Arquivos de teste: {tests['test_files']} ({tests['test_loc']} LOC; "
+            f"razão teste/código: {tests['ratio'] if tests['ratio'] is not None else 'n/a'})"]
+    if tests["frameworks"]:
+        out.append("- Frameworks: " + ", ".join(f"{k} ({n})" for k, n in tests["frameworks"].most_common()))
+    if tests["dirs"]:
+        out.append("- Diretórios: " + ", ".join(f"`{d}` ({n})" for d, n in tests["dirs"].most_common(top)))
+    if tests["configs"]:
+        out.append("- Configuração: " + ", ".join(f"`{c}`" for c in tests["configs"][:top]))
+    if not tests["test_files"]:
+        out.append("- ⚠️ Nenhum teste automatizado encontrado")
+    out.append("")
+    return "\n".join(out)
+
+
+def generate_report(root_dir: str, output: Optional[str] = DEFAULT_OUTPUT, max_tokens: int = DEFAULT_MAX_TOKENS,
+                    max_files: int = 200000, max_size_bytes: int = 1024 * 1024,
+                    workers: Optional[int] = None) -> Tuple[str, Dict]:
+    """🚀 Varre, analisa e grava o relatório base. Retorna (markdown, estatísticas)"""
+    started = time.perf_counter()
+    files = scan_codebase(root_dir, max_files, max_size_bytes, workers)
+    scanned = time.perf_counter()
+    manifests = collect_manifests(root_dir, files)
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    for detail in (1.0, 0.6, 0.35, 0.2):
+        markdown = render_report(root_dir, files, manifests, detail)
+        if len(markdown) <= budget_chars:
+            break
+    if len(markdown) > budget_chars:
+        markdown = markdown[:budget_chars].rsplit("\n", 1)[0] + "\n\n… (truncado no orçamento de tokens)\n"
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(markdown)
+    stats = {"files": len(files), "detail": detail, "tokens": len(markdown) // CHARS_PER_TOKEN,
+             "scan_seconds": round(scanned - started, 2), "total_seconds": round(time.perf_counter() - started, 2)}
+    return markdown, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🧾 Gera relatorio_codebase_turbinado.md localmente (sem LLM)")
+    parser.add_argument("--path", default=".", help="Pasta da codebase")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Arquivo markdown de saída")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="Orçamento de tokens do relatório")
+    parser.add_argument("--max-files", type=int, default=200000, help="Máximo de arquivos varridos")
+    parser.add_argument("--max-size", type=int, default=1024 * 1024, help="Tamanho máximo por arquivo lido (bytes)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de análise (padrão: CPUs)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        parser.error(f"pasta não encontrada: {args.path}")
+    _, stats = generate_report(args.path, args.output, args.max_tokens, args.max_files, args.max_size, args.workers)
+    print(f"✅ {args.output}: {stats['files']} arquivos em {stats['total_seconds']}s "
+          f"(~{stats['tokens']} tokens, detalhe {stats['detail']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
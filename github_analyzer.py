@@ -15,6 +15,8 @@ import shutil
 import argparse
 from urllib.parse import urlparse
 
+from registro_execucao import LOG_MODES, setup_logging
+
 def is_github_url(url: str) -> bool:
     """Verifica se a URL é um repositório GitHub válido"""
     try:
@@ -77,6 +79,12 @@ Exemplos:
     parser.add_argument("--max-files", type=int, default=20, help="Máximo de arquivos a analisar")
     parser.add_argument("--max-size", type=int, default=10_000_000, help="Tamanho máximo por arquivo (bytes)")
     parser.add_argument("--keep-clone", action="store_true", help="Não remove o clone após análise")
+    parser.add_argument("--profile", action="store_true",
+                        help="Gera cProfile, flamegraph (folded), tracemalloc e tempo LLM vs CPU por etapa")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default="normal",
+                        help="throughput: logging assíncrono, mensagens por arquivo amostradas e agentes silenciosos")
+    parser.add_argument("--log-sample", type=int, default=50,
+                        help="No modo throughput, registra 1 a cada N mensagens por arquivo")
     
     args = parser.parse_args()
     
@@ -88,10 +96,18 @@ Exemplos:
     print()
     
     cloned_path = None
+    profiler = None
+    if args.profile:
+        from perfilamento import Profiler
+        profiler = Profiler()
     
     try:
         # 1. Clone do repositório
-        cloned_path = clone_github_repo(args.github_url)
+        if profiler is not None:
+            with profiler.stage("clone"):
+                cloned_path = clone_github_repo(args.github_url)
+        else:
+            cloned_path = clone_github_repo(args.github_url)
         
         # 2. Importa e executa a análise
         print("\n🚀 Iniciando análise com CrewAI...")
@@ -99,13 +115,15 @@ Exemplos:
         # Importa o módulo de análise
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
         from crew_avaliacao_completa import CodebaseAnalysisCrew
+        setup_logging(args.log_mode, sample_every=args.log_sample)
         
         # Executa análise
-        analyzer = CodebaseAnalysisCrew()
+        analyzer = CodebaseAnalysisCrew(agent_verbose=args.log_mode != "throughput")
         output_file = analyzer.run_analysis(
             report_path=cloned_path,
             max_files=args.max_files,
-            max_size_bytes=args.max_size
+            max_size_bytes=args.max_size,
+            profiler=profiler,
         )
         
         print("\\n🎉 Análise concluída com sucesso!")
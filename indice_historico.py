@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+🗄️ Índice Histórico de Relatórios
+================================
+
+Índice de texto completo (SQLite FTS5) sobre os relatórios de execuções
+anteriores: os relatórios por arquivo de ``reports_by_file_*`` e os
+``relatorio_final_*.md``. Cada documento carrega execução, repositório,
+arquivo, modelo e timestamp como facetas. A indexação é incremental: uma
+execução só é (re)indexada quando sua impressão digital (quantidade e mtime
+dos relatórios) muda, e execuções apagadas saem do índice.
+
+Uso: ``python indice_historico.py search "sql injection" --since 2025-07-01
+--group repository``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_DB = os.path.join(".crew_cache", "historico", "relatorios.db")
+TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})")
+FILE_HEADER_RE = re.compile(r"^# Análise do arquivo: (.+)$")
+GROUP_FIELDS = ("repository", "run_id", "model", "file", "kind")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    repository TEXT,
+    started TEXT,
+    model TEXT,
+    reports_dir TEXT,
+    metadata_path TEXT,
+    fingerprint TEXT NOT NULL,
+    documents INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    file TEXT,
+    repository TEXT,
+    model TEXT,
+    started TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_run ON documents(run_id);
+CREATE INDEX IF NOT EXISTS documents_repository ON documents(repository, started);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    body, file, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class RunSource:
+    """📁 Arquivos de uma execução encontrados no disco (agrupados pelo timestamp)"""
+    run_id: str
+    reports_dir: Optional[str] = None
+    metadata_path: Optional[str] = None
+    final_reports: List[str] = field(default_factory=list)
+
+    def fingerprint(self) -> str:
+        """🔏 Quantidade e maior mtime dos relatórios: muda quando a execução ganha ou altera arquivos"""
+        paths = list(self.final_reports) + ([self.metadata_path] if self.metadata_path else [])
+        count, latest = 0, 0.0
+        if self.reports_dir and os.path.isdir(self.reports_dir):
+            with os.scandir(self.reports_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".md") and entry.is_file():
+                        count += 1
+                        latest = max(latest, entry.stat().st_mtime)
+        for path in paths:
+            if os.path.exists(path):
+                count += 1
+                latest = max(latest, os.path.getmtime(path))
+        return f"{count}:{latest:.3f}"
+
+
+def _iso(run_id: str) -> str:
+    """🕒 `20250701_153000` → `2025-07-01T15:30:00`"""
+    d, t = run_id.split("_")
+    return f"{d[:4]}-{d[4:6]}-{d[6:]}T{t[:2]}:{t[2:4]}:{t[4:]}"
+
+
+def _date_bound(value: str, end: bool = False) -> str:
+    """📅 Aceita `2025-07-01`, `20250701` ou ISO completo; `end` vai até o fim do dia"""
+    value = value.strip()
+    if re.fullmatch(r"\d{8}", value):
+        value = f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}(T[\d:]+)?", value):
+        raise ValueError(f"data inválida: {value!r} (use AAAA-MM-DD)")
+    return value + ("T23:59:59" if end and "T" not in value else "")
+
+
+def discover_runs(base_dirs: List[str]) -> Dict[str, RunSource]:
+    """🔍 Encontra execuções (diretórios de relatórios, relatórios finais e metadados) nas pastas base"""
+    runs: Dict[str, RunSource] = {}
+    for base in base_dirs:
+        patterns = {
+            "reports_dir": os.path.join(base, "reports_by_file_*"),
+            "metadata_path": os.path.join(base, "metadata_analise_*.json"),
+            "final_reports": os.path.join(base, "relatorio_final_*.md"),
+        }
+        for attr, pattern in patterns.items():
+            for path in glob.glob(pattern):
+                match = TIMESTAMP_RE.search(os.path.basename(path))
+                if match is None:
+                    continue
+                source = runs.setdefault(match.group(1), RunSource(match.group(1)))
+                if attr == "final_reports":
+                    source.final_reports.append(os.path.abspath(path))
+                elif attr != "reports_dir" or os.path.isdir(path):
+                    setattr(source, attr, os.path.abspath(path))
+    return runs
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _run_facets(source: RunSource) -> Dict:
+    """🏷️ Repositório, modelo e modelo por arquivo a partir dos metadados (quando existem)"""
+    facets: Dict = {"repository": None, "model": None, "file_models": {}}
+    if source.metadata_path:
+        try:
+            with open(source.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = {}
+        root = metadata.get("root_dir") or metadata.get("input_file")
+        if root:
+            facets["repository"] = os.path.basename(os.path.normpath(root))
+        facets["model"] = metadata.get("llm_model")
+        routing = metadata.get("routing") or {}
+        for decision in routing.get("decisions", []):
+            facets["file_models"][decision["file"]] = decision.get("model") or decision.get("tier")
+    if facets["model"] is None and any("gemini" in os.path.basename(p) for p in source.final_reports):
+        facets["model"] = "gemini-2.5-flash"
+    return facets
+
+
+class HistoryIndex:
+    """🗄️ Índice FTS5 dos relatórios históricos com facetas e atualização incremental"""
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Indexação
+    # ------------------------------------------------------------------
+    def _delete_run(self, run_id: str) -> None:
+        self.conn.execute("DELETE FROM documents_fts WHERE rowid IN (SELECT id FROM documents WHERE run_id = ?)",
+                          (run_id,))
+        self.conn.execute("DELETE FROM documents WHERE run_id = ?", (run_id,))
+        self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def _add_document(self, run_id: str, kind: str, path: str, file: Optional[str], body: str,
+                      facets: Dict, model: Optional[str]) -> None:
+        cursor = self.conn.execute(
+            "INSERT INTO documents(run_id, kind, path, file, repository, model, started) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, kind, path, file, facets["repository"], model, _iso(run_id)))
+        self.conn.execute("INSERT INTO documents_fts(rowid, body, file) VALUES (?, ?, ?)",
+                          (cursor.lastrowid, body, file or ""))
+
+    def index_run(self, source: RunSource, fingerprint: Optional[str] = None) -> int:
+        """📥 (Re)indexa uma execução inteira numa transação; retorna o número de documentos"""
+        facets = _run_facets(source)
+        documents = 0
+        with self.conn:
+            self._delete_run(source.run_id)
+            if source.reports_dir and os.path.isdir(source.reports_dir):
+                for path in sorted(glob.glob(os.path.join(source.reports_dir, "*.md"))):
+                    body = _read(path)
+                    header = FILE_HEADER_RE.match(body.split("\n", 1)[0])
+                    file = header.group(1).strip() if header else os.path.basename(path)
+                    model = facets["file_models"].get(file, facets["model"])
+                    self._add_document(source.run_id, "file", path, file, body, facets, model)
+                    documents += 1
+            for path in source.final_reports:
+                self._add_document(source.run_id, "final", path, None, _read(path), facets, facets["model"])
+                documents += 1
+            self.conn.execute(
+                "INSERT INTO runs(run_id, repository, started, model, reports_dir, metadata_path, fingerprint, "
+                "documents, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (source.run_id, facets["repository"], _iso(source.run_id), facets["model"], source.reports_dir,
+                 source.metadata_path, fingerprint or source.fingerprint(), documents, time.time()))
+        return documents
+
+    def _run_on_disk(self, run_id: str) -> bool:
+        """💾 Algum artefato da execução indexada (relatórios, metadados, relatório final) ainda existe"""
+        row = self.conn.execute("SELECT reports_dir, metadata_path FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        paths = [p for p in (row or ()) if p]
+        paths += [r[0] for r in self.conn.execute(
+            "SELECT path FROM documents WHERE run_id = ? AND kind = 'final'", (run_id,))]
+        return any(os.path.exists(p) for p in paths)
+
+    def update(self, base_dirs: Optional[List[str]] = None, prune: bool = True) -> Dict:
+        """🔄 Indexa só execuções novas ou alteradas; com `prune`, remove as que sumiram do disco.
+
+        Execuções de outras bases (fora de `base_dirs`) continuam no índice enquanto seus
+        arquivos existirem.
+        """
+        started = time.perf_counter()
+        sources = discover_runs(base_dirs or [os.getcwd()])
+        known = dict(self.conn.execute("SELECT run_id, fingerprint FROM runs"))
+        stats = {"runs_found": len(sources), "runs_indexed": 0, "documents_indexed": 0, "runs_removed": 0}
+        for run_id, source in sorted(sources.items()):
+            fingerprint = source.fingerprint()
+            if known.get(run_id) == fingerprint:
+                continue
+            stats["documents_indexed"] += self.index_run(source, fingerprint)
+            stats["runs_indexed"] += 1
+        if prune:
+            for run_id in set(known) - set(sources):
+                if self._run_on_disk(run_id):
+                    continue
+                with self.conn:
+                    self._delete_run(run_id)
+                stats["runs_removed"] += 1
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _filters(repository: Optional[str] = None, run_id: Optional[str] = None, model: Optional[str] = None,
+                 kind: Optional[str] = None, file_glob: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None):
+        clauses, params = [], []
+        for column, value in (("d.repository", repository), ("d.run_id", run_id), ("d.model", model),
+                              ("d.kind", kind)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if file_glob is not None:
+            clauses.append("d.file GLOB ?")
+            params.append(file_glob)
+        if since is not None:
+            clauses.append("d.started >= ?")
+            params.append(_date_bound(since))
+        if until is not None:
+            clauses.append("d.started <= ?")
+            params.append(_date_bound(until, end=True))
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def _execute(self, sql: str, query: str, params: List):
+        """▶️ Executa com a sintaxe FTS5 do usuário; se ela for inválida, busca os termos literais"""
+        try:
+            return self.conn.execute(sql, [query] + params).fetchall()
+        except sqlite3.OperationalError:
+            # Ex.: `sql-injection` vira "coluna sql menos injection" na sintaxe FTS5
+            literal = " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+            return self.conn.execute(sql, [literal] + params).fetchall()
+
+    def search(self, query: str, limit: int = 20, **filters) -> List[Dict]:
+        """🔎 Documentos ranqueados por BM25 (nome do arquivo pesa mais) com trecho destacado"""
+        where, params = self._filters(**filters)
+        sql = ("SELECT d.run_id, d.repository, d.started, d.model, d.kind, d.file, d.path, "
+               "bm25(documents_fts, 1.0, 4.0) AS score, "
+               "snippet(documents_fts, 0, '[', ']', ' … ', 16) "
+               "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+               f"WHERE documents_fts MATCH ?{where} ORDER BY score LIMIT ?")
+        rows = self._execute(sql, query, params + [limit])
+        keys = ("run_id", "repository", "started", "model", "kind", "file", "path", "score", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def group(self, query: str, by: str, limit: int = 20, **filters) -> List[Dict]:
+        """📊 Contagem de documentos que casam com a consulta por faceta (ex.: por repositório)"""
+        if by not in GROUP_FIELDS:
+            raise ValueError(f"faceta desconhecida: {by} (use {', '.join(GROUP_FIELDS)})")
+        where, params = self._filters(**filters)
+        # bm25() não pode ser usado dentro de agregação: o ranking é materializado antes do GROUP BY
+        sql = (f"WITH hits AS MATERIALIZED (SELECT d.{by} AS facet, d.run_id AS run_id, d.started AS started, "
+               "bm25(documents_fts, 1.0, 4.0) AS score "
+               "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+               f"WHERE documents_fts MATCH ?{where}) "
+               "SELECT facet, COUNT(*), COUNT(DISTINCT run_id), MIN(score), MAX(started) FROM hits "
+               "GROUP BY facet ORDER BY COUNT(*) DESC LIMIT ?")
+        rows = self._execute(sql, query, params + [limit])
+        return [{by: r[0], "documents": r[1], "runs": r[2], "best_score": r[3], "latest": r[4]} for r in rows]
+
+    def stats(self) -> Dict:
+        runs, documents = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(documents), 0) FROM runs").fetchone()
+        repositories = self.conn.execute("SELECT COUNT(DISTINCT repository) FROM runs").fetchone()[0]
+        span = self.conn.execute("SELECT MIN(started), MAX(started) FROM runs").fetchone()
+        size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        return {"db": self.db_path, "runs": runs, "documents": documents, "repositories": repositories,
+                "first_run": span[0], "last_run": span[1], "db_mb": round(size / 1e6, 2)}
+
+
+def _print_results(results: List[Dict], elapsed_ms: float) -> None:
+    for r in results:
+        where = r["file"] or os.path.basename(r["path"])
+        print(f"[{r['score']:.2f}] {r['repository'] or '?'} · {r['started']} · {where} ({r['kind']}, {r['model'] or '?'})")
+        print(f"    {' '.join(r['snippet'].split())}")
+        print(f"    {r['path']}")
+    print(f"\n🔎 {len(results)} resultado(s) em {elapsed_ms:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🗄️ Índice histórico (FTS5) dos relatórios de análise")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Banco SQLite do índice (padrão: {DEFAULT_DB})")
+    parser.add_argument("--base", action="append", default=None,
+                        help="Pasta com reports_by_file_* e relatorio_final_*.md (repetível; padrão: cwd)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("index", help="Indexa execuções novas ou alteradas")
+    search = sub.add_parser("search", help="Busca nos relatórios (sintaxe FTS5: \"frase\", OR, NOT, prefixo*)")
+    search.add_argument("query")
+    search.add_argument("--repo", default=None, help="Filtra por repositório")
+    search.add_argument("--run", default=None, help="Filtra por execução (timestamp)")
+    search.add_argument("--model", default=None, help="Filtra por modelo")
+    search.add_argument("--kind", choices=("file", "final"), default=None, help="Relatório por arquivo ou final")
+    search.add_argument("--file", default=None, help="Filtra por caminho do arquivo (glob, ex.: 'src/*.py')")
+    search.add_argument("--since", default=None, help="Execuções a partir de AAAA-MM-DD")
+    search.add_argument("--until", default=None, help="Execuções até AAAA-MM-DD")
+    search.add_argument("--group", choices=GROUP_FIELDS, default=None, help="Agrupa as ocorrências por faceta")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--json", action="store_true", help="Saída em JSON")
+    search.add_argument("--no-update", action="store_true", help="Não indexa execuções novas antes de buscar")
+    sub.add_parser("stats", help="Resumo do índice")
+    args = parser.parse_args(argv)
+
+    index = HistoryIndex(args.db)
+    try:
+        if args.command == "index":
+            print(json.dumps(index.update(args.base), indent=2))
+        elif args.command == "stats":
+            print(json.dumps(index.stats(), indent=2, ensure_ascii=False))
+        else:
+            if not args.no_update:
+                update = index.update(args.base)
+                if update["runs_indexed"] or update["runs_removed"]:
+                    print(f"🔄 {update['runs_indexed']} execução(ões) indexada(s), "
+                          f"{update['runs_removed']} removida(s) em {update['seconds']}s")
+            filters = dict(repository=args.repo, run_id=args.run, model=args.model, kind=args.kind,
+                           file_glob=args.file, since=args.since, until=args.until)
+            try:
+                started = time.perf_counter()
+                if args.group:
+                    results = index.group(args.query, args.group, args.limit, **filters)
+                else:
+                    results = index.search(args.query, args.limit, **filters)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            except ValueError as e:
+                parser.error(str(e))
+            if args.json:
+                print(json.dumps(results, indent=2, ensure_ascii=False))
+            elif args.group:
+                for r in results:
+                    print(f"{r[args.group] or '?'}: {r['documents']} documento(s) em {r['runs']} execução(ões), "
+                          f"última em {r['latest']}")
+                print(f"\n📊 {len(results)} grupo(s) em {elapsed_ms:.1f} ms")
+            else:
+                _print_results(results, elapsed_ms)
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+🔎 Índice Local de Recuperação
+=============================
+
+Índice TF-IDF com vetores de hashing (NumPy puro, sem vocabulário) sobre trechos
+dos relatórios por arquivo e do código-fonte. É persistido em disco e atualizado
+incrementalmente: documentos cujo hash não mudou não são re-indexados.
+
+Cada especialista consulta o índice com sua própria query e recebe apenas os
+top-k trechos relevantes dentro de um orçamento de tokens, mantendo os prompts
+pequenos mesmo em codebases enormes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+HASH_DIM = 1 << 20
+TOKEN_RE = re.compile(r"[A-Za-zÀ-ÿ_][A-Za-zÀ-ÿ0-9_]+")
+CHARS_PER_TOKEN = 4
+
+# Queries por papel: termos que indicam evidência relevante para cada especialista
+ROLE_QUERIES = {
+    "arquiteto": "architecture arquitetura module class service layer dependency import api integration "
+                 "pattern factory repository coupling acoplamento scalability escalabilidade",
+    "qa_engineer": "test tests pytest unittest mock coverage cobertura assert bug exception error "
+                   "security vulnerability vulnerabilidade ci pipeline logging",
+    "documentador": "readme docs documentation documentação docstring usage uso install instalação "
+                    "example exemplo guide setup configuration",
+    "product_manager": "user usuário feature funcionalidade cli command comando endpoint product produto "
+                       "pricing billing customer cliente workflow fluxo",
+    "especialista_legal": "personal pessoal data dados email cpf phone telefone address endereço password "
+                          "senha consent consentimento privacy privacidade lgpd gdpr cookie tracking "
+                          "license licença terms termos",
+    "engenheiro_ia": "llm gemini openai anthropic prompt model modelo generate_content completion "
+                     "embedding crewai agent agente token rag inference",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """✂️ Tokeniza texto/código, quebrando também snake_case e camelCase"""
+    tokens = []
+    for raw in TOKEN_RE.findall(text):
+        low = raw.lower()
+        tokens.append(low)
+        parts = [p for p in re.split(r"_|(?<=[a-z])(?=[A-Z])", raw) if p]
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) > 1)
+    return tokens
+
+
+def _hash_tokens(tokens: List[str]) -> np.ndarray:
+    """#️⃣ Mapeia tokens para índices estáveis no espaço de hashing"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little") % HASH_DIM
+         for t in tokens),
+        dtype=np.int64,
+        count=len(tokens),
+    )
+
+
+def _vectorize(text: str):
+    """📐 Retorna (índices, contagens) esparsos de um texto"""
+    hashed = _hash_tokens(tokenize(text))
+    if hashed.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    idx, counts = np.unique(hashed, return_counts=True)
+    return idx, counts.astype(np.float32)
+
+
+def chunk_text(text: str, chunk_tokens: int = 300) -> List[Dict]:
+    """🧩 Quebra o texto em trechos por linhas de ~chunk_tokens tokens"""
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    chunks = []
+    buf: List[str] = []
+    size = 0
+    start = 1
+    for lineno, line in enumerate(text.splitlines(), 1):
+        if buf and size + len(line) > max_chars:
+            chunks.append({"start_line": start, "end_line": lineno - 1, "text": "\n".join(buf)})
+            buf, size, start = [], 0, lineno
+        buf.append(line[:max_chars])
+        size += len(line) + 1
+    if buf and any(l.strip() for l in buf):
+        chunks.append({"start_line": start, "end_line": start + len(buf) - 1, "text": "\n".join(buf)})
+    return chunks
+
+
+class RetrievalIndex:
+    """📚 Índice TF-IDF (hashing) persistente e incremental"""
+
+    def __init__(self, index_dir: Optional[str] = None, chunk_tokens: int = 300):
+        self.index_dir = index_dir
+        self.chunk_tokens = chunk_tokens
+        self.doc_hashes: Dict[str, str] = {}
+        self.chunks: List[Dict] = []
+        self._indices: List[np.ndarray] = []
+        self._counts: List[np.ndarray] = []
+        # Matriz de consulta (linhas, termos, pesos TF-IDF, normas) montada sob demanda em `search`
+        # e descartada a cada alteração do índice
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        if index_dir and os.path.exists(os.path.join(index_dir, "meta.json")):
+            self._load()
+
+    # ----- persistência -----
+    def _load(self) -> None:
+        with open(os.path.join(self.index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.doc_hashes = meta["doc_hashes"]
+        self.chunks = meta["chunks"]
+        arrays = np.load(os.path.join(self.index_dir, "vectors.npz"))
+        indptr = arrays["indptr"]
+        self._indices = np.split(arrays["indices"], indptr[1:-1]) if len(indptr) > 1 else []
+        self._counts = np.split(arrays["counts"], indptr[1:-1]) if len(indptr) > 1 else []
+        self._matrix = None
+
+    def save(self) -> None:
+        """💾 Persiste o índice em disco (meta.json + vectors.npz)"""
+        if not self.index_dir:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        lengths = np.array([len(i) for i in self._indices], dtype=np.int64)
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        np.savez(
+            os.path.join(self.index_dir, "vectors.npz"),
+            indptr=indptr,
+            indices=np.concatenate(self._indices) if self._indices else np.empty(0, dtype=np.int64),
+            counts=np.concatenate(self._counts) if self._counts else np.empty(0, dtype=np.float32),
+        )
+        with open(os.path.join(self.index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"doc_hashes": self.doc_hashes, "chunks": self.chunks}, f, ensure_ascii=False)
+
+    # ----- atualização incremental -----
+    def add_document(self, doc_id: str, text: str, kind: str = "report", source: Optional[str] = None) -> bool:
+        """➕ Indexa (ou re-indexa) um documento; retorna False se o conteúdo não mudou"""
+        digest = hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+        if self.doc_hashes.get(doc_id) == digest:
+            return False
+        if doc_id in self.doc_hashes:
+            self.remove_document(doc_id)
+        for chunk in chunk_text(text, self.chunk_tokens):
+            idx, counts = _vectorize(chunk["text"])
+            if idx.size == 0:
+                continue
+            self.chunks.append({"doc_id": doc_id, "kind": kind, "source": source or doc_id, **chunk})
+            self._indices.append(idx)
+            self._counts.append(counts)
+        self.doc_hashes[doc_id] = digest
+        self._matrix = None
+        return True
+
+    def remove_document(self, doc_id: str) -> None:
+        """➖ Remove todos os trechos de um documento"""
+        self._drop({doc_id})
+
+    def _drop(self, doc_ids: Set[str]) -> None:
+        keep = [i for i, c in enumerate(self.chunks) if c["doc_id"] not in doc_ids]
+        self.chunks = [self.chunks[i] for i in keep]
+        self._indices = [self._indices[i] for i in keep]
+        self._counts = [self._counts[i] for i in keep]
+        for doc_id in doc_ids:
+            self.doc_hashes.pop(doc_id, None)
+        self._matrix = None
+
+    def prune(self, keep: Set[str], prefixes: Tuple[str, ...] = ("report:", "source:")) -> int:
+        """🧹 Remove documentos com os prefixos dados que não estão em `keep`; retorna quantos saíram"""
+        stale = {d for d in self.doc_hashes if d.startswith(prefixes) and d not in keep}
+        if stale:
+            self._drop(stale)
+        return len(stale)
+
+    def prune_missing(self, exists: Callable[[str], bool],
+                      prefixes: Tuple[str, ...] = ("report:", "source:")) -> int:
+        """🧹 Remove documentos de arquivos que não existem mais (apagados ou renomeados).
+
+        `exists` recebe o caminho relativo (o que vem depois de `prefixo:`). Arquivos que só não
+        foram visitados nesta execução (`max_files`, execução parcial) continuam no índice.
+        """
+        stale = {d for d in self.doc_hashes if d.startswith(prefixes) and not exists(d.split(":", 1)[1])}
+        if stale:
+            self._drop(stale)
+        return len(stale)
+
+    def _query_matrix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if self._matrix is None:
+            n = len(self.chunks)
+            lengths = np.array([len(i) for i in self._indices], dtype=np.int64)
+            rows = np.repeat(np.arange(n), lengths)
+            indices = np.concatenate(self._indices)
+            tf = np.log1p(np.concatenate(self._counts))
+            # TF-IDF suavizado: idf de todos os termos para normalizar os trechos (cosseno)
+            _, inverse, df = np.unique(indices, return_inverse=True, return_counts=True)
+            weights = tf * (np.log((1 + n) / (1 + df)) + 1.0)[inverse]
+            norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+            self._matrix = (rows, indices, weights, norms)
+        return self._matrix
+
+    # ----- consulta -----
+    def search(self, query: str, top_k: int = 8, token_budget: int = 3000,
+               kinds: Optional[List[str]] = None, sources: Optional[Set[str]] = None) -> List[Dict]:
+        """🎯 Retorna os top-k trechos mais relevantes que cabem no orçamento de tokens"""
+        n = len(self.chunks)
+        q_idx, q_counts = _vectorize(query)
+        if n == 0 or q_idx.size == 0:
+            return []
+
+        rows, indices, weights, norms = self._query_matrix()
+        mask = np.isin(indices, q_idx)
+        term_pos = np.searchsorted(q_idx, indices[mask])
+        q_df = np.bincount(term_pos, minlength=q_idx.size)
+        q_weights = np.log1p(q_counts) * (np.log((1 + n) / (1 + q_df)) + 1.0)
+        scores = np.bincount(rows[mask], weights=weights[mask] * q_weights[term_pos], minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(norms > 0, scores / norms, 0.0)
+
+        if kinds or sources:
+            allowed = np.array([(not kinds or c["kind"] in kinds) and (not sources or c["source"] in sources)
+                                for c in self.chunks])
+            scores = np.where(allowed, scores, 0.0)
+
+        results = []
+        used = 0
+        for i in np.argsort(-scores, kind="stable"):
+            if scores[i] <= 0 or len(results) >= top_k:
+                break
+            cost = len(self.chunks[i]["text"]) // CHARS_PER_TOKEN + 1
+            if used + cost > token_budget:
+                continue
+            used += cost
+            results.append({**self.chunks[i], "score": round(float(scores[i]), 4)})
+        return results
+
+    def evidence_for_role(self, role: str, top_k: int = 8, token_budget: int = 3000,
+                          extra_query: str = "", sources: Optional[Set[str]] = None) -> List[Dict]:
+        """👤 Consulta o índice com a query padrão do especialista (opcionalmente só em `sources`)"""
+        return self.search(f"{ROLE_QUERIES.get(role, role)} {extra_query}", top_k, token_budget,
+                           sources=sources)
+
+
+def format_evidence(chunks: List[Dict]) -> str:
+    """📝 Formata trechos recuperados para anexar ao prompt"""
+    if not chunks:
+        return "_(nenhum trecho relevante encontrado no índice)_"
+    parts = []
+    for c in chunks:
+        parts.append(f"**{c['source']}** ({c['kind']}, linhas {c['start_line']}-{c['end_line']}):\n"
+                     f"```\n{c['text']}\n```")
+    return "\n\n".join(parts)
+
+
+def default_index_dir(root_dir: str, base_dir: Optional[str] = None) -> str:
+    """📁 Diretório padrão do índice para uma raiz de codebase"""
+    key = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base_dir or os.getcwd(), ".crew_cache", "retrieval", key)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+🗂️ Inventário Compacto de Arquivos
+=================================
+
+Representação colunar do inventário de uma execução para árvores com
+milhões de arquivos, no lugar de um dict por arquivo:
+
+- prefixos de diretório internados (cada diretório é guardado uma vez e os
+  arquivos guardam só o índice);
+- nomes num único blob UTF-8 com offsets;
+- colunas ``array`` (na construção) e NumPy (na leitura) para tamanho, mtime,
+  hashes, importância, flags e scores;
+- registros com ``__slots__`` apenas quando um objeto é pedido (``record``);
+- forma em disco (``.npy`` + blob) que os workers abrem com ``mmap`` e
+  compartilham sem cópia.
+
+``python inventario.py --benchmark 1000000`` compara a memória com a lista de
+dicts equivalente.
+"""
+
+import argparse
+import array
+import hashlib
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from resultados_estruturados import SCORE_KEYS
+
+INVENTORY_VERSION = 1
+
+# Bits da coluna `flags`
+FLAG_ANALYZED = 1
+FLAG_CACHED = 2
+FLAG_ERROR = 4
+FLAG_LOCAL = 8
+
+# coluna -> (dtype NumPy, typecode do `array` com o mesmo layout)
+COLUMNS = {
+    "dir_id": (np.uint32, "I"),
+    "name_end": (np.uint64, "Q"),  # fim do nome no blob; o início é o fim do anterior
+    "size": (np.int64, "q"),
+    "mtime": (np.float64, "d"),
+    "content_hash": (np.uint64, "Q"),  # 0 = desconhecido
+    "path_hash": (np.uint64, "Q"),
+    "importance": (np.float32, "f"),
+    "flags": (np.uint8, "B"),
+}
+NAN = float("nan")
+
+
+def hash64(data: bytes) -> int:
+    """🔑 Hash de 64 bits (blake2b) usado para caminhos e conteúdos"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little") or 1
+
+
+class InventoryRecord:
+    """📄 Visão de uma linha do inventário (criada sob demanda)"""
+    __slots__ = ("index", "rel_path", "size", "mtime", "content_hash", "importance", "flags", "scores")
+
+    def __init__(self, index: int, rel_path: str, size: int, mtime: float, content_hash: int,
+                 importance: float, flags: int, scores: Dict[str, Optional[float]]):
+        self.index = index
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime = mtime
+        self.content_hash = content_hash
+        self.importance = importance
+        self.flags = flags
+        self.scores = scores
+
+    def __repr__(self) -> str:
+        return f"InventoryRecord({self.index}, {self.rel_path!r}, size={self.size})"
+
+
+class FileInventory:
+    """🗂️ Inventário colunar: diretórios internados, nomes num blob e colunas `array`/NumPy.
+
+    Em construção as colunas são `array.array` (append barato, sem objeto por linha); um
+    inventário aberto com `load(mmap=True)` tem colunas NumPy mapeadas e é somente leitura.
+    Os scores ficam numa coluna achatada (`len(SCORE_KEYS)` valores por arquivo, NaN = ausente).
+    """
+
+    def __init__(self):
+        self.dirs: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self._names = bytearray()
+        self.columns: Dict = {name: array.array(typecode) for name, (_, typecode) in COLUMNS.items()}
+        self.scores = array.array("f")
+        self.count = 0
+        self.read_only = False
+        # Índice de busca de `find`: ordem dos hashes de caminho e os hashes já ordenados
+        self._order: Optional[np.ndarray] = None
+        self._sorted_hashes: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _dir_id(self, directory: str) -> int:
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self.dirs)
+            self.dirs.append(directory)
+        return dir_id
+
+    def add(self, rel_path: str, size: int = 0, mtime: float = 0.0, content_hash: int = 0,
+            importance: float = 0.0, flags: int = 0) -> int:
+        """➕ Acrescenta um arquivo e retorna seu índice"""
+        if self.read_only:
+            raise ValueError("inventário aberto somente para leitura (mmap)")
+        rel_path = rel_path.replace("\\", "/")
+        directory, _, name = rel_path.rpartition("/")
+        i = self.count
+        self._names += name.encode("utf-8")
+        c = self.columns
+        c["dir_id"].append(self._dir_id(directory))
+        c["name_end"].append(len(self._names))
+        c["size"].append(size)
+        c["mtime"].append(mtime)
+        c["content_hash"].append(content_hash)
+        c["path_hash"].append(hash64(rel_path.encode("utf-8")))
+        c["importance"].append(importance)
+        c["flags"].append(flags)
+        self.scores.extend((NAN,) * len(SCORE_KEYS))
+        self.count += 1
+        self._order = self._sorted_hashes = None
+        return i
+
+    def add_file(self, root_dir: str, rel_path: str, content: Optional[str] = None, **kwargs) -> int:
+        """📄 Acrescenta um arquivo lendo tamanho e mtime do disco (hash do conteúdo, se informado)"""
+        try:
+            stat = os.stat(os.path.join(root_dir, rel_path))
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            # Membro de arquivo compactado (ou arquivo removido): tamanho pelo conteúdo
+            size, mtime = (len(content.encode("utf-8", errors="ignore")) if content is not None else 0), 0.0
+        content_hash = hash64(content.encode("utf-8", errors="ignore")) if content is not None else 0
+        return self.add(rel_path, size, mtime, content_hash, **kwargs)
+
+    def set_scores(self, i: int, scores: Dict[str, Optional[float]]) -> None:
+        width = len(SCORE_KEYS)
+        self.scores[i * width:(i + 1) * width] = array.array(
+            "f", [NAN if scores.get(k) is None else float(scores[k]) for k in SCORE_KEYS])
+
+    def set_flags(self, i: int, flags: int) -> None:
+        self.columns["flags"][i] |= flags
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, name: str) -> np.ndarray:
+        """🔢 Coluna como array NumPy (cópia em construção; visão sem cópia quando mapeada)"""
+        column = self.columns[name]
+        if isinstance(column, array.array):
+            return np.array(column, dtype=COLUMNS[name][0])
+        return column[: self.count]
+
+    def score_matrix(self) -> np.ndarray:
+        """📊 Scores como matriz (arquivos × SCORE_KEYS), NaN onde não há score"""
+        scores = np.array(self.scores, dtype=np.float32) if isinstance(self.scores, array.array) else self.scores
+        return scores.reshape(-1, len(SCORE_KEYS))[: self.count]
+
+    def path(self, i: int) -> str:
+        end = int(self.columns["name_end"][i])
+        start = int(self.columns["name_end"][i - 1]) if i > 0 else 0
+        name = bytes(self._names[start:end]).decode("utf-8")
+        directory = self.dirs[int(self.columns["dir_id"][i])]
+        return f"{directory}/{name}" if directory else name
+
+    def paths(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        for i in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.path(i)
+
+    def find(self, rel_path: str) -> Optional[int]:
+        """🔍 Índice de um caminho via busca binária na coluna de hashes (sem dict por arquivo)"""
+        rel_path = rel_path.replace("\\", "/")
+        if self._order is None or len(self._order) != self.count:
+            # Montado uma vez por versão do inventário; `add` invalida
+            hashes = self.column("path_hash")
+            self._order = np.argsort(hashes, kind="stable")
+            self._sorted_hashes = hashes[self._order]
+        sorted_hashes = self._sorted_hashes
+        # Escalar do mesmo dtype: com um int do Python, o searchsorted converteria o array inteiro
+        target = sorted_hashes.dtype.type(hash64(rel_path.encode("utf-8")))
+        pos = int(np.searchsorted(sorted_hashes, target))
+        while pos < len(sorted_hashes) and sorted_hashes[pos] == target:
+            i = int(self._order[pos])
+            if self.path(i) == rel_path:
+                return i
+            pos += 1
+        return None
+
+    def record(self, i: int) -> InventoryRecord:
+        c = self.columns
+        width = len(SCORE_KEYS)
+        scores = self.scores[i * width:(i + 1) * width]
+        return InventoryRecord(
+            i, self.path(i), int(c["size"][i]), float(c["mtime"][i]), int(c["content_hash"][i]),
+            float(c["importance"][i]), int(c["flags"][i]),
+            {k: (None if v != v else float(v)) for k, v in zip(SCORE_KEYS, scores)},
+        )
+
+    def top(self, key: str, k: int = 10, ascending: bool = False) -> List[Tuple[str, float]]:
+        """🏆 Ranking por coluna (`size`, `importance`...) ou score (`quality`, `security`...)"""
+        values = (self.score_matrix()[:, SCORE_KEYS.index(key)] if key in SCORE_KEYS
+                  else self.column(key)).astype(np.float64)
+        valid = np.flatnonzero(~np.isnan(values))
+        order = valid[np.argsort(values[valid] if ascending else -values[valid], kind="stable")[:k]]
+        return [(self.path(int(i)), float(values[i])) for i in order]
+
+    def duplicates(self) -> List[List[str]]:
+        """👯 Grupos de arquivos com o mesmo hash de conteúdo"""
+        hashes = self.column("content_hash")
+        known = np.flatnonzero(hashes)
+        _, inverse, counts = np.unique(hashes[known], return_inverse=True, return_counts=True)
+        groups = []
+        for group in np.flatnonzero(counts > 1):
+            groups.append([self.path(int(i)) for i in known[inverse == group]])
+        return groups
+
+    def nbytes(self) -> int:
+        """📏 Memória das colunas, blob de nomes e diretórios (aproximada para os diretórios)"""
+        columns = sum(self.count * np.dtype(dtype).itemsize for dtype, _ in COLUMNS.values())
+        return columns + self.count * len(SCORE_KEYS) * 4 + len(self._names) + sum(len(d) + 50 for d in self.dirs)
+
+    def summary(self) -> Dict:
+        """📊 Tamanho do inventário e indicadores baratos (para os metadados)"""
+        return {
+            "files": self.count,
+            "directories": len(self.dirs),
+            "total_bytes": int(self.column("size").sum()),
+            "memory_bytes": self.nbytes(),
+            "duplicate_groups": len(self.duplicates()),
+        }
+
+    # ------------------------------------------------------------------
+    # Disco (mmap)
+    # ------------------------------------------------------------------
+    def save(self, out_dir: str) -> str:
+        """💾 Grava colunas `.npy`, blob de nomes e diretórios em `out_dir` (abrível com mmap)"""
+        os.makedirs(out_dir, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(out_dir, f"{name}.npy"), self.column(name))
+        np.save(os.path.join(out_dir, "scores.npy"), self.score_matrix())
+        with open(os.path.join(out_dir, "nomes.bin"), "wb") as f:
+            f.write(self._names)
+        with open(os.path.join(out_dir, "diretorios.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": INVENTORY_VERSION, "count": self.count, "score_keys": SCORE_KEYS,
+                       "dirs": self.dirs}, f, ensure_ascii=False)
+        return out_dir
+
+    @classmethod
+    def load(cls, out_dir: str, mmap: bool = True) -> "FileInventory":
+        """📂 Abre um inventário salvo; com `mmap`, as páginas são compartilhadas entre processos"""
+        with open(os.path.join(out_dir, "diretorios.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INVENTORY_VERSION or meta.get("score_keys") != SCORE_KEYS:
+            raise ValueError(f"inventário incompatível em {out_dir}")
+        inv = cls()
+        mode = "r" if mmap else None
+        inv.columns = {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS}
+        inv.scores = np.load(os.path.join(out_dir, "scores.npy"), mmap_mode=mode).reshape(-1)
+        names_path = os.path.join(out_dir, "nomes.bin")
+        if mmap and os.path.getsize(names_path):
+            inv._names = np.memmap(names_path, dtype=np.uint8, mode="r")
+        else:
+            with open(names_path, "rb") as f:
+                inv._names = bytearray(f.read())
+        inv.dirs = meta["dirs"]
+        inv._dir_ids = {d: i for i, d in enumerate(inv.dirs)}
+        inv.count = meta["count"]
+        inv.read_only = mmap
+        if not mmap:
+            # Volta às colunas `array` para permitir novos `add`
+            inv.columns = {name: array.array(typecode, inv.columns[name].tobytes())
+                           for name, (_, typecode) in COLUMNS.items()}
+            inv.scores = array.array("f", inv.scores.astype(np.float32).tobytes())
+        return inv
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+def _synthetic_paths(n: int) -> Iterator[str]:
+    for i in range(n):
+        yield f"services/svc_{i % 500:03d}/src/module_{i % 37:02d}/handlers/file_{i:07d}.py"
+
+
+SAMPLE_SCORES = {"quality": 70.0, "security": 80.0, "complexity": 30.0, "test_coverage": None}
+
+
+def _build_dicts(n: int) -> List[Dict]:
+    return [{"file": p, "size": 1234, "mtime": 1.7e9, "content_hash": 0xDEADBEEF, "importance": 0.5,
+             "flags": 0, "scores": dict(SAMPLE_SCORES)} for p in _synthetic_paths(n)]
+
+
+def _build_inventory(n: int) -> FileInventory:
+    inv = FileInventory()
+    for i, p in enumerate(_synthetic_paths(n)):
+        inv.add(p, 1234, 1.7e9, 0xDEADBEEF, 0.5)
+        inv.set_scores(i, SAMPLE_SCORES)
+    return inv
+
+
+def _measure(build, n: int):
+    """⏱️ Tempo (sem tracemalloc, que distorce o tempo) e memória retida (com tracemalloc)"""
+    started = time.perf_counter()
+    build(n)
+    seconds = round(time.perf_counter() - started, 2)
+    tracemalloc.start()
+    result = build(n)
+    mb = round(tracemalloc.get_traced_memory()[0] / 1e6, 1)
+    tracemalloc.stop()
+    return result, seconds, mb
+
+
+def benchmark(n: int = 1_000_000, out_dir: Optional[str] = None) -> Dict:
+    """🏁 Memória e tempo do inventário versus a lista de dicts equivalente"""
+    results: Dict = {"entries": n}
+    as_dicts, results["dicts_seconds"], results["dicts_mb"] = _measure(_build_dicts, n)
+    del as_dicts
+    # A memória do inventário inclui a folga de capacidade das colunas `array`
+    inv, results["inventory_seconds"], results["inventory_mb"] = _measure(_build_inventory, n)
+    results["bytes_per_entry"] = {"dicts": round(results["dicts_mb"] * 1e6 / n),
+                                  "inventory": round(results["inventory_mb"] * 1e6 / n)}
+
+    if out_dir:
+        inv.save(out_dir)
+        started = time.perf_counter()
+        loaded = FileInventory.load(out_dir, mmap=True)
+        probe = loaded.path(n // 2)
+        results["mmap_load_seconds"] = round(time.perf_counter() - started, 4)
+        results["disk_mb"] = round(sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir)) / 1e6, 1)
+        started = time.perf_counter()
+        assert loaded.find(probe) == n // 2
+        results["find_seconds"] = round(time.perf_counter() - started, 3)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🗂️ Inventário compacto de arquivos")
+    parser.add_argument("--benchmark", type=int, default=None, metavar="N",
+                        help="Compara memória e tempo com a lista de dicts para N entradas")
+    parser.add_argument("--out", default=None, help="Diretório para gravar o inventário do benchmark (mmap)")
+    parser.add_argument("--show", default=None, metavar="DIR", help="Resume um inventário salvo")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        print(json.dumps(benchmark(args.benchmark, args.out), indent=2))
+    elif args.show:
+        inv = FileInventory.load(args.show)
+        print(json.dumps({**inv.summary(), "largest": inv.top("size", 10)}, indent=2, ensure_ascii=False))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
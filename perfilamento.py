@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+🔬 Perfilamento por Etapa (--profile)
+====================================
+
+Ganchos de profiling usados pelos pontos de entrada com ``--profile``. Cada
+etapa (varredura, análise por arquivo, consolidação, clone...) gera:
+
+- ``<etapa>.prof``: cProfile (abra com ``snakeviz`` ou ``python -m pstats``);
+- ``<etapa>.folded``: pilhas amostradas de todas as threads no formato
+  "collapsed" (``flamegraph.pl`` ou importe direto no speedscope);
+- ``<etapa>_memoria.txt``: diferença de snapshots do ``tracemalloc`` e pico
+  (etapas marcadas com ``memory=True``).
+
+O resumo ``perfil_resumo.json`` separa, por etapa, tempo de parede, CPU do
+processo e tempo bloqueado esperando o LLM.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+MAX_STACK_DEPTH = 64
+
+
+class StackSampler:
+    """🧵 Amostra as pilhas de todas as threads em intervalos fixos (formato folded)"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """🔬 Coleta cProfile, amostras de pilha, tracemalloc e tempo de CPU/LLM por etapa"""
+
+    def __init__(self, out_dir: Optional[str] = None, io_clock: Optional[Callable[[], float]] = None,
+                 sample_interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.out_dir = out_dir
+        # True quando `out_dir` veio do padrão (`perfil_<ts>` no cwd) e ainda pode ser realocado
+        self.dir_is_default = False
+        self.io_clock = io_clock
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, Dict] = {}
+        self._active = 0
+
+    def set_output_dir(self, out_dir: str) -> None:
+        """📁 Define o diretório da execução
+
+        Etapas que já gravaram no diretório padrão (ex.: o clone do `github_analyzer.py`, antes de
+        existir a pasta de relatórios) têm seus arquivos movidos para `out_dir`.
+        """
+        previous = self.out_dir if self.dir_is_default else None
+        self.out_dir = out_dir
+        self.dir_is_default = False
+        if previous is None or not os.path.isdir(previous) \
+                or os.path.abspath(previous) == os.path.abspath(out_dir):
+            return
+        os.makedirs(out_dir, exist_ok=True)
+        for name in os.listdir(previous):
+            shutil.move(os.path.join(previous, name), os.path.join(out_dir, name))
+        try:
+            os.rmdir(previous)
+        except OSError:
+            pass
+        for stats in self.stages.values():
+            for key in ("cprofile", "folded", "memory_report"):
+                if stats.get(key):
+                    stats[key] = os.path.join(out_dir, os.path.basename(stats[key]))
+
+    def _dir(self) -> str:
+        if self.out_dir is None:
+            self.out_dir = os.path.join(os.getcwd(), f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            self.dir_is_default = True
+        os.makedirs(self.out_dir, exist_ok=True)
+        return self.out_dir
+
+    @contextmanager
+    def stage(self, name: str, memory: bool = False) -> Iterator[None]:
+        """⏱️ Perfila uma etapa. Etapas aninhadas só registram tempos (cProfile não aninha)"""
+        nested = self._active > 0
+        self._active += 1
+        profile = sampler = None
+        started_tracemalloc = False
+        snapshot_before = None
+        if not nested:
+            profile = cProfile.Profile()
+            sampler = StackSampler(self.sample_interval)
+            sampler.start()
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            tracemalloc.reset_peak()
+            snapshot_before = tracemalloc.take_snapshot()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        io0 = self.io_clock() if self.io_clock else 0.0
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            io_blocked = (self.io_clock() - io0) if self.io_clock else None
+            self._active -= 1
+            stats = {
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(cpu, 3),
+                "llm_blocked_seconds": round(io_blocked, 3) if io_blocked is not None else None,
+                "nested": nested,
+            }
+            out_dir = self._dir()
+            if profile is not None:
+                sampler.stop()
+                prof_path = os.path.join(out_dir, f"{name}.prof")
+                profile.dump_stats(prof_path)
+                folded_path = os.path.join(out_dir, f"{name}.folded")
+                sampler.write_folded(folded_path)
+                buf = io.StringIO()
+                pstats.Stats(profile, stream=buf).sort_stats("cumulative").print_stats(15)
+                stats.update({"cprofile": prof_path, "folded": folded_path, "stack_samples": sampler.samples,
+                              "top_cumulative": buf.getvalue().strip().splitlines()[-20:]})
+            if snapshot_before is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                diff = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")
+                mem_path = os.path.join(out_dir, f"{name}_memoria.txt")
+                with open(mem_path, "w", encoding="utf-8") as f:
+                    f.write(f"# {name}: pico {peak / 1e6:.1f} MB, atual {current / 1e6:.1f} MB\n")
+                    for entry in diff[:30]:
+                        f.write(f"{entry}\n")
+                stats.update({"memory_peak_mb": round(peak / 1e6, 2), "memory_report": mem_path})
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            self.stages[name] = stats
+
+    def summary(self) -> Dict:
+        """📊 Tempo de parede, CPU e espera do LLM por etapa"""
+        return {"output_dir": self.out_dir, "stages": self.stages}
+
+    def write_summary(self) -> str:
+        """💾 Salva `perfil_resumo.json` no diretório da execução e retorna o caminho"""
+        path = os.path.join(self._dir(), "perfil_resumo.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+@contextmanager
+def maybe_stage(profiler: Optional[Profiler], name: str, memory: bool = False) -> Iterator[None]:
+    """🔬 `profiler.stage(...)` quando houver profiler; senão, não faz nada"""
+    if profiler is None:
+        yield
+    else:
+        with profiler.stage(name, memory=memory):
+            yield
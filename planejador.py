@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+🧮 Planejador de Execução (dry-run)
+==================================
+
+Estima, sem nenhuma chamada de rede, o custo de um ``run_analysis``: tokens de
+prompt e de resposta por arquivo, número de chamadas ao LLM (incluindo
+escaladas do roteador e consolidação), tempo de parede sob a concorrência e o
+rate limit configurados e custo por modelo. Mostra os maiores contribuintes
+para ajustar ``max_files``, ``max_size_bytes`` e exclusões antes de pagar.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from analise_simbolos import plan_units
+from compressao_prompt import PromptCompressor
+from consolidacao_incremental import SummaryTree
+from resultados_estruturados import STRUCTURED_OUTPUT_INSTRUCTIONS
+from roteador_modelos import ModelRouter
+from roteamento_especialistas import SpecialistClassifier
+from varredura import MAX_CHARS, is_archive, iter_files
+
+CHARS_PER_TOKEN = 4
+# System prompt do agente (role/goal/backstory) + moldura do CrewAI + instruções da task
+FILE_PROMPT_OVERHEAD_TOKENS = 900 + len(STRUCTURED_OUTPUT_INSTRUCTIONS) // CHARS_PER_TOKEN
+SPECIALIST_PROMPT_OVERHEAD_TOKENS = 1200
+CONSOLIDATION_OVERHEAD_TOKENS = 1500
+DIRECTORY_SUMMARY_OVERHEAD_TOKENS = 500
+# Entrada compacta de um arquivo no resumo do diretório (`file_digest`: resumo, scores, 3 achados)
+FILE_DIGEST_ESTIMATE_CHARS = 400
+
+# Estimativas de resposta (tokens) e latência média (s) por nível
+COMPLETION_TOKENS = {"lite": 700, "full": 1200, "specialist": 2000, "consolidation": 4000,
+                     "directory_summary": 400}
+DEFAULT_LATENCY_SECONDS = {"lite": 6.0, "full": 15.0, "specialist": 30.0, "consolidation": 60.0,
+                           "directory_summary": 8.0}
+
+# USD por 1M tokens (entrada, saída); sobrescreva com um JSON via `prices_path`
+DEFAULT_PRICES = {
+    "gemini/gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+    "gemini/gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40},
+    "gemini/gemini-2.5-pro": {"input": 1.25, "output": 10.00},
+}
+
+
+def estimate_tokens(text_or_len) -> int:
+    """🔢 Estimativa rápida de tokens (~4 chars por token)"""
+    length = text_or_len if isinstance(text_or_len, int) else len(text_or_len)
+    return length // CHARS_PER_TOKEN + 1
+
+
+def _load_prices(prices_path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    prices = dict(DEFAULT_PRICES)
+    if prices_path:
+        with open(prices_path, "r", encoding="utf-8") as f:
+            prices.update(json.load(f))
+    return prices
+
+
+def plan_directory_summaries(rel_paths: List[str]) -> Tuple[List[int], int]:
+    """🌳 Resumos por diretório da `SummaryTree` numa execução sem cache
+
+    Monta a mesma árvore da consolidação incremental com entradas de tamanho estimado (num cache
+    temporário). Retorna o tamanho (chars) da entrada de cada chamada ao LLM e o da entrada da raiz.
+    """
+    inputs: List[int] = []
+    summary = "x" * (COMPLETION_TOKENS["directory_summary"] * CHARS_PER_TOKEN)
+
+    def summarize(directory: str, node_input: str) -> str:
+        inputs.append(len(node_input))
+        return summary
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        result = SummaryTree(cache_dir, summarize).build(
+            {p: f"- {p}: {'x' * FILE_DIGEST_ESTIMATE_CHARS}" for p in rel_paths})
+    return inputs, len(result["root_input"])
+
+
+class PlanAccumulator:
+    """🧾 Acumula chamadas e tokens por modelo"""
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, float]] = {}
+        self.calls_by_kind: Dict[str, float] = {}
+        self.serial_seconds: Dict[str, float] = {}
+
+    def add(self, kind: str, model: str, prompt_tokens: float, completion_tokens: float,
+            latency: float, calls: float = 1.0) -> None:
+        m = self.models.setdefault(model, {"calls": 0.0, "prompt_tokens": 0.0, "completion_tokens": 0.0})
+        m["calls"] += calls
+        m["prompt_tokens"] += prompt_tokens * calls
+        m["completion_tokens"] += completion_tokens * calls
+        self.calls_by_kind[kind] = self.calls_by_kind.get(kind, 0.0) + calls
+        self.serial_seconds[kind] = self.serial_seconds.get(kind, 0.0) + latency * calls
+
+
+def plan_analysis(report_path: str, max_files: int = 300, max_size_bytes: int = 2 * 1024 * 1024,
+                  model_routing: bool = True, escalate: bool = True, escalation_rate: float = 0.15,
+                  specialist_gating: bool = True, evidence_token_budget: int = 1500,
+                  parallel_specialists: bool = False,
+                  prompt_compression: bool = True, strip_comments: bool = False,
+                  incremental: bool = True, symbol_level: bool = True, concurrency: int = 1, rpm: Optional[float] = None,
+                  latencies: Optional[Dict[str, float]] = None, prices_path: Optional[str] = None,
+                  top_n: int = 15) -> Dict:
+    """🧮 Planeja a execução de `run_analysis` sem chamar o LLM
+
+    Com `incremental`, conta também os resumos por diretório (`directory_summary`) de uma
+    execução sem cache; a consolidação recebe a entrada da raiz da árvore em vez da lista.
+    Com `symbol_level` (só no modo incremental), arquivos grandes com símbolos contam uma
+    chamada por unidade (`symbol_unit`), sem escalada, como em `_analyze_by_symbols`.
+    """
+    latencies = {**DEFAULT_LATENCY_SECONDS, **(latencies or {})}
+    prices = _load_prices(prices_path)
+    router = ModelRouter(escalate=escalate)
+    full_model = router.full_model
+    acc = PlanAccumulator()
+    classifier = SpecialistClassifier() if specialist_gating else None
+    compressor = PromptCompressor(strip_comments=strip_comments) if prompt_compression else None
+
+    files: List[Dict] = []
+    by_ext: Dict[str, Dict[str, float]] = {}
+    by_dir: Dict[str, Dict[str, float]] = {}
+
+    if os.path.isfile(report_path) and not is_archive(report_path):
+        # Fluxo padrão: seis especialistas sobre o relatório + consolidação
+        with open(report_path, "r", encoding="utf-8", errors="ignore") as f:
+            report_text = f.read()
+        mode = "report"
+        roles = ["arquiteto", "qa_engineer", "documentador", "product_manager", "especialista_legal", "engenheiro_ia"]
+        if classifier is not None:
+            classifier.observe(os.path.basename(report_path), report_text)
+            roles = [r for r, d in classifier.decide().items() if d.relevant]
+        report_tokens = estimate_tokens(report_text)
+        for _ in roles:
+            acc.add("specialist", full_model, SPECIALIST_PROMPT_OVERHEAD_TOKENS + report_tokens + evidence_token_budget,
+                    COMPLETION_TOKENS["specialist"], latencies["specialist"])
+        # sequencial: cada especialista recebe as saídas anteriores como contexto
+        consolidation_prompt = (CONSOLIDATION_OVERHEAD_TOKENS + report_tokens
+                                + COMPLETION_TOKENS["specialist"] * len(roles))
+        skipped_files = 0
+        truncated_files = 0
+    else:
+        mode = "per_file"
+        root_dir = report_path if os.path.isdir(report_path) or is_archive(report_path) else os.getcwd()
+        roles = None
+        skipped_files = 0
+        truncated_files = 0
+        for _, rel_path, content in iter_files(root_dir, max_files, max_size_bytes):
+            if classifier is not None:
+                classifier.observe(rel_path, content)
+            prompt_chars = len(compressor.compress(rel_path, content).text) if compressor else len(content)
+            truncated = prompt_chars > MAX_CHARS
+            truncated_files += int(truncated)
+            prompt_tokens = FILE_PROMPT_OVERHEAD_TOKENS + estimate_tokens(min(prompt_chars, MAX_CHARS))
+
+            if model_routing:
+                decision = router.route(rel_path, content)
+                tier, model = decision.tier, decision.model
+            else:
+                tier, model = "full", full_model
+
+            calls = 0.0
+            completion = 0.0
+            units = plan_units(rel_path, content) if (incremental and symbol_level and tier != "local") else None
+            if tier == "local":
+                skipped_files += 1
+            elif units is not None:
+                # Uma chamada curta por unidade; compressão estimada na mesma proporção do arquivo
+                ratio = prompt_chars / max(1, len(content))
+                unit_chars = [int(len(u.text) * ratio) for u in units]
+                unit_tokens = [FILE_PROMPT_OVERHEAD_TOKENS + estimate_tokens(min(c, MAX_CHARS)) for c in unit_chars]
+                # Cada unidade é truncada sozinha: o arquivo só perde conteúdo se alguma passar do limite
+                truncated_files -= int(truncated)
+                truncated = any(c > MAX_CHARS for c in unit_chars)
+                truncated_files += int(truncated)
+                for tokens in unit_tokens:
+                    acc.add("symbol_unit", model, tokens, COMPLETION_TOKENS[tier], latencies[tier])
+                calls = float(len(units))
+                completion = COMPLETION_TOKENS[tier] * len(units)
+                prompt_tokens = sum(unit_tokens)
+            else:
+                calls = 1.0
+                completion = COMPLETION_TOKENS[tier]
+                acc.add(tier, model, prompt_tokens, completion, latencies[tier])
+                if tier == "lite" and model_routing and escalate:
+                    # escalada esperada: fração dos arquivos lite refeitos no modelo completo
+                    acc.add("escalation", full_model, prompt_tokens, COMPLETION_TOKENS["full"],
+                            latencies["full"], calls=escalation_rate)
+                    calls += escalation_rate
+
+            total_tokens = (prompt_tokens + completion) * (1 if calls else 0)
+            files.append({"file": rel_path, "tier": tier, "chars": len(content), "truncated": truncated,
+                          "calls": round(calls, 2), "units": len(units) if units else None, "prompt_tokens": prompt_tokens if calls else 0,
+                          "total_tokens": total_tokens})
+            ext = os.path.splitext(rel_path)[1].lower() or "(sem ext)"
+            top_dir = rel_path.replace("\\", "/").split("/")[0] if "/" in rel_path.replace("\\", "/") else "."
+            for bucket, key in ((by_ext, ext), (by_dir, top_dir)):
+                b = bucket.setdefault(key, {"files": 0, "total_tokens": 0})
+                b["files"] += 1
+                b["total_tokens"] += total_tokens
+
+        if classifier is not None:
+            roles = [r for r, d in classifier.decide().items() if d.relevant]
+        else:
+            roles = ["arquiteto", "qa_engineer", "documentador", "product_manager", "especialista_legal", "engenheiro_ia"]
+        if incremental and files:
+            # Árvore de resumos por diretório (lite, em série antes da consolidação)
+            summary_inputs, root_chars = plan_directory_summaries([f["file"] for f in files])
+            for chars in summary_inputs:
+                acc.add("directory_summary", router.lite_model,
+                        DIRECTORY_SUMMARY_OVERHEAD_TOKENS + estimate_tokens(chars),
+                        COMPLETION_TOKENS["directory_summary"], latencies["directory_summary"])
+            listing_tokens = estimate_tokens(root_chars)
+        else:
+            listing_tokens = 25 * len(files)  # lista de relatórios
+        consolidation_prompt = (CONSOLIDATION_OVERHEAD_TOKENS + listing_tokens
+                                + evidence_token_budget * len(roles) + 1500)  # evidências + agregação
+
+    acc.add("consolidation", full_model, consolidation_prompt, COMPLETION_TOKENS["consolidation"],
+            latencies["consolidation"])
+
+    # Tempo de parede: fase paralelizável limitada por concorrência e rate limit; consolidação serial
+    parallel_kinds = ["lite", "full", "escalation", "symbol_unit"] if mode == "per_file" else ["specialist"]
+    parallel_calls = sum(acc.calls_by_kind.get(k, 0.0) for k in parallel_kinds)
+    parallel_serial = sum(acc.serial_seconds.get(k, 0.0) for k in parallel_kinds)
+    concurrency_bound = parallel_serial / max(1, concurrency)
+    rate_bound = (parallel_calls / rpm * 60.0) if rpm else 0.0
+    if mode == "report" and not parallel_specialists:
+        concurrency_bound = parallel_serial  # fluxo padrão sequencial
+    wall_seconds = (max(concurrency_bound, rate_bound) + acc.serial_seconds.get("directory_summary", 0.0)
+                    + acc.serial_seconds.get("consolidation", 0.0))
+
+    models = {}
+    total_cost = 0.0
+    for model, m in acc.models.items():
+        price = prices.get(model)
+        cost = None
+        if price:
+            cost = m["prompt_tokens"] / 1e6 * price["input"] + m["completion_tokens"] / 1e6 * price["output"]
+            total_cost += cost
+        models[model] = {
+            "calls": round(m["calls"], 1),
+            "prompt_tokens": int(m["prompt_tokens"]),
+            "completion_tokens": int(m["completion_tokens"]),
+            "cost_usd": None if cost is None else round(cost, 4),
+        }
+
+    files.sort(key=lambda f: -f["total_tokens"])
+    return {
+        "mode": mode,
+        "input": report_path,
+        "max_files": max_files,
+        "max_size_bytes": max_size_bytes,
+        "files_scanned": len(files),
+        "files_local_shortcircuit": skipped_files,
+        "files_truncated": truncated_files,
+        "specialists": roles,
+        "calls_by_kind": {k: round(v, 1) for k, v in acc.calls_by_kind.items()},
+        "total_calls": round(sum(acc.calls_by_kind.values()), 1),
+        "models": models,
+        "total_cost_usd": round(total_cost, 4),
+        "wall_time_seconds": round(wall_seconds, 1),
+        "wall_time_bound": "rate_limit" if rate_bound > concurrency_bound else "concurrency",
+        "assumptions": {
+            "concurrency": concurrency,
+            "rpm": rpm,
+            "latency_seconds": latencies,
+            "completion_tokens": COMPLETION_TOKENS,
+            "escalation_rate": escalation_rate if (model_routing and escalate) else 0.0,
+            "incremental_cold_cache": incremental and mode == "per_file",
+            "symbol_level": incremental and symbol_level and mode == "per_file",
+            "chars_per_token": CHARS_PER_TOKEN,
+        },
+        "top_files": files[:top_n],
+        "by_extension": dict(sorted(by_ext.items(), key=lambda kv: -kv[1]["total_tokens"])[:top_n]),
+        "by_directory": dict(sorted(by_dir.items(), key=lambda kv: -kv[1]["total_tokens"])[:top_n]),
+        "prompt_compression": compressor.summary() if compressor else None,
+    }
+
+
+def render_plan(plan: Dict) -> str:
+    """📝 Resumo legível do plano para o terminal"""
+    minutes, seconds = divmod(int(plan["wall_time_seconds"]), 60)
+    lines = [
+        "🧮 Plano de execução (estimativa, sem chamadas de rede)",
+        "=" * 50,
+        f"Modo: {plan['mode']} | Entrada: {plan['input']}",
+        f"Arquivos: {plan['files_scanned']} (curto-circuito local: {plan['files_local_shortcircuit']}, "
+        f"truncados: {plan['files_truncated']})",
+        f"Especialistas: {', '.join(plan['specialists'] or [])}",
+        f"Chamadas LLM: {plan['total_calls']} {plan['calls_by_kind']}",
+        f"Tempo estimado: {minutes}m{seconds:02d}s (limitado por {plan['wall_time_bound']}, "
+        f"concorrência={plan['assumptions']['concurrency']}, rpm={plan['assumptions']['rpm']})",
+        f"Custo estimado: US$ {plan['total_cost_usd']:.4f}",
+        "Compressão de prompt: "
+        + (f"-{plan['prompt_compression']['saved_pct']}% tokens de conteúdo" if plan.get("prompt_compression")
+           else "desativada"),
+        "",
+        "Por modelo:",
+    ]
+    for model, m in plan["models"].items():
+        cost = "?" if m["cost_usd"] is None else f"US$ {m['cost_usd']:.4f}"
+        lines.append(f"  - {model}: {m['calls']} chamadas, {m['prompt_tokens']:,} tokens de prompt, "
+                     f"{m['completion_tokens']:,} de resposta, {cost}")
+    if plan["top_files"]:
+        lines += ["", "Maiores contribuintes (tokens):"]
+        for f in plan["top_files"]:
+            flag = " [truncado]" if f["truncated"] else ""
+            if f.get("units"):
+                flag += f" [{f['units']} unidades]"
+            lines.append(f"  - {f['file']}: {f['total_tokens']:,} ({f['tier']}){flag}")
+    if plan["by_extension"]:
+        lines += ["", "Por extensão:"]
+        lines += [f"  - {k}: {v['files']} arquivos, {v['total_tokens']:,} tokens" for k, v in plan["by_extension"].items()]
+    if plan["by_directory"]:
+        lines += ["", "Por diretório de topo:"]
+        lines += [f"  - {k}: {v['files']} arquivos, {v['total_tokens']:,} tokens" for k, v in plan["by_directory"].items()]
+    return "\n".join(lines)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+📦 Predição em Lote (--batch-submit)
+===================================
+
+Modo offline para varreduras noturnas: os prompts por arquivo viram um job
+JSONL no formato da Batch API OpenAI-compatível (``/files`` + ``/batches``),
+submetido pelo mesmo cliente LLM do processo. O estado do job (id, arquivos
+de cada requisição, relatórios já prontos) fica num JSON ao lado dos
+relatórios, então uma execução interrompida retoma o polling com
+``--batch-resume`` sem submeter de novo. O ``endpoint_fake.py`` atende as
+mesmas rotas para testes locais.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cliente_llm import LLMClient, UsageRecord, model_name
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def batch_request(custom_id: str, model: str, prompt: str, system: Optional[str] = None) -> Dict:
+    """🧾 Uma linha do JSONL de entrada (formato da Batch API)"""
+    messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+            "body": {"model": model_name(model), "messages": messages}}
+
+
+def write_batch_input(path: str, requests: List[Dict]) -> int:
+    """💾 Grava o JSONL de entrada e retorna o tamanho em bytes"""
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return os.path.getsize(path)
+
+
+def parse_batch_output(text: str) -> Iterator[Tuple[str, Optional[str], Optional[str], Dict]]:
+    """🔍 Itera (custom_id, texto, erro, usage) sobre o JSONL de saída (ou de erros) do job"""
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            logger.warning(f"⚠️ Linha inválida na saída do lote: {line[:120]}")
+            continue
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        error = item.get("error") or body.get("error")
+        if error or response.get("status_code", 200) >= 400:
+            message = error.get("message") if isinstance(error, dict) else str(error or "erro sem detalhes")
+            yield item.get("custom_id"), None, f"{response.get('status_code', '?')}: {message}", {}
+            continue
+        try:
+            text_out = body["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            yield item.get("custom_id"), None, "resposta sem choices", {}
+            continue
+        yield item.get("custom_id"), text_out, None, body.get("usage") or {}
+
+
+class BatchJob:
+    """📦 Job de lote com estado persistido (submissão, polling retomável e download)"""
+
+    def __init__(self, client: LLMClient, state_path: str):
+        self.client = client
+        self.state_path = state_path
+        self.state: Dict = {}
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+    @classmethod
+    def load(cls, client: LLMClient, state_path: str) -> "BatchJob":
+        job = cls(client, state_path)
+        with open(state_path, "r", encoding="utf-8") as f:
+            job.state = json.load(f)
+        return job
+
+    def save(self) -> None:
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Batch API
+    # ------------------------------------------------------------------
+    def _check(self, response, action: str):
+        if response.status_code >= 400:
+            raise RuntimeError(f"❌ Falha ao {action}: {response.status_code} {response.text[:300]}")
+        return response
+
+    def submit(self, input_path: str) -> str:
+        """📤 Envia o JSONL e cria o job; retorna o id do batch (salvo no estado)"""
+        with open(input_path, "rb") as f:
+            uploaded = self._check(self.client.http.post(
+                "files", data={"purpose": "batch"},
+                files={"file": (os.path.basename(input_path), f, "application/jsonl")},
+            ), "enviar o arquivo do lote").json()
+        batch = self._check(self.client.http.post("batches", json={
+            "input_file_id": uploaded["id"],
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": COMPLETION_WINDOW,
+        }), "criar o lote").json()
+        self.state.update({"batch_id": batch["id"], "input_file_id": uploaded["id"],
+                           "status": batch.get("status"), "submitted_at": time.time()})
+        self.save()
+        logger.info(f"📤 Lote {batch['id']} submetido ({len(self.state.get('requests', {}))} requisições)")
+        return batch["id"]
+
+    def ensure_submitted(self) -> None:
+        """🔁 Na retomada, submete de novo um lote cuja submissão falhou (estado sem `batch_id`)"""
+        if self.state.get("batch_id") or not self.state.get("requests"):
+            return
+        input_path = self.state.get("input_path")
+        if not input_path or not os.path.exists(input_path):
+            raise RuntimeError(f"❌ O lote de {self.state_path} não chegou a ser submetido e o JSONL de entrada "
+                               f"não foi encontrado ({input_path}); rode --batch-submit de novo")
+        logger.warning(f"⚠️ O lote de {self.state_path} não chegou a ser submetido; submetendo {input_path}")
+        self.submit(input_path)
+
+    def refresh(self) -> Dict:
+        if not self.state.get("batch_id"):
+            raise RuntimeError(f"❌ Lote sem batch_id em {self.state_path}: a submissão não foi concluída")
+        batch = self._check(self.client.http.get(f"batches/{self.state['batch_id']}"), "consultar o lote").json()
+        self.state.update({"status": batch.get("status"), "request_counts": batch.get("request_counts"),
+                           "output_file_id": batch.get("output_file_id"),
+                           "error_file_id": batch.get("error_file_id")})
+        self.save()
+        return batch
+
+    def wait(self, poll_seconds: float = 60.0, timeout_seconds: Optional[float] = None) -> Dict:
+        """⏳ Faz polling até um status terminal (o estado é salvo a cada consulta)"""
+        started = time.monotonic()
+        while True:
+            batch = self.refresh()
+            counts = batch.get("request_counts") or {}
+            logger.info(f"⏳ Lote {self.state['batch_id']}: {batch.get('status')} "
+                        f"({counts.get('completed', 0)}/{counts.get('total', '?')} concluídas)")
+            if batch.get("status") in TERMINAL_STATUSES:
+                return batch
+            if timeout_seconds is not None and time.monotonic() - started > timeout_seconds:
+                raise TimeoutError(f"lote {self.state['batch_id']} ainda em {batch.get('status')}; "
+                                   f"retome com --batch-resume {self.state_path}")
+            time.sleep(poll_seconds)
+
+    def _download(self, file_id: Optional[str]) -> str:
+        if not file_id:
+            return ""
+        return self._check(self.client.http.get(f"files/{file_id}/content"), "baixar a saída do lote").text
+
+    def results(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """📥 {custom_id: (texto, erro)} da saída e do arquivo de erros; o consumo vai para o cliente"""
+        results: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for file_id in (self.state.get("output_file_id"), self.state.get("error_file_id")):
+            for custom_id, text, error, usage in parse_batch_output(self._download(file_id)):
+                results[custom_id] = (text, error)
+                if usage:
+                    request = self.state.get("requests", {}).get(custom_id, {})
+                    self.client.record_usage(UsageRecord(
+                        model=model_name(request.get("model") or ""), call_type="batch",
+                        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+                        completion_tokens=int(usage.get("completion_tokens") or 0),
+                        total_tokens=int(usage.get("total_tokens") or 0)))
+        return results
+
+    def summary(self) -> Dict:
+        """📊 Id, status e contagens do lote (para os metadados)"""
+        summary = {key: self.state.get(key) for key in ("batch_id", "status", "request_counts", "submitted_at")}
+        summary.update({"state_file": self.state_path, "requests": len(self.state.get("requests", {}))})
+        return summary
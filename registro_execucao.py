@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+📝 Registro de Execução (logging)
+================================
+
+Configuração de logging compartilhada pelos pontos de entrada. No modo
+``throughput`` o logging passa por ``QueueHandler``/``QueueListener`` (a
+escrita no terminal sai da thread de análise), mensagens por arquivo são
+amostradas (avisos e erros sempre passam) e uma linha compacta de progresso
+periódica mostra arquivos/s e ETA.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Optional
+
+LOG_MODES = ("normal", "throughput")
+COMPACT_FORMAT = "%(asctime)s %(levelname).1s %(message)s"
+
+# Use `logger.info(..., extra=PER_FILE)` em mensagens emitidas uma vez por arquivo
+PER_FILE = {"per_file": True}
+
+_state = {"mode": "normal", "listener": None}
+
+
+class PerFileSampler(logging.Filter):
+    """🎲 Deixa passar 1 a cada `every` mensagens por arquivo (avisos e erros sempre passam)"""
+
+    def __init__(self, every: int = 50):
+        super().__init__()
+        self.every = max(1, every)
+        self.seen = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "per_file", False) or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            self.seen += 1
+            if self.seen % self.every == 1 or self.every == 1:
+                return True
+            self.suppressed += 1
+            return False
+
+
+def setup_logging(mode: str = "normal", level: int = logging.INFO, sample_every: int = 50) -> None:
+    """🔧 Configura o logging raiz para o modo informado (pode ser chamado mais de uma vez)"""
+    if mode not in LOG_MODES:
+        raise ValueError(f"modo de log inválido: {mode!r} (use {', '.join(LOG_MODES)})")
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    _state["mode"] = mode
+
+    if mode == "normal":
+        logging.basicConfig(level=level, force=True)
+        return
+
+    # Terminal escrito por uma thread dedicada; a análise só enfileira o registro
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(COMPACT_FORMAT, datefmt="%H:%M:%S"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(PerFileSampler(sample_every))
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    _state["listener"] = listener
+    # Bibliotecas ruidosas ficam em WARNING no modo throughput
+    for name in ("httpx", "LiteLLM", "litellm", "urllib3"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def stop_logging() -> None:
+    """🛑 Esvazia a fila e para o listener (no-op fora do modo throughput)"""
+    listener = _state.get("listener")
+    if listener is not None:
+        listener.stop()
+        _state["listener"] = None
+
+
+def current_log_mode() -> str:
+    return _state["mode"]
+
+
+atexit.register(stop_logging)
+
+
+class ProgressReporter:
+    """📈 Linha compacta e periódica de progresso com arquivos/s e ETA"""
+
+    def __init__(self, total: Optional[int], logger: logging.Logger, interval: float = 10.0,
+                 unit: str = "arquivos"):
+        self.total = total
+        self.logger = logger
+        self.interval = interval
+        self.unit = unit
+        self.done = 0
+        self.started = time.monotonic()
+        self._last = self.started
+
+    def advance(self, n: int = 1) -> None:
+        self.update(self.done + n)
+
+    def update(self, done: int, force: bool = False) -> None:
+        self.done = done
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self.logger.info(self.line())
+
+    def line(self) -> str:
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        rate = self.done / elapsed
+        if self.total:
+            remaining = max(0, self.total - self.done)
+            eta = f"{int(remaining / rate) // 60}m{int(remaining / rate) % 60:02d}s" if rate > 0 else "?"
+            return (f"📈 {self.done}/{self.total} {self.unit} ({100 * self.done / self.total:.0f}%) | "
+                    f"{rate:.2f} {self.unit}/s | ETA {eta}")
+        return f"📈 {self.done} {self.unit} | {rate:.2f} {self.unit}/s"
+
+    def finish(self) -> None:
+        self.update(self.done, force=True)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+📊 Resultados Estruturados por Arquivo
+=====================================
+
+Extrai e valida a seção JSON que cada análise por arquivo devolve junto com o
+markdown, e agrega localmente (sem LLM) os resultados de todos os arquivos em
+scores do repositório, ranking de hotspots e principais riscos usando NumPy.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Ordem importa: índice 0 é o mais grave
+SEVERITIES = ["critical", "high", "medium", "low", "info"]
+SEVERITY_WEIGHTS = np.array([10.0, 5.0, 2.0, 1.0, 0.0])
+SEVERITY_ALIASES = {
+    "critica": "critical", "crítica": "critical", "critico": "critical", "crítico": "critical",
+    "alta": "high", "alto": "high",
+    "media": "medium", "média": "medium", "medio": "medium", "médio": "medium", "moderate": "medium",
+    "baixa": "low", "baixo": "low", "minor": "low",
+    "informativo": "info", "informational": "info", "none": "info",
+}
+
+# quality/security/test_coverage: maior é melhor; complexity: maior é mais complexo (pior)
+SCORE_KEYS = ["quality", "security", "complexity", "test_coverage"]
+
+JSON_BLOCK_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+Ao final do relatório, inclua OBRIGATORIAMENTE um bloco ```json (único) com este formato:
+```json
+{
+  "summary": "resumo em 1-3 linhas",
+  "findings": [
+    {"severity": "critical|high|medium|low|info", "category": "security|bug|design|performance|testing|docs",
+     "description": "descrição objetiva", "line": 42}
+  ],
+  "scores": {"quality": 0-100, "security": 0-100, "complexity": 0-100, "test_coverage": 0-100},
+  "quick_wins": ["ação de alto impacto e baixo esforço"]
+}
+```
+Em "scores", quality/security/test_coverage: maior é melhor; complexity: maior é mais complexo.
+Use "line": null quando não houver linha específica."""
+
+
+def _clamp_score(value) -> Optional[float]:
+    """Converte um score para float no intervalo 0-100 (None se inválido)"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if score != score:  # NaN
+        return None
+    return max(0.0, min(100.0, score))
+
+
+def _normalize_severity(value) -> str:
+    """Normaliza severidades livres (pt/en) para o vocabulário de SEVERITIES"""
+    sev = str(value or "").strip().lower()
+    sev = SEVERITY_ALIASES.get(sev, sev)
+    if sev not in SEVERITIES:
+        raise ValueError(f"Severidade inválida: {value!r}")
+    return sev
+
+
+def validate_structured_result(data) -> Dict:
+    """✅ Valida e normaliza o dicionário estruturado de um arquivo.
+
+    Levanta ValueError quando a estrutura mínima (objeto com scores ou findings) não existe.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Resultado estruturado deve ser um objeto JSON")
+
+    raw_scores = data.get("scores") or {}
+    if not isinstance(raw_scores, dict):
+        raise ValueError("'scores' deve ser um objeto")
+    scores = {key: _clamp_score(raw_scores.get(key)) for key in SCORE_KEYS}
+
+    raw_findings = data.get("findings") or []
+    if not isinstance(raw_findings, list):
+        raise ValueError("'findings' deve ser uma lista")
+    findings = []
+    for item in raw_findings:
+        if not isinstance(item, dict) or not item.get("description"):
+            continue
+        try:
+            severity = _normalize_severity(item.get("severity"))
+        except ValueError:
+            severity = "medium"
+        line = item.get("line")
+        findings.append({
+            "severity": severity,
+            "category": str(item.get("category") or "general").strip().lower(),
+            "description": str(item["description"]).strip(),
+            "line": line if isinstance(line, int) and not isinstance(line, bool) else None,
+        })
+
+    if all(v is None for v in scores.values()) and not findings:
+        raise ValueError("Resultado estruturado sem scores nem findings")
+
+    quick_wins = data.get("quick_wins") or []
+    if not isinstance(quick_wins, list):
+        quick_wins = [quick_wins]
+
+    return {
+        "summary": str(data.get("summary") or "").strip(),
+        "findings": findings,
+        "scores": scores,
+        "quick_wins": [str(q).strip() for q in quick_wins if str(q).strip()],
+    }
+
+
+def extract_structured_result(text: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """🔍 Separa o markdown do bloco JSON estruturado.
+
+    Retorna (markdown_sem_json, resultado_validado_ou_None, erro_ou_None).
+    Usa o último bloco ```json do texto, que é onde o prompt pede para colocá-lo.
+    """
+    text = str(text or "")
+    matches = list(JSON_BLOCK_RE.finditer(text))
+    if not matches:
+        return text, None, "bloco ```json ausente"
+
+    match = matches[-1]
+    markdown = (text[:match.start()] + text[match.end():]).rstrip() + "\n"
+    try:
+        data = json.loads(match.group(1))
+        return markdown, validate_structured_result(data), None
+    except (json.JSONDecodeError, ValueError) as e:
+        return markdown, None, str(e)
+
+
+def aggregate_results(entries: List[Dict], top_n: int = 10) -> Dict:
+    """🧮 Agrega resultados por arquivo em métricas do repositório (vetorizado com NumPy).
+
+    Cada entrada: {"file": str, "lines": int, "structured": dict|None}.
+    Scores do repositório são médias ponderadas por log(1 + linhas), ignorando ausentes.
+    """
+    valid = [e for e in entries if e.get("structured")]
+    total = len(entries)
+    if not valid:
+        return {
+            "files_total": total,
+            "files_with_structured": 0,
+            "repository_scores": {key: None for key in SCORE_KEYS},
+            "severity_counts": {sev: 0 for sev in SEVERITIES},
+            "hotspots": [],
+            "top_risks": [],
+            "quick_wins": [],
+        }
+
+    files = [e["file"] for e in valid]
+    n = len(valid)
+
+    scores = np.array(
+        [[np.nan if e["structured"]["scores"].get(k) is None else e["structured"]["scores"][k]
+          for k in SCORE_KEYS] for e in valid],
+        dtype=float,
+    )
+    weights = np.log1p(np.array([max(int(e.get("lines") or 0), 0) for e in valid], dtype=float)) + 1.0
+
+    # Médias ponderadas ignorando NaN por coluna
+    present = ~np.isnan(scores)
+    w_matrix = present * weights[:, None]
+    w_sum = w_matrix.sum(axis=0)
+    weighted = np.where(present, scores, 0.0) * w_matrix
+    with np.errstate(invalid="ignore", divide="ignore"):
+        repo_scores = np.where(w_sum > 0, weighted.sum(axis=0) / w_sum, np.nan)
+
+    # Contagem de severidades por arquivo (n x 5)
+    sev_index = {sev: i for i, sev in enumerate(SEVERITIES)}
+    finding_file = []
+    finding_sev = []
+    for i, e in enumerate(valid):
+        for f in e["structured"]["findings"]:
+            finding_file.append(i)
+            finding_sev.append(sev_index[f["severity"]])
+    finding_file = np.array(finding_file, dtype=np.int64)
+    finding_sev = np.array(finding_sev, dtype=np.int64)
+    counts = np.zeros((n, len(SEVERITIES)), dtype=np.int64)
+    if finding_file.size:
+        np.add.at(counts, (finding_file, finding_sev), 1)
+
+    # Hotspot: risco ponderado por severidade + penalidades de score (ausentes = neutros)
+    filled = np.where(present, scores, 50.0)
+    quality, security, complexity, coverage = filled.T
+    risk = counts @ SEVERITY_WEIGHTS
+    penalty = ((100.0 - quality) + (100.0 - security) * 1.5 + complexity + (100.0 - coverage) * 0.5) / 20.0
+    hotspot = (risk + penalty) * weights
+    order = np.argsort(-hotspot, kind="stable")[:top_n]
+
+    hotspots = [
+        {
+            "file": files[i],
+            "hotspot_score": round(float(hotspot[i]), 2),
+            "findings": {sev: int(counts[i, j]) for j, sev in enumerate(SEVERITIES) if counts[i, j]},
+            "scores": {k: (None if np.isnan(scores[i, j]) else round(float(scores[i, j]), 1))
+                       for j, k in enumerate(SCORE_KEYS)},
+        }
+        for i in order
+    ]
+
+    # Top riscos: ordena por severidade e depois pelo hotspot do arquivo
+    top_risks = []
+    if finding_file.size:
+        risk_order = np.lexsort((-hotspot[finding_file], finding_sev))
+        all_findings = [(i, f) for i, e in enumerate(valid) for f in e["structured"]["findings"]]
+        for idx in risk_order:
+            i, f = all_findings[idx]
+            if f["severity"] == "info" or len(top_risks) >= top_n:
+                break
+            top_risks.append({"file": files[i], **f})
+
+    # Quick wins mais recorrentes primeiro
+    wins: Dict[str, List[str]] = {}
+    for e in valid:
+        for q in e["structured"]["quick_wins"]:
+            wins.setdefault(q, []).append(e["file"])
+    quick_wins = [
+        {"action": action, "files": paths}
+        for action, paths in sorted(wins.items(), key=lambda kv: -len(kv[1]))[:top_n]
+    ]
+
+    return {
+        "files_total": total,
+        "files_with_structured": n,
+        "repository_scores": {k: (None if np.isnan(v) else round(float(v), 1))
+                              for k, v in zip(SCORE_KEYS, repo_scores)},
+        "severity_counts": {sev: int(c) for sev, c in zip(SEVERITIES, counts.sum(axis=0))},
+        "hotspots": hotspots,
+        "top_risks": top_risks,
+        "quick_wins": quick_wins,
+    }
+
+
+def render_aggregate_markdown(aggregate: Dict) -> str:
+    """📝 Renderiza a agregação local em markdown"""
+    lines = ["## 📊 Métricas Agregadas (cálculo local)", ""]
+    lines.append(f"Arquivos com resultado estruturado: "
+                 f"{aggregate['files_with_structured']}/{aggregate['files_total']}")
+    lines.append("")
+
+    lines += ["| Métrica | Score (0-100) |", "|---|---|"]
+    for key, value in aggregate["repository_scores"].items():
+        lines.append(f"| {key} | {'-' if value is None else value} |")
+    lines.append("")
+
+    sev = aggregate["severity_counts"]
+    lines.append("**Achados por severidade:** " + ", ".join(f"{k}: {v}" for k, v in sev.items()))
+    lines.append("")
+
+    if aggregate["hotspots"]:
+        lines += ["### 🔥 Hotspots", "", "| # | Arquivo | Hotspot | Achados |", "|---|---|---|---|"]
+        for pos, h in enumerate(aggregate["hotspots"], 1):
+            found = ", ".join(f"{k}: {v}" for k, v in h["findings"].items()) or "-"
+            lines.append(f"| {pos} | `{h['file']}` | {h['hotspot_score']} | {found} |")
+        lines.append("")
+
+    if aggregate["top_risks"]:
+        lines += ["### 🚨 Principais Riscos", ""]
+        for r in aggregate["top_risks"]:
+            where = f"{r['file']}:{r['line']}" if r.get("line") else r["file"]
+            lines.append(f"- **[{r['severity']}]** `{where}` ({r['category']}): {r['description']}")
+        lines.append("")
+
+    if aggregate["quick_wins"]:
+        lines += ["### ⚡ Quick Wins", ""]
+        for q in aggregate["quick_wins"]:
+            lines.append(f"- {q['action']} ({len(q['files'])} arquivo(s))")
+        lines.append("")
+
+    return "\n".join(lines)
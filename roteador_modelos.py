@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+🧭 Roteador de Modelos por Arquivo
+=================================
+
+Escolhe, a partir de sinais estáticos (tamanho, complexidade, tipo e importância
+do arquivo), entre três níveis de análise:
+
+- ``local``: arquivos triviais (``__init__.py`` vazio, ``.ini`` minúsculo) são
+  resolvidos sem chamar o LLM;
+- ``lite``: modelo barato para arquivos simples;
+- ``full``: modelo completo para módulos grandes, complexos ou críticos.
+
+Opcionalmente escala do ``lite`` para o ``full`` quando a saída estruturada do
+modelo barato indica risco alto.
+"""
+
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LITE_MODEL = "gemini/gemini-2.5-flash-lite"
+
+CONFIG_EXTS = {".ini", ".cfg", ".txt", ".json", ".yaml", ".yml"}
+CODE_EXTS = {".py", ".js", ".ts", ".tsx", ".sh"}
+
+BRANCH_RE = re.compile(r"\b(if|elif|else if|for|while|case|catch|except|with)\b|&&|\|\|")
+IMPORT_LINE_RE = re.compile(r"^\s*(from\s+\S+\s+import\b|import\s+\S+|__all__\s*=)")
+
+ENTRYPOINT_NAMES = {"main.py", "__main__.py", "app.py", "manage.py", "server.py", "cli.py",
+                    "index.js", "index.ts", "main.ts", "main.js", "wsgi.py", "asgi.py"}
+CRITICAL_PATH_HINTS = ("auth", "security", "crypto", "payment", "billing", "api", "core", "models", "db")
+LOW_PRIORITY_HINTS = ("test", "tests", "docs", "examples", "example", "fixtures", "migrations")
+SENSITIVE_CONTENT_RE = re.compile(
+    r"\b(password|secret|token|api_key|subprocess|eval|exec|pickle|sql|cursor\.execute)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouterThresholds:
+    """⚙️ Limiares de roteamento (ajustáveis para trocar throughput por qualidade)"""
+    local_max_nonblank_lines: int = 5
+    local_config_max_bytes: int = 512
+    full_min_lines: int = 400
+    full_min_complexity: int = 40
+    full_min_importance: float = 0.7
+    escalate_on_severities: tuple = ("critical", "high")
+    escalate_security_below: float = 50.0
+    escalate_on_invalid_output: bool = True
+
+
+@dataclass
+class RouteDecision:
+    """📌 Decisão de roteamento registrada nos metadados da execução"""
+    file: str
+    tier: str
+    model: Optional[str]
+    reason: str
+    signals: Dict = field(default_factory=dict)
+    escalated: bool = False
+    escalation_reason: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def compute_signals(rel_path: str, content: str) -> Dict:
+    """📏 Calcula sinais estáticos baratos de um arquivo"""
+    lines = content.splitlines()
+    nonblank = [l for l in lines if l.strip()]
+    name = os.path.basename(rel_path)
+    ext = os.path.splitext(name)[1].lower()
+    parts = [p.lower() for p in rel_path.replace("\\", "/").split("/")]
+
+    indent_depth = 0
+    for line in nonblank:
+        stripped = line.lstrip(" \t")
+        depth = (len(line) - len(stripped)) // 4
+        if depth > indent_depth:
+            indent_depth = depth
+
+    complexity = len(BRANCH_RE.findall(content)) + indent_depth * 2 if ext in CODE_EXTS else 0
+
+    importance = 0.4
+    if name in ENTRYPOINT_NAMES:
+        importance += 0.3
+    if any(hint in part for part in parts for hint in CRITICAL_PATH_HINTS):
+        importance += 0.2
+    if any(part in LOW_PRIORITY_HINTS or part.startswith("test_") for part in parts):
+        importance -= 0.3
+    # Checado em qualquer extensão: um `credentials.json` pequeno não pode cair no curto-circuito
+    sensitive = bool(SENSITIVE_CONTENT_RE.search(content))
+    if ext in CODE_EXTS and sensitive:
+        importance += 0.2
+
+    return {
+        "size_bytes": len(content.encode("utf-8", errors="ignore")),
+        "lines": len(lines),
+        "nonblank_lines": len(nonblank),
+        "only_imports": bool(nonblank) and all(
+            IMPORT_LINE_RE.match(l) or l.strip().startswith(("#", '"""', "'''")) for l in nonblank
+        ),
+        "complexity": complexity,
+        "sensitive": sensitive,
+        "ext": ext,
+        "importance": round(max(0.0, min(1.0, importance)), 2),
+    }
+
+
+class ModelRouter:
+    """🧭 Roteia arquivos entre curto-circuito local, modelo lite e modelo completo"""
+
+    def __init__(self, full_model: Optional[str] = None, lite_model: Optional[str] = None,
+                 thresholds: Optional[RouterThresholds] = None, escalate: bool = True):
+        self.full_model = full_model or os.getenv("MODEL", "gemini/gemini-2.5-flash")
+        self.lite_model = lite_model or os.getenv("MODEL_LITE", DEFAULT_LITE_MODEL)
+        self.thresholds = thresholds or RouterThresholds()
+        self.escalate = escalate
+        self.decisions: List[RouteDecision] = []
+
+    def route(self, rel_path: str, content: str) -> RouteDecision:
+        """🔀 Decide o nível de análise de um arquivo"""
+        t = self.thresholds
+        signals = compute_signals(rel_path, content)
+        name = os.path.basename(rel_path)
+
+        if signals["nonblank_lines"] == 0:
+            decision = RouteDecision(rel_path, "local", None, "arquivo vazio", signals)
+        elif name == "__init__.py" and signals["nonblank_lines"] <= t.local_max_nonblank_lines \
+                and signals["only_imports"]:
+            decision = RouteDecision(rel_path, "local", None, "__init__.py trivial (apenas imports)", signals)
+        elif signals["ext"] in CONFIG_EXTS and signals["size_bytes"] <= t.local_config_max_bytes \
+                and not signals["sensitive"]:
+            decision = RouteDecision(rel_path, "local", None,
+                                     f"configuração pequena (<= {t.local_config_max_bytes} bytes)", signals)
+        elif signals["lines"] >= t.full_min_lines:
+            decision = RouteDecision(rel_path, "full", self.full_model,
+                                     f"arquivo grande ({signals['lines']} linhas)", signals)
+        elif signals["complexity"] >= t.full_min_complexity:
+            decision = RouteDecision(rel_path, "full", self.full_model,
+                                     f"complexidade alta ({signals['complexity']})", signals)
+        elif signals["importance"] >= t.full_min_importance:
+            decision = RouteDecision(rel_path, "full", self.full_model,
+                                     f"importância alta ({signals['importance']})", signals)
+        else:
+            decision = RouteDecision(rel_path, "lite", self.lite_model, "arquivo simples", signals)
+
+        self.decisions.append(decision)
+        return decision
+
+    def escalation_reason(self, decision: RouteDecision, structured: Optional[Dict]) -> Optional[str]:
+        """⬆️ Retorna o motivo para escalar uma análise lite para o modelo completo (ou None)"""
+        if not self.escalate or decision.tier != "lite":
+            return None
+        t = self.thresholds
+        if structured is None:
+            return "saída estruturada inválida" if t.escalate_on_invalid_output else None
+        severe = [f for f in structured.get("findings", []) if f.get("severity") in t.escalate_on_severities]
+        if severe:
+            return f"{len(severe)} achado(s) {'/'.join(t.escalate_on_severities)}"
+        security = (structured.get("scores") or {}).get("security")
+        if security is not None and security < t.escalate_security_below:
+            return f"score de segurança baixo ({security})"
+        return None
+
+    def mark_escalated(self, decision: RouteDecision, reason: str) -> None:
+        """📝 Registra a escalada na decisão"""
+        decision.escalated = True
+        decision.escalation_reason = reason
+        decision.model = self.full_model
+
+    def summary(self) -> Dict:
+        """📊 Resumo das decisões para os metadados da execução"""
+        counts = {"local": 0, "lite": 0, "full": 0}
+        for d in self.decisions:
+            counts[d.tier] = counts.get(d.tier, 0) + 1
+        return {
+            "full_model": self.full_model,
+            "lite_model": self.lite_model,
+            "escalation_enabled": self.escalate,
+            "thresholds": asdict(self.thresholds),
+            "counts": counts,
+            "escalated": sum(1 for d in self.decisions if d.escalated),
+            "decisions": [d.to_dict() for d in self.decisions],
+        }
+
+
+def local_file_report(decision: RouteDecision) -> Tuple[str, Dict]:
+    """🏠 Gera relatório e resultado estruturado sem LLM para arquivos triviais"""
+    s = decision.signals
+    markdown = (
+        "## Resumo\n\n"
+        f"Arquivo trivial analisado localmente ({decision.reason}): "
+        f"{s.get('nonblank_lines', 0)} linha(s) não vazia(s), {s.get('size_bytes', 0)} bytes.\n\n"
+        "_Sem chamada ao LLM (curto-circuito do roteador de modelos)._\n"
+    )
+    structured = {
+        "summary": f"Arquivo trivial ({decision.reason})",
+        "findings": [],
+        "scores": {"quality": None, "security": None, "complexity": 0.0, "test_coverage": None},
+        "quick_wins": [],
+    }
+    return markdown, structured
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+🚦 Roteamento de Especialistas por Relevância
+============================================
+
+Pré-classificação barata (imports, palavras-chave e métricas estáticas) dos
+arquivos varridos para decidir quais especialistas são relevantes para a
+codebase e qual subconjunto de arquivos cada um deve ver. Papéis pulados são
+registrados com o motivo para aparecerem no relatório final.
+"""
+
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Set
+
+CODE_EXTS = {".py", ".js", ".ts", ".tsx", ".sh"}
+DOC_EXTS = {".md", ".txt", ".rst"}
+
+PY_IMPORT_RE = re.compile(r"^\s*(?:from|import)\s+([A-Za-z_][\w\.]*)", re.MULTILINE)
+JS_IMPORT_RE = re.compile(r"""(?:require\(\s*|from\s+)['"]([^'"]+)['"]""")
+
+LLM_MODULES = {"openai", "anthropic", "google.generativeai", "google.genai", "crewai", "crewai_tools",
+               "langchain", "langchain_core", "llama_index", "litellm", "transformers", "cohere",
+               "mistralai", "ollama", "vertexai", "@google/generative-ai", "@anthropic-ai/sdk", "ai"}
+ML_MODULES = {"torch", "tensorflow", "keras", "sklearn", "xgboost", "lightgbm", "sentence_transformers"}
+LLM_KEYWORDS_RE = re.compile(
+    r"\b(generate_content|chat\.completions|ChatCompletion|prompt_template|system_prompt|embeddings?)\b"
+)
+
+PERSONAL_DATA_RE = re.compile(
+    r"\b(cpf|cnpj|rg|email|e-mail|phone|telefone|whatsapp|birth_?date|data_nascimento|address|endereco|"
+    r"endereço|password|senha|ssn|gdpr|lgpd|consent|consentimento|cookie|tracking|personal_data|"
+    r"dados_pessoais|user_?id|customer|cliente)\b",
+    re.IGNORECASE,
+)
+THIRD_PARTY_MODULES = {"requests", "httpx", "aiohttp", "stripe", "boto3", "twilio", "facebook", "instagrapi",
+                       "tweepy", "sendgrid", "firebase_admin", "axios", "googleapiclient"}
+LICENSE_NAMES = {"license", "license.md", "license.txt", "copying", "notice"}
+
+PRODUCT_MODULES = {"argparse", "click", "typer", "flask", "fastapi", "django", "streamlit", "gradio",
+                   "express", "react", "next", "vue", "svelte", "@angular/core"}
+PRODUCT_KEYWORDS_RE = re.compile(r"""if\s+__name__\s*==\s*['"]__main__['"]|\b(pricing|subscription|plano|checkout)\b""")
+
+ROLE_LABELS = {
+    "arquiteto": "🏗️ Arquiteto de Software",
+    "qa_engineer": "🔬 Engenheiro de Qualidade",
+    "documentador": "📚 Documentador Técnico",
+    "product_manager": "🎯 Product Manager",
+    "especialista_legal": "⚖️ Especialista Legal",
+    "engenheiro_ia": "🧠 Engenheiro de IA",
+}
+
+
+@dataclass
+class SpecialistDecision:
+    """📌 Decisão de relevância de um especialista"""
+    role: str
+    relevant: bool
+    reason: str
+    files: List[str] = field(default_factory=list)
+    signals: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def extract_imports(rel_path: str, content: str) -> Set[str]:
+    """📦 Extrai módulos importados (Python e JS/TS) com seus prefixos de pacote"""
+    ext = os.path.splitext(rel_path)[1].lower()
+    if ext == ".py":
+        found = PY_IMPORT_RE.findall(content)
+    elif ext in {".js", ".ts", ".tsx"}:
+        found = JS_IMPORT_RE.findall(content)
+    elif ext in DOC_EXTS:
+        # relatórios/digests em markdown citam imports de várias linguagens
+        found = PY_IMPORT_RE.findall(content) + JS_IMPORT_RE.findall(content)
+    else:
+        return set()
+    modules = set()
+    for mod in found:
+        parts = mod.split(".") if not mod.startswith("@") else [mod]
+        for i in range(1, len(parts) + 1):
+            modules.add(".".join(parts[:i]))
+        if "/" in mod and not mod.startswith("."):
+            modules.add("/".join(mod.split("/")[:2]) if mod.startswith("@") else mod.split("/")[0])
+    return modules
+
+
+class SpecialistClassifier:
+    """🚦 Acumula sinais por arquivo e decide quais especialistas executar"""
+
+    def __init__(self, min_hits: int = 1):
+        self.min_hits = min_hits
+        self.files: Dict[str, List[str]] = {role: [] for role in ROLE_LABELS}
+        self.signals: Dict[str, Dict[str, int]] = {role: {} for role in ROLE_LABELS}
+        self.total_files = 0
+
+    def _hit(self, role: str, signal: str, rel_path: str) -> None:
+        self.signals[role][signal] = self.signals[role].get(signal, 0) + 1
+        # observe() processa um arquivo por vez: basta comparar com o último registrado
+        if not self.files[role] or self.files[role][-1] != rel_path:
+            self.files[role].append(rel_path)
+
+    def observe(self, rel_path: str, content: str) -> None:
+        """👀 Registra os sinais de um arquivo (não guarda o conteúdo)"""
+        self.total_files += 1
+        name = os.path.basename(rel_path).lower()
+        ext = os.path.splitext(name)[1]
+        parts = rel_path.lower().replace("\\", "/").split("/")
+        imports = extract_imports(rel_path, content)
+        is_test = any(p in ("test", "tests", "__tests__") for p in parts) or name.startswith("test_") \
+            or ".test." in name or ".spec." in name
+
+        if ext in CODE_EXTS:
+            self._hit("arquiteto", "code_files", rel_path)
+            self._hit("qa_engineer", "test_files" if is_test else "code_files", rel_path)
+        if ext in {".yaml", ".yml"} and (".github" in parts or "ci" in name):
+            self._hit("qa_engineer", "ci_configs", rel_path)
+        if ext in DOC_EXTS or (ext == ".py" and '"""' in content[:2000]):
+            self._hit("documentador", "docs" if ext in DOC_EXTS else "docstrings", rel_path)
+
+        if imports & PRODUCT_MODULES:
+            self._hit("product_manager", "ui_or_cli_imports", rel_path)
+        if name.startswith("readme") or PRODUCT_KEYWORDS_RE.search(content):
+            self._hit("product_manager", "entrypoints_or_readme", rel_path)
+
+        if PERSONAL_DATA_RE.search(content):
+            self._hit("especialista_legal", "personal_data_terms", rel_path)
+        if imports & THIRD_PARTY_MODULES:
+            self._hit("especialista_legal", "third_party_apis", rel_path)
+        if name in LICENSE_NAMES:
+            self._hit("especialista_legal", "license_files", rel_path)
+
+        if imports & LLM_MODULES:
+            self._hit("engenheiro_ia", "llm_imports", rel_path)
+        if imports & ML_MODULES:
+            self._hit("engenheiro_ia", "ml_imports", rel_path)
+        if LLM_KEYWORDS_RE.search(content):
+            self._hit("engenheiro_ia", "llm_keywords", rel_path)
+
+    def to_state(self) -> Dict:
+        """📤 Estado serializável (para workers devolverem ao coordenador)"""
+        return {"files": self.files, "signals": self.signals, "total_files": self.total_files}
+
+    def merge_state(self, state: Dict) -> None:
+        """📥 Incorpora o estado acumulado por outro classificador (ex.: de um worker)"""
+        self.total_files += state.get("total_files", 0)
+        for role, files in state.get("files", {}).items():
+            self.files.setdefault(role, []).extend(files)
+        for role, signals in state.get("signals", {}).items():
+            target = self.signals.setdefault(role, {})
+            for key, value in signals.items():
+                target[key] = target.get(key, 0) + value
+
+    def decide(self) -> Dict[str, SpecialistDecision]:
+        """⚖️ Decide a relevância de cada especialista a partir dos sinais acumulados"""
+        skip_reasons = {
+            "arquiteto": None,  # sempre executa (também é o consolidador)
+            "qa_engineer": "nenhum arquivo de código ou teste encontrado",
+            "documentador": "nenhuma documentação ou docstring encontrada",
+            "product_manager": "nenhum ponto de entrada, CLI, interface ou README detectado",
+            "especialista_legal": "nenhum indício de dados pessoais, APIs de terceiros ou licenças",
+            "engenheiro_ia": "nenhum uso de LLM/ML detectado (imports ou chamadas)",
+        }
+        decisions = {}
+        for role in ROLE_LABELS:
+            hits = sum(self.signals[role].values())
+            relevant = skip_reasons[role] is None or hits >= self.min_hits
+            if relevant:
+                summary = ", ".join(f"{k}={v}" for k, v in sorted(self.signals[role].items())) or "papel obrigatório"
+                reason = f"sinais: {summary}"
+            else:
+                reason = skip_reasons[role]
+            decisions[role] = SpecialistDecision(
+                role=role,
+                relevant=relevant,
+                reason=reason,
+                files=list(self.files[role]),
+                signals=dict(self.signals[role]),
+            )
+        return decisions
+
+
+def render_skipped_markdown(decisions: Dict[str, SpecialistDecision]) -> str:
+    """📝 Seção de relatório listando especialistas não executados e o motivo"""
+    skipped = [d for d in decisions.values() if not d.relevant]
+    if not skipped:
+        return ""
+    lines = ["## 🚦 Especialistas não executados", "",
+             "| Especialista | Motivo |", "|---|---|"]
+    for d in skipped:
+        lines.append(f"| {ROLE_LABELS.get(d.role, d.role)} | {d.reason} |")
+    return "\n".join(lines) + "\n"
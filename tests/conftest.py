@@ -0,0 +1,43 @@
+"""Fixtures compartilhadas: endpoint fake em porta livre e respostas lentas/falhas injetadas."""
+
+from typing import List, Optional
+
+import pytest
+
+from endpoint_fake import FakeConfig, serve
+
+
+class ScriptedConfig(FakeConfig):
+    """FakeConfig cujas primeiras requisições seguem um roteiro de atrasos e falhas"""
+
+    def __init__(self, delays: Optional[List[float]] = None, failures: Optional[List[bool]] = None, **kwargs):
+        kwargs.setdefault("latency", 0.01)
+        kwargs.setdefault("jitter", 0.0)
+        super().__init__(**kwargs)
+        self.delays = list(delays or [])
+        self.failures = list(failures or [])
+
+    def delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            return self.delays.pop(0) if self.delays else self.latency
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.failures.pop(0) if self.failures else False
+
+
+@pytest.fixture
+def fake_endpoint():
+    """Sobe endpoints fake (`start(config)` → URL base `.../v1`) e derruba todos no fim"""
+    servers = []
+
+    def start(config: Optional[FakeConfig] = None) -> str:
+        server = serve(0, config)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,29 @@
+"""Resultados por unidade de símbolo independem da posição da unidade no arquivo."""
+
+from analise_simbolos import Symbol, SymbolUnit, merge_unit_results, shift_lines, unit_snippet
+
+
+def unit_at(start, name="f"):
+    text = "\n".join(f"linha {i}" for i in range(5))
+    return SymbolUnit([Symbol(name, start, start + 4, text)])
+
+
+def test_snippet_usa_linhas_relativas_a_unidade():
+    assert unit_snippet(unit_at(10), "def f():\n    pass").startswith("@@ L1\n")
+    assert unit_snippet(unit_at(40), "def f():\n    pass") == unit_snippet(unit_at(10), "def f():\n    pass")
+
+
+def test_merge_converte_linhas_para_o_arquivo():
+    structured = {"summary": "ok", "scores": {}, "quick_wins": [],
+                  "findings": [{"severity": "high", "description": "eval", "line": 2}]}
+    markdown = "Uso de eval na linha 2 (linhas 2-3, L3)."
+    _, merged = merge_unit_results("app.py", [(unit_at(100), markdown, structured)])
+    assert merged["findings"][0]["line"] == 101
+    assert structured["findings"][0]["line"] == 2  # resultado em cache não é alterado
+
+    text, _ = merge_unit_results("app.py", [(unit_at(100), markdown, structured)])
+    assert "linha 101 (linhas 101-102, L102)" in text
+
+
+def test_shift_lines_sem_deslocamento():
+    assert shift_lines("linha 7", 0) == "linha 7"
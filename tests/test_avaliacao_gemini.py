@@ -0,0 +1,48 @@
+"""Modo combinado: orçamento de saída por seção aplicado na chamada e na resposta."""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def gemini():
+    pytest.importorskip("dotenv")
+    import avaliacao_gemini
+    return avaliacao_gemini
+
+
+class ScriptedModel:
+    """Responde com as seções pedidas; `long_section` vem bem acima do orçamento"""
+
+    def __init__(self, gemini, long_section=None):
+        self.gemini = gemini
+        self.long_section = long_section
+        self.params = []
+
+    def generate_content(self, prompt, **params):
+        self.params.append(params)
+        parts = []
+        for key in [spec["key"] for spec in self.gemini.FUSED_ROLES] + ["final"]:
+            marker = self.gemini.SECTION_MARKER.format(key=key)
+            if marker + "\n" in prompt:
+                body = "linha longa de análise\n" * (400 if key == self.long_section else 5)
+                parts.append(f"{marker}\n{body}")
+        return SimpleNamespace(text="\n".join(parts))
+
+
+def test_max_tokens_e_a_soma_dos_orcamentos(gemini):
+    model = ScriptedModel(gemini)
+    results, overruns = gemini.analyze_fused(model, "relatório", include_final=True, section_tokens=300)
+    per_section = gemini.SECTION_MARKER_TOKENS
+    assert model.params == [{"max_tokens": 6 * (300 + per_section) + gemini.FINAL_SECTION_TOKENS + per_section}]
+    assert overruns == [] and results["final"]
+
+
+def test_secao_acima_do_orcamento_e_truncada_e_registrada(gemini):
+    budget = gemini.DEFAULT_SECTION_TOKENS
+    results, overruns = gemini.analyze_fused(ScriptedModel(gemini, long_section="qualidade"), "relatório")
+    assert [o["section"] for o in overruns] == ["qualidade"]
+    assert overruns[0]["estimated_tokens"] > budget and overruns[0]["budget"] == budget
+    assert "seção truncada" in results["qualidade"]
+    assert len(results["qualidade"]) < budget * gemini.CHARS_PER_TOKEN + 200
@@ -0,0 +1,93 @@
+"""Backend local: cliente por backend, requisições em voo com `--slots` e a fase por arquivo local."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import cliente_llm
+from cliente_llm import get_client, parse_backends, usage_by_backend
+from conftest import ScriptedConfig
+
+
+@pytest.fixture
+def backends(fake_endpoint, monkeypatch):
+    """Remoto e local apontando para endpoints fake distintos; o local com 4 slots de inferência"""
+    monkeypatch.setattr(cliente_llm, "_clients", {})
+    monkeypatch.setenv("LLM_BASE_URL", fake_endpoint(ScriptedConfig()))
+    monkeypatch.setenv("LLM_LOCAL_BASE_URL", fake_endpoint(ScriptedConfig(latency=0.2, slots=4)))
+    monkeypatch.setenv("LLM_LOCAL_MODEL", "qwen2.5-coder-7b")
+    monkeypatch.setenv("LLM_LOCAL_MAX_CONNECTIONS", "16")
+    monkeypatch.delenv("LLM_LOCAL_API_KEY", raising=False)
+    monkeypatch.setenv("GEMINI_API_KEY", "segredo")
+
+
+def test_parse_backends():
+    assert parse_backends("file=local, consolidation=remote") == {"file": "local", "consolidation": "remote"}
+    with pytest.raises(ValueError):
+        parse_backends("file=gpu")
+
+
+def test_cliente_local_separado_do_remoto(backends):
+    local, remote = get_client("local"), get_client("remote")
+    assert local is not remote and local.calls is remote.calls
+    assert local.api_key == "" and "Authorization" not in local.http.headers
+    assert local.max_connections == 16
+
+    local.generate("oi", "gemini-2.5-flash", "file")
+    remote.generate("oi", "gemini-2.5-flash", "file")
+    usage = usage_by_backend()
+    assert set(usage["local"]["by_model"]) == {"qwen2.5-coder-7b"}
+    assert set(usage["remote"]["by_model"]) == {"gemini-2.5-flash"}
+
+
+def test_chave_do_remoto_so_vai_para_a_url_base_dele(backends):
+    """O pool do remoto é o do LiteLLM para todos os backends: requisição ao local sai sem a chave"""
+    remote, local = get_client("remote"), get_client("local")
+    sent = []
+
+    def record(request):
+        sent.append((str(request.url).rsplit("/", 2)[0], request.headers.get("authorization")))
+        return httpx.Response(200)
+
+    remote.http._transport = httpx.MockTransport(record)
+    assert "Authorization" not in remote.http.headers
+    remote.http.post(remote.base_url + "chat/completions", json={})
+    remote.http.post(local.base_url + "chat/completions", json={})
+    assert sent == [(remote.base_url.rstrip("/"), "Bearer segredo"), (local.base_url.rstrip("/"), None)]
+
+
+def test_requisicoes_em_voo_respeitam_os_slots(backends):
+    local = get_client("local")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        texts = list(pool.map(lambda i: local.generate(f"arquivo {i}", call_type="file"), range(16)))
+    elapsed = time.monotonic() - started
+    assert all("endpoint fake" in t for t in texts)
+    # 16 requisições de 0,2s em 4 slots: ~4 rodadas, bem abaixo das 16 de uma por vez
+    assert 0.7 <= elapsed < 2.0
+
+
+def test_fase_por_arquivo_no_backend_local(backends, tmp_path, monkeypatch):
+    pytest.importorskip("crewai")
+    from crew_avaliacao_completa import CodebaseAnalysisCrew
+
+    project = tmp_path / "projeto"
+    project.mkdir()
+    for i in range(8):
+        (project / f"modulo_{i}.py").write_text(
+            "\n".join(f"def funcao_{i}_{j}(x):\n    return x * {j}\n" for j in range(20)), encoding="utf-8")
+    reports = tmp_path / "relatorios"
+    reports.mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    crew = CodebaseAnalysisCrew(agent_verbose=False, backends={"file": "local"})
+    run = crew._new_run_state(str(project), str(reports), "20250101_000000", model_routing=False)
+    crew._run_local_phase(run, max_files=50, max_size_bytes=10 ** 6)
+
+    meta = run["extra_metadata"]["local_backend"]
+    assert meta["requests"] == 8 and meta["failed_requests"] == 0
+    assert meta["model"] == "qwen2.5-coder-7b"
+    assert len(run["per_file_reports"]) == 8
+    assert usage_by_backend()["local"]["by_model"]["qwen2.5-coder-7b"]["calls"] == 8
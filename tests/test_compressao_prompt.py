@@ -0,0 +1,19 @@
+"""Arquivos com formato inesperado não derrubam a compressão do prompt."""
+
+import json
+
+from compressao_prompt import PromptCompressor
+
+
+def test_lockfile_com_lista_no_topo_vira_resumo_por_schema():
+    snippet = PromptCompressor().compress("package-lock.json", json.dumps(list(range(5000))))
+    assert snippet.kind == ".json (schema)"
+    assert "list[5000]" in snippet.text
+
+
+def test_falha_na_compressao_devolve_conteudo_original(monkeypatch):
+    compressor = PromptCompressor()
+    monkeypatch.setattr(compressor, "_compress", lambda rel_path, content: 1 / 0)
+    snippet = compressor.compress("app.py", "x = 1\ny = 2")
+    assert snippet.text == "x = 1\ny = 2" and snippet.line_map == [1, 2]
+    assert compressor.stats["(sem compressão)"]["files"] == 1
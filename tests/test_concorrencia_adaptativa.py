@@ -0,0 +1,120 @@
+"""Limite AIMD sob carga variável: recua em 429 e em latência inflada e volta a subir quando a carga cai."""
+
+import threading
+import time
+
+from cliente_llm import LLMClient
+from concorrencia_adaptativa import AdaptiveLimiter, run_in_flight
+from endpoint_fake import FakeConfig, parse_capacity
+from execucao_chamadas import CallExecutor, CallPolicy
+
+
+def _run_until(fake_endpoint, config, seconds, max_limit=16, on_tick=None):
+    """Dispara chamadas contra o endpoint fake por `seconds`, com o limite adaptativo no executor"""
+    calls = CallExecutor(policies={"file": CallPolicy(timeout_seconds=10.0, max_retries=50, backoff_base=0.02,
+                                                      backoff_max=0.1, hedge=False)})
+    client = LLMClient(base_url=fake_endpoint(config), api_key="", max_connections=max_limit, calls=calls)
+    limiter = AdaptiveLimiter(max_limit=max_limit)
+    limiter.attach(calls, ("file",))
+    started = time.monotonic()
+
+    def jobs():
+        while time.monotonic() - started < seconds:
+            if on_tick is not None:
+                on_tick(time.monotonic() - started)
+            yield None
+
+    failures = []
+    run_in_flight(jobs(), lambda _: client.generate("carga", "fake", "file"),
+                  lambda _, future: future.exception() and failures.append(future.exception()), limiter)
+    limiter.detach(calls)
+    client.close()
+    assert failures == []
+    return limiter.summary()
+
+
+def _limits_between(decisions, start, end):
+    return [d["to"] for d in decisions if start <= d["t"] < end]
+
+
+def test_recua_em_429_e_volta_a_subir_quando_a_capacidade_volta(fake_endpoint):
+    # Provedor aceita 10 simultâneas, cai para 2 entre 1,5s e 3s e volta para 10
+    config = FakeConfig(latency=0.05, jitter=0.0, capacity=parse_capacity("0:10,1.5:2,3:10"))
+    summary = _run_until(fake_endpoint, config, 4.5)
+    decisions = summary["decisions"]
+
+    assert max(_limits_between(decisions, 0, 1.5)) >= 6
+    throttles = [d for d in decisions if d["reason"] == "throttle"]
+    assert config.throttled > 0 and any(1.5 <= d["t"] < 3.0 for d in throttles)
+    assert min(_limits_between(decisions, 1.5, 3.0)) <= 2
+    recovered = [d for d in decisions if d["t"] >= 3.0 and d["reason"] == "increase"]
+    assert recovered and max(d["to"] for d in recovered) >= 4
+
+
+def test_recua_em_latencia_inflada_e_volta_a_subir_quando_a_fila_some(fake_endpoint):
+    # Sem 429: só 3 slots de inferência, o excedente espera na fila do servidor (latência sobe).
+    # Aos 2s o servidor ganha 32 slots e a fila some.
+    config = FakeConfig(latency=0.05, jitter=0.0, slots=3)
+    upgraded = threading.Event()
+
+    def upgrade(elapsed):
+        if elapsed >= 2.0 and not upgraded.is_set():
+            config.slots = threading.BoundedSemaphore(32)
+            upgraded.set()
+
+    summary = _run_until(fake_endpoint, config, 4.5, max_limit=32, on_tick=upgrade)
+    decisions = summary["decisions"]
+
+    assert summary["throttles"] == 0
+    latency_cuts = [d for d in decisions if d["reason"] == "latency" and d["t"] < 2.0]
+    assert latency_cuts and all(d["to"] < d["from"] for d in latency_cuts)
+    queued_peak = max(_limits_between(decisions, 0, 2.0))
+    assert queued_peak <= 16
+    assert max(_limits_between(decisions, 2.0, 4.5)) > queued_peak
+
+
+def test_limitador_recua_em_latencia_com_relogio_controlado():
+    now = [0.0]
+    limiter = AdaptiveLimiter(initial=4, max_limit=16, clock=lambda: now[0])
+    limiter.note_in_flight(4)
+    for _ in range(4):
+        now[0] += 0.1
+        limiter.observe(0.1)
+    assert limiter.limit == 5
+
+    limiter.note_in_flight(5)
+    for _ in range(5):
+        now[0] += 0.5
+        limiter.observe(0.5)
+    assert limiter.limit == 4 and limiter.summary()["decision_counts"]["latency"] == 1
+
+
+def test_limitador_nao_sobe_sem_requisicoes_suficientes_em_voo():
+    limiter = AdaptiveLimiter(initial=4, clock=lambda: 0.0)
+    limiter.note_in_flight(1)
+    for _ in range(8):
+        limiter.observe(0.1)
+    assert limiter.limit == 4 and limiter.decision_counts["hold_app_limited"] == 2
+
+
+def test_run_in_flight_respeita_o_limite_e_chama_done_na_thread_chamadora():
+    lock = threading.Lock()
+    active, peak, done_threads, results = [0], [0], set(), []
+
+    def work(job):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return job * 2
+
+    def done(job, future):
+        done_threads.add(threading.get_ident())
+        results.append((job, future.result()))
+
+    run_in_flight(range(20), work, done, max_in_flight=3)
+    assert peak[0] == 3
+    assert done_threads == {threading.get_ident()}
+    assert sorted(results) == [(i, i * 2) for i in range(20)]
@@ -0,0 +1,81 @@
+"""Timeout, hedging no p95 e retentativas com jitter do CallExecutor contra o endpoint fake."""
+
+import time
+
+import pytest
+
+from cliente_llm import LLMClient, LLMError
+from conftest import ScriptedConfig
+from execucao_chamadas import CallExecutor, CallPolicy, CallTimeout
+
+
+def make_client(url, **policy):
+    calls = CallExecutor(policies={"teste": CallPolicy(**policy)}, sleep=lambda _: None)
+    return LLMClient(base_url=url, api_key="", calls=calls)
+
+
+def test_timeout_abandona_chamada_lenta(fake_endpoint):
+    client = make_client(fake_endpoint(ScriptedConfig(delays=[3.0])),
+                         timeout_seconds=0.3, max_retries=0, hedge=False)
+    started = time.monotonic()
+    with pytest.raises(CallTimeout):
+        client.generate("oi", call_type="teste")
+    assert time.monotonic() - started < 1.5
+    stats = client.calls.summary()["teste"]
+    assert stats["timeouts"] == 1 and stats["failures"] == 1
+
+
+def test_retentativa_apos_timeout(fake_endpoint):
+    client = make_client(fake_endpoint(ScriptedConfig(delays=[3.0])),
+                         timeout_seconds=0.5, max_retries=1, hedge=False)
+    assert "endpoint fake" in client.generate("oi", call_type="teste")
+    stats = client.calls.summary()["teste"]
+    assert stats["timeouts"] == 1 and stats["retries"] == 1 and stats["failures"] == 0
+
+
+def test_hedge_dispara_no_p95(fake_endpoint):
+    config = ScriptedConfig(latency=0.02)
+    client = make_client(fake_endpoint(config), timeout_seconds=10.0, max_retries=0,
+                         hedge_min_samples=5, hedge_min_delay=0.1)
+    for _ in range(5):
+        client.generate("aquecimento", call_type="teste")
+    assert client.calls.summary()["teste"]["hedges"] == 0
+
+    # A próxima requisição fica presa na cauda lenta; a duplicata (latência normal) vence
+    config.delays = [5.0]
+    started = time.monotonic()
+    client.generate("lenta", call_type="teste")
+    assert time.monotonic() - started < 2.0
+    stats = client.calls.summary()["teste"]
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_sem_hedge_antes_das_amostras_minimas(fake_endpoint):
+    client = make_client(fake_endpoint(ScriptedConfig(delays=[0.4])), timeout_seconds=5.0,
+                         max_retries=0, hedge_min_samples=5, hedge_min_delay=0.05)
+    client.generate("oi", call_type="teste")
+    assert client.calls.summary()["teste"]["hedges"] == 0
+
+
+def test_retentativas_com_backoff_e_jitter(fake_endpoint):
+    sleeps = []
+    calls = CallExecutor(policies={"teste": CallPolicy(max_retries=3, backoff_base=1.0, backoff_max=1.5,
+                                                       hedge=False)}, sleep=sleeps.append)
+    client = LLMClient(base_url=fake_endpoint(ScriptedConfig(failures=[True, True, True])), api_key="", calls=calls)
+    assert "endpoint fake" in client.generate("oi", call_type="teste")
+    stats = calls.summary()["teste"]
+    assert stats["errors"] == 3 and stats["retries"] == 3 and stats["failures"] == 0
+    # Jitter completo: cada espera é sorteada em [0, min(backoff_max, base * 2^tentativa)]
+    for attempt, delay in enumerate(sleeps):
+        assert 0.0 <= delay <= min(1.5, 1.0 * 2 ** attempt)
+    assert len(sleeps) == 3
+
+
+def test_erro_propagado_apos_esgotar_retentativas(fake_endpoint):
+    sleeps = []
+    calls = CallExecutor(policies={"teste": CallPolicy(max_retries=2, hedge=False)}, sleep=sleeps.append)
+    client = LLMClient(base_url=fake_endpoint(ScriptedConfig(failures=[True] * 3)), api_key="", calls=calls)
+    with pytest.raises(LLMError) as info:
+        client.generate("oi", call_type="teste")
+    assert info.value.status_code == 500
+    assert len(sleeps) == 2 and calls.summary()["teste"]["failures"] == 1
@@ -0,0 +1,84 @@
+"""Leases, retentativas e renovação da fila de shards (SQLite)."""
+
+import time
+
+import pytest
+
+from fila_distribuida import LeaseKeeper, ShardQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = ShardQueue(str(tmp_path / "fila.db"), lease_seconds=0.2, max_attempts=2)
+    q.enqueue_run("run", {"root_dir": "/src"}, [["a.py"], ["b.py"]])
+    return q
+
+
+def _expire(queue, shard_id):
+    with queue._connect() as conn:
+        conn.execute("UPDATE shards SET lease_expires = ? WHERE id = ?", (time.time() - 1, shard_id))
+
+
+def test_claim_entrega_shards_em_ordem_e_complete_publica(queue):
+    first = queue.claim("w1")
+    second = queue.claim("w2")
+    assert first[1] == {"root_dir": "/src"} and first[2] == ["a.py"]
+    assert second[2] == ["b.py"]
+    assert queue.claim("w3") is None
+
+    assert queue.complete(first[0], "w1", {"ok": 1})
+    assert not queue.complete(second[0], "w1", {"ok": 2})  # lease de outro worker
+    assert queue.progress("run") == {"done": 1, "leased": 1}
+    assert queue.results("run") == [{"ok": 1}]
+
+
+def test_reclaim_expired_devolve_shard_de_worker_perdido(queue):
+    shard_id = queue.claim("w1")[0]
+    assert queue.reclaim_expired("run") == 0
+    _expire(queue, shard_id)
+    assert queue.reclaim_expired("run") == 1
+    assert queue.progress("run") == {"pending": 2}
+
+    again = queue.claim("w2")
+    assert again[0] == shard_id
+    assert not queue.heartbeat(shard_id, "w1")
+    assert queue.heartbeat(shard_id, "w2")
+
+
+def test_max_attempts_marca_shard_como_falho(queue):
+    shard_id = queue.claim("w1")[0]
+    queue.fail(shard_id, "w1", "erro 1")
+    assert queue.claim("w1")[0] == shard_id
+    queue.fail(shard_id, "w1", "erro 2")
+    assert queue.failed_shards("run") == [{"id": shard_id, "files": ["a.py"], "error": "erro 2"}]
+
+    # Lease expirado na última tentativa: o claim falha o shard em vez de entregá-lo de novo
+    other = queue.claim("w1")[0]
+    _expire(queue, other)
+    queue.reclaim_expired("run")
+    assert queue.claim("w2")[0] == other
+    _expire(queue, other)
+    assert queue.claim("w3") is None
+    assert {s["id"] for s in queue.failed_shards("run")} == {shard_id, other}
+
+
+def test_heartbeat_apos_lease_perdido(queue):
+    shard_id = queue.claim("w1")[0]
+    _expire(queue, shard_id)
+    queue.reclaim_expired("run")
+    assert not queue.heartbeat(shard_id, "w1")
+    assert not queue.complete(shard_id, "w1", {"tarde": True})
+    assert queue.results("run") == []
+
+
+def test_lease_keeper_renova_durante_trabalho_longo_e_detecta_perda(queue):
+    shard_id = queue.claim("w1")[0]
+    with LeaseKeeper(queue, shard_id, "w1", interval=0.05) as lease:
+        time.sleep(0.5)  # bem mais que o lease de 0.2s
+        assert queue.reclaim_expired("run") == 0
+        assert not lease.lost.is_set()
+
+        with queue._connect() as conn:
+            conn.execute("UPDATE shards SET worker = 'w2' WHERE id = ?", (shard_id,))
+        assert lease.lost.wait(1.0)
+    assert queue.complete(shard_id, "w2", {"ok": True})
@@ -0,0 +1,15 @@
+"""Varredura do relatório base sem diretórios de cache."""
+
+from gerar_relatorio_base import scan_codebase
+
+
+def test_scan_ignora_caches_ocultos(tmp_path):
+    (tmp_path / "app.py").write_text("import os\n")
+    for cache in (".pytest_cache/v/cache", ".mypy_cache/3.12", ".custom_cache"):
+        (tmp_path / cache).mkdir(parents=True)
+        (tmp_path / cache / "lastfailed.json").write_text("{}")
+    (tmp_path / ".github" / "workflows").mkdir(parents=True)
+    (tmp_path / ".github" / "workflows" / "ci.yml").write_text("on: push\n")
+
+    paths = {info["file"] for info in scan_codebase(str(tmp_path), workers=1)}
+    assert paths == {"app.py", ".github/workflows/ci.yml"}
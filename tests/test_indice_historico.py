@@ -0,0 +1,43 @@
+"""Atualização incremental do índice histórico com várias pastas base."""
+
+import shutil
+
+import pytest
+
+from indice_historico import HistoryIndex
+
+
+def make_run(base, timestamp, text):
+    reports = base / f"reports_by_file_{timestamp}"
+    reports.mkdir(parents=True)
+    (reports / "app.py.md").write_text(f"# Análise do arquivo: app.py\n\n{text}\n", encoding="utf-8")
+    (base / f"relatorio_final_startup_{timestamp}.md").write_text(f"# Final\n\n{text}\n", encoding="utf-8")
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = HistoryIndex(str(tmp_path / "historico.db"))
+    yield index
+    index.close()
+
+
+def test_atualizar_outra_base_preserva_o_historico(index, tmp_path):
+    make_run(tmp_path / "a", "20250101_000000", "sql injection no login")
+    make_run(tmp_path / "b", "20250201_000000", "token hardcoded")
+    index.update([str(tmp_path / "a")])
+
+    stats = index.update([str(tmp_path / "b")])
+    assert stats["runs_removed"] == 0
+    assert {r["run_id"] for r in index.search("injection")} == {"20250101_000000"}
+    assert index.stats()["runs"] == 2
+
+
+def test_execucao_apagada_sai_do_indice(index, tmp_path):
+    make_run(tmp_path / "a", "20250101_000000", "sql injection no login")
+    make_run(tmp_path / "b", "20250201_000000", "token hardcoded")
+    index.update([str(tmp_path / "a"), str(tmp_path / "b")])
+
+    shutil.rmtree(tmp_path / "a")
+    stats = index.update([str(tmp_path / "b")])
+    assert stats["runs_removed"] == 1
+    assert index.search("injection") == []
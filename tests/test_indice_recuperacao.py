@@ -0,0 +1,52 @@
+"""Índice de recuperação persistido entre execuções sem evidências de arquivos que sumiram."""
+
+from indice_recuperacao import RetrievalIndex
+
+
+def test_prune_remove_arquivos_ausentes_da_execucao(tmp_path):
+    index = RetrievalIndex(str(tmp_path))
+    for name, text in (("antigo.py", "senha hardcoded no cliente http"), ("app.py", "consulta sql montada")):
+        index.add_document(f"report:{name}", text, "report", name)
+        index.add_document(f"source:{name}", text, "source", name)
+    index.add_document("input:relatorio.md", "senha hardcoded", "input")
+    index.save()
+
+    # Execução seguinte: antigo.py foi apagado
+    index = RetrievalIndex(str(tmp_path))
+    assert index.prune({"report:app.py", "source:app.py"}) == 2
+    index.save()
+
+    reloaded = RetrievalIndex(str(tmp_path))
+    assert {c["source"] for c in reloaded.search("senha hardcoded", kinds=["report", "source"])} == set()
+    assert "input:relatorio.md" in reloaded.doc_hashes
+    assert {c["source"] for c in reloaded.search("consulta sql")} == {"app.py"}
+
+
+def test_prune_missing_mantem_arquivos_nao_visitados(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "app.py").write_text("print()")
+    (root / "nao_visitado.py").write_text("print()")
+    index = RetrievalIndex(str(tmp_path / "indice"))
+    for name in ("app.py", "nao_visitado.py", "apagado.py"):
+        index.add_document(f"report:{name}", f"relatorio de {name} com consulta sql", "report", name)
+
+    removed = index.prune_missing(lambda rel: (root / rel).exists())
+
+    assert removed == 1
+    assert set(index.doc_hashes) == {"report:app.py", "report:nao_visitado.py"}
+
+
+def test_search_reusa_matriz_ate_o_indice_mudar(tmp_path):
+    index = RetrievalIndex()
+    index.add_document("report:a.py", "consulta sql montada por concatenacao", "report", "a.py")
+    assert [c["source"] for c in index.search("consulta sql")] == ["a.py"]
+    matrix = index._query_matrix()
+    index.search("concatenacao")
+    assert index._query_matrix() is matrix
+
+    index.add_document("report:b.py", "consulta sql parametrizada", "report", "b.py")
+    assert index._query_matrix() is not matrix
+    assert {c["source"] for c in index.search("consulta sql")} == {"a.py", "b.py"}
+    index.prune_missing(lambda rel: rel == "b.py")
+    assert [c["source"] for c in index.search("consulta sql")] == ["b.py"]
@@ -0,0 +1,26 @@
+"""Busca por caminho no inventário colunar, em construção e mapeado do disco."""
+
+from inventario import FileInventory
+
+
+def build(n=1000):
+    inventory = FileInventory()
+    for i in range(n):
+        inventory.add(f"pacote_{i % 7}/modulo_{i}.py", size=i)
+    return inventory
+
+
+def test_find_reconstroi_o_indice_apos_add():
+    inventory = build()
+    assert inventory.find("pacote_3/modulo_500.py") == 500
+    assert inventory.find("nao/existe.py") is None
+    novo = inventory.add("novo\\arquivo.py")
+    assert inventory.find("novo/arquivo.py") == novo
+    assert inventory.find("pacote_0/modulo_0.py") == 0
+
+
+def test_find_no_inventario_mapeado(tmp_path):
+    build().save(str(tmp_path))
+    loaded = FileInventory.load(str(tmp_path))
+    assert all(loaded.find(f"pacote_{i % 7}/modulo_{i}.py") == i for i in range(0, 1000, 37))
+    assert loaded.find("pacote_1/modulo_1000.py") is None
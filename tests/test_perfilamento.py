@@ -0,0 +1,35 @@
+"""Diretório de saída do perfilamento por etapa."""
+
+import json
+import os
+
+from perfilamento import Profiler
+
+
+def test_etapas_no_diretorio_padrao_sao_movidas_para_o_da_execucao(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    profiler = Profiler(sample_interval=0.001)
+    with profiler.stage("clone"):
+        sum(range(1000))
+    default_dir = profiler.out_dir
+    assert profiler.dir_is_default and os.path.isfile(os.path.join(default_dir, "clone.prof"))
+
+    run_dir = str(tmp_path / "relatorios" / "perfil")
+    profiler.set_output_dir(run_dir)
+    with profiler.stage("scan"):
+        sum(range(1000))
+    summary = json.load(open(profiler.write_summary(), encoding="utf-8"))
+
+    assert not os.path.exists(default_dir)
+    assert summary["output_dir"] == run_dir
+    for stage in ("clone", "scan"):
+        assert os.path.dirname(summary["stages"][stage]["cprofile"]) == run_dir
+        assert os.path.isfile(summary["stages"][stage]["folded"])
+
+
+def test_diretorio_explicito_nao_e_realocado(tmp_path):
+    profiler = Profiler(out_dir=str(tmp_path / "meu_perfil"))
+    with profiler.stage("scan"):
+        pass
+    assert not profiler.dir_is_default
+    assert os.path.isfile(tmp_path / "meu_perfil" / "scan.prof")
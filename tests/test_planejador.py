@@ -0,0 +1,44 @@
+"""Chamadas estimadas pelo `--plan` para cada tipo de chamada da execução real."""
+
+from planejador import plan_analysis, plan_directory_summaries
+
+
+def _project(tmp_path, dirs=("a", "b", "a/sub"), files_per_dir=16):
+    for d in dirs:
+        (tmp_path / d).mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_dir):
+            (tmp_path / d / f"m{i}.py").write_text(f"def f{i}(x):\n    return x + {i}\n")
+    return tmp_path
+
+
+def test_resumos_por_diretorio_so_onde_a_entrada_passa_do_limite():
+    small = [f"pequeno/m{i}.py" for i in range(3)]
+    large = [f"grande/m{i}.py" for i in range(40)]
+    inputs, root_chars = plan_directory_summaries(small + large)
+    assert len(inputs) == 1 and inputs[0] > 6000  # só `grande/` vai ao LLM
+    assert root_chars < 24000
+
+
+def test_plano_incremental_conta_resumos_por_diretorio(tmp_path):
+    root = _project(tmp_path)
+    incremental = plan_analysis(str(root), specialist_gating=False)
+    plain = plan_analysis(str(root), specialist_gating=False, incremental=False)
+    assert incremental["calls_by_kind"]["directory_summary"] == 3
+    assert "directory_summary" not in plain["calls_by_kind"]
+    assert incremental["total_calls"] == plain["total_calls"] + 3
+    assert incremental["wall_time_seconds"] > plain["wall_time_seconds"]
+
+
+def test_arquivo_grande_conta_uma_chamada_por_unidade_de_simbolos(tmp_path):
+    body = "".join(f"def funcao_{i}(x):\n" + "".join(f"    x = x + {j}\n" for j in range(30)) + "    return x\n\n\n"
+                   for i in range(20))
+    (tmp_path / "grande.py").write_text(body)
+    by_units = plan_analysis(str(tmp_path), specialist_gating=False, model_routing=False)
+    whole = plan_analysis(str(tmp_path), specialist_gating=False, model_routing=False, symbol_level=False)
+
+    units = by_units["top_files"][0]["units"]
+    assert units and units > 1
+    assert by_units["calls_by_kind"]["symbol_unit"] == units
+    assert "full" not in by_units["calls_by_kind"]
+    assert whole["calls_by_kind"]["full"] == 1 and "symbol_unit" not in whole["calls_by_kind"]
+    assert by_units["total_calls"] == whole["total_calls"] + units - 1
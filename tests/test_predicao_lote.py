@@ -0,0 +1,78 @@
+"""Submissão, polling, resultados (com falhas por linha) e retomada do BatchJob contra o endpoint fake."""
+
+import json
+import os
+
+import pytest
+
+from cliente_llm import LLMClient
+from conftest import ScriptedConfig
+from predicao_lote import BatchJob, batch_request, write_batch_input
+
+
+def submitted_job(url, tmp_path, count=3):
+    client = LLMClient(base_url=url, api_key="")
+    job = BatchJob(client, str(tmp_path / "lote_estado.json"))
+    lines = [batch_request(f"arquivo-{i}", "gemini-2.5-flash", f"ANÁLISE DO ARQUIVO: a{i}.py") for i in range(count)]
+    input_path = str(tmp_path / "lote_entrada.jsonl")
+    write_batch_input(input_path, lines)
+    job.state = {"requests": {line["custom_id"]: {"model": "gemini-2.5-flash"} for line in lines},
+                 "input_path": input_path}
+    job.save()
+    return job, input_path
+
+
+def test_submete_aguarda_e_baixa_resultados(fake_endpoint, tmp_path):
+    url = fake_endpoint(ScriptedConfig(batch_delay=0.2, failures=[False, True, False]))
+    job, input_path = submitted_job(url, tmp_path)
+    batch_id = job.submit(input_path)
+
+    batch = job.wait(poll_seconds=0.05, timeout_seconds=10)
+    assert batch["status"] == "completed"
+    assert batch["request_counts"] == {"total": 3, "completed": 2, "failed": 1}
+
+    results = job.results()
+    assert set(results) == {"arquivo-0", "arquivo-1", "arquivo-2"}
+    assert results["arquivo-0"][0] and results["arquivo-0"][1] is None
+    text, error = results["arquivo-1"]
+    assert text is None and error.startswith("500")
+    assert job.client.usage_summary()["by_model"]["gemini-2.5-flash"]["calls"] == 2
+
+    saved = json.loads((tmp_path / "lote_estado.json").read_text(encoding="utf-8"))
+    assert saved["batch_id"] == batch_id and saved["status"] == "completed"
+
+
+def test_retoma_pelo_arquivo_de_estado(fake_endpoint, tmp_path):
+    url = fake_endpoint(ScriptedConfig(batch_delay=0.2))
+    job, input_path = submitted_job(url, tmp_path)
+    job.submit(input_path)
+    with pytest.raises(TimeoutError):
+        job.wait(poll_seconds=0.01, timeout_seconds=0.0)
+
+    # Outro processo retoma só com o estado salvo, sem submeter de novo
+    resumed = BatchJob.load(LLMClient(base_url=url, api_key=""), job.state_path)
+    resumed.ensure_submitted()
+    assert resumed.state["batch_id"] == job.state["batch_id"]
+    assert resumed.wait(poll_seconds=0.05, timeout_seconds=10)["status"] == "completed"
+    assert all(text for text, _ in resumed.results().values())
+
+
+def test_retomada_resubmete_lote_nao_criado(fake_endpoint, tmp_path):
+    url = fake_endpoint(ScriptedConfig(batch_delay=0.0))
+    job, _ = submitted_job(url, tmp_path)  # estado salvo, submissão nunca concluída
+
+    resumed = BatchJob.load(LLMClient(base_url=url, api_key=""), job.state_path)
+    with pytest.raises(RuntimeError, match="batch_id"):
+        resumed.refresh()
+    resumed.ensure_submitted()
+    assert resumed.state["batch_id"]
+    assert resumed.wait(poll_seconds=0.05, timeout_seconds=10)["status"] == "completed"
+    assert len(resumed.results()) == 3
+
+
+def test_retomada_sem_jsonl_de_entrada_falha_com_mensagem(fake_endpoint, tmp_path):
+    job, input_path = submitted_job(fake_endpoint(ScriptedConfig()), tmp_path)
+    os.remove(input_path)
+    resumed = BatchJob.load(job.client, job.state_path)
+    with pytest.raises(RuntimeError, match="--batch-submit"):
+        resumed.ensure_submitted()
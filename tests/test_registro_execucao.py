@@ -0,0 +1,43 @@
+"""Configuração de logging: só quem chama `setup_logging` altera os handlers raiz."""
+
+import importlib
+import logging
+import logging.handlers
+import sys
+
+import pytest
+
+from registro_execucao import current_log_mode, setup_logging
+
+
+@pytest.fixture
+def root_handlers():
+    root = logging.getLogger()
+    saved, level = list(root.handlers), root.level
+    yield root
+    setup_logging("normal")
+    root.handlers[:] = saved
+    root.setLevel(level)
+
+
+def test_importar_o_crew_nao_altera_o_logging_raiz(root_handlers):
+    pytest.importorskip("crewai")
+    marker = logging.NullHandler()
+    root_handlers.addHandler(marker)
+    sys.modules.pop("crew_avaliacao_completa", None)
+    importlib.import_module("crew_avaliacao_completa")
+    assert marker in root_handlers.handlers
+
+
+def test_modo_throughput_enfileira_e_volta_ao_normal(root_handlers):
+    setup_logging("throughput", sample_every=10)
+    assert current_log_mode() == "throughput"
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in root_handlers.handlers)
+    setup_logging("normal")
+    assert current_log_mode() == "normal"
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in root_handlers.handlers)
+
+
+def test_modo_invalido():
+    with pytest.raises(ValueError):
+        setup_logging("verboso")
@@ -0,0 +1,81 @@
+"""Extração, validação e agregação dos resultados estruturados por arquivo."""
+
+import json
+import math
+
+import pytest
+
+from resultados_estruturados import aggregate_results, extract_structured_result, validate_structured_result
+
+
+def _report(payload: str) -> str:
+    return f"# Análise\n\nTexto do relatório.\n\n```json\n{payload}\n```\n"
+
+
+def test_sem_bloco_json_devolve_o_texto_e_o_erro():
+    markdown, structured, error = extract_structured_result("# Análise\n\nSó markdown.")
+    assert markdown == "# Análise\n\nSó markdown."
+    assert structured is None and "ausente" in error
+
+
+def test_json_malformado_devolve_markdown_sem_o_bloco():
+    markdown, structured, error = extract_structured_result(_report('{"scores": {"quality": 80,}}'))
+    assert structured is None and error
+    assert "```json" not in markdown and "Texto do relatório." in markdown
+
+
+def test_usa_o_ultimo_bloco_json():
+    text = _report('{"scores": {"quality": 10}}') + _report('{"scores": {"quality": 90}}')
+    _, structured, error = extract_structured_result(text)
+    assert error is None and structured["scores"]["quality"] == 90.0
+
+
+def test_scores_fora_da_faixa_sao_limitados_e_invalidos_viram_none():
+    result = validate_structured_result({"scores": {"quality": 140, "security": -5, "complexity": "alto",
+                                                    "test_coverage": float("nan")}})
+    assert result["scores"] == {"quality": 100.0, "security": 0.0, "complexity": None, "test_coverage": None}
+
+
+def test_findings_normalizados_e_estrutura_minima():
+    result = validate_structured_result({"findings": [
+        {"severity": "Crítica", "description": " senha no código ", "line": 3},
+        {"severity": "urgente", "description": "severidade desconhecida", "line": True},
+        {"severity": "low"},
+    ], "quick_wins": "usar variáveis de ambiente"})
+    assert [(f["severity"], f["description"], f["line"]) for f in result["findings"]] == [
+        ("critical", "senha no código", 3), ("medium", "severidade desconhecida", None)]
+    assert result["quick_wins"] == ["usar variáveis de ambiente"]
+
+    with pytest.raises(ValueError):
+        validate_structured_result({"summary": "sem scores nem findings"})
+    with pytest.raises(ValueError):
+        validate_structured_result(["não", "é", "objeto"])
+    _, structured, error = extract_structured_result(_report(json.dumps({"scores": "80"})))
+    assert structured is None and "scores" in error
+
+
+def test_agregacao_ignora_scores_ausentes_na_media():
+    entries = [
+        {"file": "a.py", "lines": 100, "structured": validate_structured_result(
+            {"scores": {"quality": 80, "security": None}, "findings": [{"severity": "high", "description": "x"}]})},
+        {"file": "b.py", "lines": 100, "structured": validate_structured_result(
+            {"scores": {"quality": 40, "security": 90}})},
+        {"file": "c.py", "lines": 10, "structured": None},
+    ]
+    aggregate = aggregate_results(entries)
+    scores = aggregate["repository_scores"]
+    assert aggregate["files_total"] == 3 and aggregate["files_with_structured"] == 2
+    assert scores["quality"] == 60.0 and scores["security"] == 90.0
+    assert scores["complexity"] is None and scores["test_coverage"] is None
+    assert aggregate["severity_counts"]["high"] == 1
+    assert aggregate["hotspots"][0]["file"] == "a.py"
+    assert aggregate["hotspots"][0]["scores"]["security"] is None
+    assert all(not math.isnan(h["hotspot_score"]) for h in aggregate["hotspots"])
+
+
+def test_agregacao_sem_resultados_estruturados():
+    aggregate = aggregate_results([{"file": "a.py", "lines": 5, "structured": None}])
+    assert aggregate["files_with_structured"] == 0
+    assert aggregate["repository_scores"] == {"quality": None, "security": None, "complexity": None,
+                                              "test_coverage": None}
+    assert aggregate["hotspots"] == [] and aggregate["top_risks"] == []
@@ -0,0 +1,18 @@
+"""Curto-circuito local do roteador de modelos."""
+
+import json
+
+from roteador_modelos import ModelRouter
+
+
+def test_config_pequena_sem_conteudo_sensivel_fica_local():
+    decision = ModelRouter().route("config/settings.json", json.dumps({"debug": False, "workers": 4}))
+    assert decision.tier == "local"
+
+
+def test_config_pequena_com_segredo_vai_para_o_llm():
+    router = ModelRouter()
+    credentials = router.route("credentials.json", json.dumps({"api_key": "sk-123", "region": "us"}))
+    notes = router.route("notas.txt", "password: hunter2\n")
+    assert credentials.tier != "local" and credentials.signals["sensitive"]
+    assert notes.tier != "local"
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+📂 Varredura da Codebase
+=======================
+
+Filtros de diretório/extensão/tamanho e truncamento para prompt compartilhados
+pela análise por arquivo, pelo planejador (``--plan``) e pelos workers. A raiz
+pode ser uma pasta ou um arquivo compactado (``.tar.gz``, ``.tar.zst``,
+``.zip``), lido em streaming sem extração. Não depende de CrewAI, então pode
+ser usado sem chave de API.
+"""
+
+import logging
+import os
+import re
+import sys
+import tarfile
+import zipfile
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# filtros e extensões de interesse
+SKIP_DIRS = {".git", "__pycache__", "node_modules", "venv", ".venv", ".idea", ".env", ".crew_cache",
+             ".pytest_cache", ".mypy_cache", ".ruff_cache", ".tox", ".nox", ".hypothesis", ".cache"}
+ALLOWED_EXTS = {".py", ".md", ".txt", ".json", ".yaml", ".yml", ".ini", ".cfg", ".sh", ".tsx", ".ts", ".js"}
+# Trunca conteúdo muito grande para colocar no prompt
+MAX_CHARS = 50000
+# Arquivos compactados aceitos como raiz da análise
+ZSTD_SUFFIXES = (".tar.zst", ".tar.zstd", ".tzst")
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar") + ZSTD_SUFFIXES + (".zip",)
+# Versão ou sha no fim do nome (`projeto-1.2.0`, `dono-repo-3f2a9c1`)
+VERSION_SUFFIX_RE = re.compile(r"([-_.]v?\d[\w.]*|-[0-9a-f]{7,40})$")
+
+
+def is_archive(path: str) -> bool:
+    """📦 Se o caminho é um arquivo compactado suportado (`.tar.gz`, `.tar.zst`, `.zip`...)"""
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def cache_root_for(root_dir: str) -> str:
+    """🔑 Raiz usada para chavear caches e índice.
+
+    Para arquivos compactados, o nome sem versão/sha (`projeto-1.2.0.tar.gz` → `projeto`) no
+    diretório do arquivo: releases seguintes do mesmo projeto reaproveitam os resultados dos
+    membros inalterados.
+    """
+    if not is_archive(root_dir):
+        return root_dir
+    name = os.path.basename(root_dir)
+    name = name[: -len(next(s for s in ARCHIVE_SUFFIXES if name.lower().endswith(s)))]
+    name = VERSION_SUFFIX_RE.sub("", name) or name
+    return os.path.join(os.path.dirname(os.path.abspath(root_dir)), f"{name}.arquivo")
+
+
+def skip_dir(name: str) -> bool:
+    """🙈 Diretório fora da varredura (SKIP_DIRS ou cache oculto de ferramenta, ex.: `.foo_cache`)"""
+    return name in SKIP_DIRS or (name.startswith(".") and name.endswith("_cache"))
+
+
+def _eligible(rel_path: str, size: int, max_size_bytes: int, display_path: str) -> bool:
+    """✅ Filtros de extensão e tamanho comuns à varredura de pastas e de arquivos compactados"""
+    _, ext = os.path.splitext(rel_path)
+    if ext.lower() not in ALLOWED_EXTS:
+        return False
+    # evitar arquivos binários grandes
+    if size > max_size_bytes:
+        logger.info(f"⏭️ Pulando arquivo grande (>{max_size_bytes} bytes): {display_path}")
+        return False
+    return True
+
+
+def iter_files(root_dir: str, max_files: int, max_size_bytes: int,
+               read_content: bool = True) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """📂 Percorre a codebase aplicando filtros de diretório, extensão e tamanho.
+
+    Gera (file_path, rel_path, content) até `max_files` arquivos elegíveis
+    (content é None com `read_content=False`). Se `root_dir` é um arquivo compactado, os
+    membros são lidos em streaming, sem extrair nada para o disco.
+    """
+    if is_archive(root_dir):
+        yield from iter_archive(root_dir, max_files, max_size_bytes, read_content)
+        return
+    yielded = 0
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        # pular diretórios indesejados
+        dirnames[:] = [d for d in dirnames if not skip_dir(d)]
+
+        for fname in filenames:
+            if yielded >= max_files:
+                return
+
+            _, ext = os.path.splitext(fname)
+            if ext.lower() not in ALLOWED_EXTS:
+                continue
+
+            file_path = os.path.join(dirpath, fname)
+
+            try:
+                size = os.path.getsize(file_path)
+            except Exception:
+                logger.warning(f"⚠️ Não foi possível ler tamanho do arquivo, pulando: {file_path}")
+                continue
+            if not _eligible(fname, size, max_size_bytes, file_path):
+                continue
+
+            content = None
+            if read_content:
+                try:
+                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                        content = f.read()
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao ler {file_path}: {e}")
+                    continue
+
+            yielded += 1
+            yield file_path, os.path.relpath(file_path, root_dir), content
+
+
+# ----------------------------------------------------------------------
+# Arquivos compactados (.tar.gz, .tar.zst, .zip)
+# ----------------------------------------------------------------------
+def _open_zstd(path: str) -> BinaryIO:
+    """🗜️ Leitor de `.zst` em streaming (stdlib no Python 3.14+, senão o pacote opcional `zstandard`)"""
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("arquivos .tar.zst exigem o pacote opcional `zstandard` (pip install zstandard)") from e
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+def _clean_member_name(name: str) -> str:
+    name = name.replace("\\", "/")
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+def _member_path(name: str, prefix: str) -> Optional[str]:
+    """🧭 Caminho relativo do membro (sem o diretório raiz único) ou None se deve ser ignorado"""
+    name = _clean_member_name(name)
+    if prefix and name.startswith(prefix):
+        name = name[len(prefix):]
+    parts = name.split("/")
+    if not name or ".." in parts or any(skip_dir(part) for part in parts[:-1]):
+        return None
+    return name
+
+
+MemberIter = Iterator[Tuple[str, int, Callable[[], bytes], str]]
+
+
+def _iter_tar_members(archive_path: str) -> MemberIter:
+    """📼 (nome, tamanho, leitor, prefixo) dos membros regulares de um tar, em modo stream"""
+    if archive_path.lower().endswith(ZSTD_SUFFIXES):
+        stream = _open_zstd(archive_path)
+        tar = tarfile.open(fileobj=stream, mode="r|")
+    else:
+        stream = None
+        tar = tarfile.open(archive_path, mode="r|*")
+    try:
+        prefix = None
+        for member in tar:
+            if prefix is None:
+                # Diretório raiz único como primeiro membro (ex.: `dono-repo-<sha>/` dos tarballs do GitHub)
+                top = _clean_member_name(member.name).rstrip("/")
+                prefix = f"{top}/" if member.isdir() and top and "/" not in top else ""
+            if member.isfile():
+                yield member.name, member.size, lambda m=member: tar.extractfile(m).read(), prefix
+    finally:
+        tar.close()
+        if stream is not None:
+            stream.close()
+
+
+def _iter_zip_members(archive_path: str) -> MemberIter:
+    """🗂️ (nome, tamanho, leitor, prefixo) dos membros de um zip (o diretório central dá o prefixo exato)"""
+    with zipfile.ZipFile(archive_path) as zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+        names = [_clean_member_name(info.filename) for info in infos]
+        tops = {name.split("/", 1)[0] for name in names}
+        prefix = f"{tops.pop()}/" if len(tops) == 1 and all("/" in name for name in names) else ""
+        for info in infos:
+            yield info.filename, info.file_size, lambda i=info: zf.read(i), prefix
+
+
+def iter_archive(archive_path: str, max_files: int, max_size_bytes: int,
+                 read_content: bool = True) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """📦 Mesma interface de `iter_files` sobre os membros de um arquivo compactado.
+
+    Os membros são descomprimidos em memória um de cada vez (tar em modo stream, sem
+    seek); um diretório raiz único é removido dos caminhos relativos.
+    """
+    members = _iter_zip_members if archive_path.lower().endswith(".zip") else _iter_tar_members
+    yielded = 0
+    for name, size, read, prefix in members(archive_path):
+        if yielded >= max_files:
+            return
+        rel_path = _member_path(name, prefix)
+        if rel_path is None:
+            continue
+        file_path = f"{archive_path}/{rel_path}"
+        if not _eligible(rel_path, size, max_size_bytes, file_path):
+            continue
+        content = None
+        if read_content:
+            try:
+                content = read().decode("utf-8", errors="ignore")
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao ler {file_path}: {e}")
+                continue
+        yielded += 1
+        yield file_path, rel_path, content
+
+
+def archive_members(archive_path: str) -> Set[str]:
+    """📋 Caminhos relativos de todos os membros regulares (sem filtros de extensão ou tamanho)"""
+    members = _iter_zip_members if archive_path.lower().endswith(".zip") else _iter_tar_members
+    paths = set()
+    for name, _, _, prefix in members(archive_path):
+        rel_path = _member_path(name, prefix)
+        if rel_path is not None:
+            paths.add(rel_path)
+    return paths
+
+
+def read_sources(root_dir: str, files: Dict[str, str], max_size_bytes: int = sys.maxsize) -> Dict[str, str]:
+    """📖 Relê o conteúdo de `{rel_path: file_path}`: do disco ou numa passada pelo arquivo compactado"""
+    contents: Dict[str, str] = {}
+    if is_archive(root_dir):
+        for _, rel, content in iter_archive(root_dir, sys.maxsize, max_size_bytes):
+            if rel in files:
+                contents[rel] = content
+                if len(contents) == len(files):
+                    break
+        return contents
+    for rel, file_path in files.items():
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                contents[rel] = f.read()
+        except OSError as e:
+            logger.warning(f"⚠️ Falha ao ler {file_path}: {e}")
+    return contents
+
+
+def truncate_for_prompt(content: str, max_chars: int = MAX_CHARS) -> str:
+    """✂️ Trunca conteúdo muito grande para colocar no prompt"""
+    return content if len(content) <= max_chars else content[:max_chars] + "\n\n... (truncated)"